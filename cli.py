@@ -0,0 +1,364 @@
+import argparse
+import contextlib
+import json
+import sys
+import time
+
+import controladores as controlador
+from scripts.comun import pool_graficos, progreso
+from scripts.comun.formatos import normalizar_formatos
+from scripts.comun.render import PERFILES_RENDER, COMPRESIONES_PDF
+from scripts.comun.secciones import resolver_secciones
+from scripts.instancias_externas.graficos import SECCIONES_INSTANCIAS, INFORMES_INSTANCIAS
+from scripts.iniciativas.graficos import SECCIONES_VFORM, INFORMES_VFORM
+
+
+# ============================================================
+# 🖥 Modo por lotes (sin interfaz gráfica)
+# ============================================================
+# Los mismos pasos que la interfaz (validar → filtrar por meses →
+# seleccionar → Excel + PDFs) con las funciones de `controladores`,
+# sin importar Tk. Los logs y el avance por etapa (con ETA) van a stderr
+# y el resumen del trabajo, en JSON, a stdout (o a `--resumen`).
+#
+#   python main.py --formulario instancias --archivo participaciones.xlsx \
+#       --anio 2025 --desde Marzo --hasta Junio --modo subdependencias --salida salida/
+#
+#   python main.py --formulario vform --iniciativas iniciativas.xlsx --sintesis sintesis.xlsx \
+#       --modo dependencias --seleccion "Rectoría" --informe tabla --salida salida/
+#
+#   python main.py --formulario vform --iniciativas iniciativas.xlsx --sintesis s2024.xlsx \
+#       --sintesis s2025.xlsx --modo union --duplicados ultimo --salida salida/
+
+# Códigos de salida
+SALIDA_OK = 0
+SALIDA_ERROR = 1
+SALIDA_USO = 2            # argumentos inválidos (también lo usa argparse)
+SALIDA_ARCHIVO = 3        # archivo que no pasa la validación
+SALIDA_SIN_DATOS = 4      # nada que exportar tras el filtro / la selección
+SALIDA_INTERRUMPIDA = 130
+
+FORMULARIOS = {
+    "instancias": controlador.FORMULARIO_INSTANCIAS,
+    "vform": controlador.FORMULARIO_VFORM,
+}
+
+_INFORMES = {
+    "instancias": (SECCIONES_INSTANCIAS, INFORMES_INSTANCIAS),
+    "vform": (SECCIONES_VFORM, INFORMES_VFORM),
+}
+
+
+class ErrorUso(Exception):
+    """Combinación de argumentos inválida (código de salida 2)."""
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(
+        prog="zodiac",
+        description="Zodiac ETL por lotes: divide los formularios y genera Excel y PDFs sin interfaz gráfica."
+    )
+
+    entrada = parser.add_argument_group("entrada")
+    entrada.add_argument("--formulario", required=True, choices=FORMULARIOS,
+                         help="tipo de formulario")
+    entrada.add_argument("--archivo", help="Excel del formulario de instancias externas")
+    entrada.add_argument("--iniciativas", help="Excel de Iniciativas VcM")
+    entrada.add_argument("--sintesis", action="append",
+                         help="Excel de Síntesis Evaluativa (repetible en modo union)")
+
+    periodo = parser.add_argument_group("período (filtro de meses)")
+    periodo.add_argument("--anio", type=int, help="año a filtrar (sin él no se filtra)")
+    periodo.add_argument("--mes", help="mes (p. ej. Marzo) o 'todo' para el año completo")
+    periodo.add_argument("--desde", help="primer mes del rango")
+    periodo.add_argument("--hasta", help="último mes del rango")
+
+    trabajo = parser.add_argument_group("trabajo")
+    trabajo.add_argument("--modo", required=True, choices=("dependencias", "subdependencias", "union"),
+                         help="división (union: solo vform, sin PDFs)")
+    trabajo.add_argument("--seleccion", action="append", metavar="DEP[::SUB]",
+                         help="partición a exportar (repetible); por defecto, todas")
+    trabajo.add_argument("--salida", help="carpeta base de salida")
+    trabajo.add_argument("--reanudar", metavar="CARPETA",
+                         help="reanuda una exportación interrumpida (usa sus parámetros)")
+
+    salida = parser.add_argument_group("formatos")
+    salida.add_argument("--formatos", default="xlsx", help="xlsx,parquet,feather,csv (separados por coma)")
+    salida.add_argument("--excel-tabla", action="store_true", help="Excel con formato de tabla")
+    salida.add_argument("--agrupacion", default="archivo", choices=("archivo", "dependencia", "unico"),
+                        help="agrupación de los Excel de subdependencias (vform)")
+    salida.add_argument("--duplicados", default="permitir", choices=controlador.ESTRATEGIAS_DUPLICADOS,
+                        help="IDs repetidos en la Síntesis (modo union): permitir (uno-a-muchos), "
+                             "primero, ultimo, agregar o error")
+    salida.add_argument("--zip", action="store_true", help="escribir la salida en un ZIP")
+    salida.add_argument("--calidad", default="impresion", choices=PERFILES_RENDER,
+                        help="perfil de render de los gráficos")
+    salida.add_argument("--imagenes", default="sin_perdida", choices=COMPRESIONES_PDF,
+                        help="compresión de imágenes en los PDFs")
+    salida.add_argument("--informe", default="completo",
+                        help="tipo de informe o secciones separadas por coma")
+    salida.add_argument("--consolidado", action="store_true",
+                        help="un solo PDF con todas las particiones (en lugar de un PDF por partición)")
+
+    parser.add_argument("--procesos", type=int, help="procesos del pool de gráficos (1 = en serie)")
+    parser.add_argument("--resumen", metavar="RUTA", help="escribe el resumen JSON en RUTA en vez de stdout")
+    parser.add_argument("--progreso", default="texto", choices=("texto", "json", "no"),
+                        help="avance por etapa en stderr: legible, una línea JSON por evento, o nada")
+    return parser
+
+
+# ------------------------------------------------------------
+# 🔧 Argumentos → parámetros de `controladores`
+# ------------------------------------------------------------
+def filtro_desde_argumentos(args):
+    """Dict de filtro con el formato de la ventana de meses, o None sin `--anio`."""
+    if args.anio is None:
+        if args.mes or args.desde or args.hasta:
+            raise ErrorUso("--mes/--desde/--hasta requieren --anio.")
+        return None
+
+    try:
+        if args.desde or args.hasta:
+            if args.mes or not (args.desde and args.hasta):
+                raise ErrorUso("Use --mes, o bien --desde y --hasta.")
+            if controlador.numero_mes(args.desde) > controlador.numero_mes(args.hasta):
+                raise ErrorUso("--desde debe ser anterior o igual a --hasta.")
+            return {"modo": "rango", "anio": args.anio, "inicio": args.desde, "fin": args.hasta}
+
+        mes = args.mes or "todo"
+        if mes.strip().lower() == "todo":
+            return {"modo": "mes", "anio": args.anio, "mes": "todo"}
+        controlador.numero_mes(mes)
+        return {"modo": "mes", "anio": args.anio, "mes": mes}
+    except ValueError as e:
+        raise ErrorUso(str(e))
+
+
+def _seleccion_desde_texto(texto, modo):
+    if modo == "subdependencias":
+        if "::" not in texto:
+            raise ErrorUso(f"En modo subdependencias la selección es 'Dependencia::Subdependencia': '{texto}'")
+        dependencia, subdependencia = texto.split("::", 1)
+        return (dependencia.strip(), subdependencia.strip())
+    return texto.strip()
+
+
+def seleccionables(formulario, modo, datos):
+    """Particiones que la interfaz ofrecería para elegir (dependencias o pares (dep, sub))."""
+    if modo == "union":
+        return None
+
+    df = datos if formulario == "instancias" else datos["iniciativas"]
+    if modo == "dependencias":
+        return list(controlador.get_dependencias(df) if formulario == "instancias"
+                    else controlador.get_dependencias_vform(df))
+
+    jerarquia = (controlador.get_subdependencias(df) if formulario == "instancias"
+                 else controlador.get_subdependencias_vform(df))
+    return [(dependencia, sub) for dependencia, subs in jerarquia.items() for sub in subs]
+
+
+def resolver_seleccion(args, disponibles):
+    """`--seleccion` validada contra las particiones disponibles; por defecto, todas."""
+    if disponibles is None:
+        if args.seleccion:
+            raise ErrorUso("--seleccion no aplica al modo union.")
+        return None
+    if not args.seleccion:
+        return disponibles
+
+    seleccionadas = []
+    for texto in args.seleccion:
+        sel = _seleccion_desde_texto(texto, args.modo)
+        if sel not in disponibles:
+            raise ErrorUso(f"Partición no disponible con el filtro actual: '{texto}'")
+        if sel not in seleccionadas:
+            seleccionadas.append(sel)
+    return seleccionadas
+
+
+def cargar_datos(args):
+    """Valida y transforma los Excel como la interfaz. Retorna los datos o None si no son válidos."""
+    tipo = FORMULARIOS[args.formulario]
+
+    if args.formulario == "instancias":
+        if not args.archivo:
+            raise ErrorUso("El formulario instancias requiere --archivo.")
+        valido, df = controlador.validar_archivo_formulario(args.archivo, tipo)
+        return df if valido else None
+
+    if not (args.iniciativas and args.sintesis):
+        raise ErrorUso("El formulario vform requiere --iniciativas y --sintesis.")
+    if len(args.sintesis) > 1 and args.modo != "union":
+        raise ErrorUso("Varias --sintesis solo se pueden combinar en el modo union.")
+
+    valido, df1 = controlador.validar_archivo_formulario(args.iniciativas, tipo, "columnas_vform1")
+    sintesis = []
+    for ruta in args.sintesis:
+        valido_sintesis, df2 = controlador.validar_archivo_formulario(ruta, tipo, "columnas_vform2")
+        valido = valido and valido_sintesis
+        sintesis.append((ruta, df2))
+    if not valido:
+        return None
+    return {"iniciativas": df1, "sintesis": controlador.combinar_sintesis(sintesis)}
+
+
+def filtrar_datos(formulario, datos, filtro):
+    tipo = FORMULARIOS[formulario]
+    if formulario == "instancias":
+        return controlador.aplicar_filtro_meses(datos, filtro, tipo)
+    return {
+        "iniciativas": controlador.aplicar_filtro_meses(datos["iniciativas"], filtro, tipo),
+        "sintesis": datos["sintesis"]
+    }
+
+
+def _aplicar_reanudacion(args):
+    """Toma de la bitácora de `--reanudar` los parámetros de la ejecución original."""
+    parametros = controlador.get_parametros_reanudacion(args.reanudar)
+    if parametros is None:
+        raise ErrorUso(f"No hay una exportación reanudable en '{args.reanudar}'.")
+    if parametros.get("tipo") != args.formulario:
+        raise ErrorUso(f"La exportación interrumpida es del formulario '{parametros.get('tipo')}'.")
+    if parametros.get("modo") != args.modo:
+        raise ErrorUso(f"La exportación interrumpida es del modo '{parametros.get('modo')}'.")
+
+    args.formatos = parametros.get("formatos") or ["xlsx"]
+    args.excel_tabla = parametros.get("perfil_excel") == "tabla"
+    args.agrupacion = parametros.get("agrupacion", "archivo")
+    args.duplicados = parametros.get("estrategia_duplicados", "permitir")
+    # Bitácoras anteriores no guardan las opciones de los PDFs: se mantienen las de la línea de comandos
+    args.calidad = parametros.get("perfil_render") or args.calidad
+    args.imagenes = parametros.get("compresion_pdf") or args.imagenes
+    args.informe = parametros.get("informe") or args.informe
+    args.consolidado = parametros.get("consolidado", args.consolidado)
+    return parametros.get("filtro"), parametros.get("seleccionadas")
+
+
+# ------------------------------------------------------------
+# 🚀 Ejecución
+# ------------------------------------------------------------
+def ejecutar(args):
+    """Corre el trabajo y devuelve (código de salida, resumen)."""
+    resumen = {"formulario": args.formulario, "modo": args.modo}
+
+    if args.modo == "union" and args.formulario != "vform":
+        raise ErrorUso("El modo union solo está disponible para el formulario vform.")
+    if not args.salida and not args.reanudar:
+        raise ErrorUso("Indique --salida (o --reanudar).")
+
+    try:
+        formatos = normalizar_formatos(args.formatos)
+        resolver_secciones(*_INFORMES[args.formulario], args.informe)
+    except ValueError as e:
+        raise ErrorUso(str(e))
+
+    if args.reanudar:
+        filtro, seleccion_original = _aplicar_reanudacion(args)
+        formatos = normalizar_formatos(args.formatos)
+    else:
+        filtro, seleccion_original = filtro_desde_argumentos(args), None
+
+    if args.procesos is not None:
+        pool_graficos.configurar_pool(args.procesos)
+
+    datos = cargar_datos(args)
+    if datos is None:
+        return SALIDA_ARCHIVO, dict(resumen, error="Archivo inválido.")
+
+    datos = filtrar_datos(args.formulario, datos, filtro)
+    resumen["filtro"] = filtro
+
+    disponibles = seleccionables(args.formulario, args.modo, datos)
+    seleccionadas = seleccion_original or resolver_seleccion(args, disponibles)
+    if disponibles is not None and not seleccionadas:
+        return SALIDA_SIN_DATOS, dict(resumen, error="No hay particiones para exportar con el filtro actual.")
+
+    tiempos = []
+    inicio = time.perf_counter()
+    resultado = controlador.ejecutar_exportacion(
+        FORMULARIOS[args.formulario], args.modo, datos, args.salida, seleccionadas,
+        reanudar_en=args.reanudar, filtro=filtro, formatos=list(formatos),
+        perfil_excel="tabla" if args.excel_tabla else "clasico", agrupacion=args.agrupacion,
+        zip_salida=args.zip, perfil_render=args.calidad, compresion_pdf=args.imagenes,
+        consolidado=args.consolidado, informe=args.informe, tiempos=tiempos,
+        estrategia_duplicados=args.duplicados
+    )
+
+    resumen.update(
+        seleccionadas=[list(s) if isinstance(s, tuple) else s for s in seleccionadas or []],
+        ruta=resultado["ruta"],
+        pdfs=resultado["pdfs"],
+        segundos=round(time.perf_counter() - inicio, 3),
+        tiempos=[dict(t, particion=list(t["particion"]) if isinstance(t["particion"], tuple) else t["particion"])
+                 for t in tiempos],
+    )
+    if resultado["ruta"] is None:
+        return SALIDA_ERROR, dict(resumen, error="Error al exportar.")
+    if args.modo != "union" and not resultado["pdfs"]:
+        # Ninguna partición seleccionada estaba en los datos (p. ej. al reanudar con otro archivo)
+        return SALIDA_SIN_DATOS, dict(resumen, error="Ninguna partición seleccionada coincide con los datos.")
+    return SALIDA_OK, resumen
+
+
+class InformeAvance:
+    """Oyente de `progreso`: escribe el avance en stderr y junta el total de cada etapa."""
+
+    def __init__(self, formato, salida):
+        self.formato = formato
+        self.salida = salida
+        self.etapas = []
+
+    def __call__(self, evento):
+        if evento.tipo == "fin":
+            self.etapas.append({
+                "etapa": evento.etapa, "estado": evento.estado, "segundos": evento.segundos,
+                "hechos": evento.hechos, "total": evento.total, "filas": evento.filas, "bytes": evento.bytes,
+            })
+
+        if self.formato == "json":
+            print(json.dumps(evento.como_dict(), ensure_ascii=False), file=self.salida, flush=True)
+        elif self.formato == "texto":
+            print(f"⏳ {evento.texto()}", file=self.salida, flush=True)
+
+
+def _escribir_resumen(resumen, ruta):
+    texto = json.dumps(resumen, ensure_ascii=False, indent=2, default=str)
+    if ruta:
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+
+def main(argv=None):
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+
+    avance = InformeAvance(args.progreso, sys.stderr)
+    try:
+        # Los logs del proceso (prints) van a stderr: stdout queda para el JSON
+        with contextlib.redirect_stdout(sys.stderr), progreso.escuchar(avance):
+            codigo, resumen = ejecutar(args)
+    except ErrorUso as e:
+        parser.print_usage(sys.stderr)
+        print(f"{parser.prog}: error: {e}", file=sys.stderr)
+        codigo, resumen = SALIDA_USO, {"error": str(e)}
+    except KeyboardInterrupt:
+        codigo, resumen = SALIDA_INTERRUMPIDA, {"error": "Interrumpido."}
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        codigo, resumen = SALIDA_ERROR, {"error": str(e)}
+    finally:
+        pool_graficos.cerrar_pool()
+
+    resumen = dict(resumen, estado="ok" if codigo == SALIDA_OK else "error", codigo=codigo,
+                   etapas=avance.etapas)
+    _escribir_resumen(resumen, args.resumen)
+    return codigo
+
+
+if __name__ == "__main__":
+    from multiprocessing import freeze_support
+    freeze_support()
+    sys.exit(main())
@@ -1,15 +1,30 @@
 import pandas as pd
 import os
 from datetime import datetime
+from functools import wraps
 
 from scripts.instancias_externas.validar_transformar import verificar_archivo_excel, limpiar_y_renombrar_columnas
 from scripts.instancias_externas.dependencias import obtener_dependencias, dividir_por_dependencia, exportar_dependencias
 from scripts.instancias_externas.subdependencias import dividir_por_subdependencia, exportar_subdependencias
+from scripts.instancias_externas.multivalor import tablas_multivalor
 
 from scripts.iniciativas.validar_transformar import validar_excel_vform, limpiar_columnas_vform
 from scripts.iniciativas.dependencias import obtener_dependencias_vform, dividir_dependencias_vform, exportar_dependencias_vform
 from scripts.iniciativas.subdependencias import dividir_subdependencias_vform, exportar_subdependencias_vform
-from scripts.iniciativas.union import unir_dataset, exportar_union
+from scripts.iniciativas.union import preparar_union, exportar_union_por_bloques, ESTRATEGIAS_DUPLICADOS
+
+from scripts.instancias_externas.graficos import generar_graficos_y_pdfs
+from scripts.iniciativas.graficos import generar_resumenes_pdf_vform
+
+from scripts.comun.bitacora import BitacoraExportacion, leer_bitacora
+from scripts.comun.salida import DestinoZip
+from scripts.comun.formatos import normalizar_formatos
+from scripts.comun.progreso import Cancelado, Etapa
+
+# Tipos de formulario (los mismos textos que muestra la interfaz)
+FORMULARIO_INSTANCIAS = "Formulario de Participaciones en Instancias Externas"
+FORMULARIO_VFORM = "Formulario de Iniciativas VcM"
+
 
 def validar_excel(ruta_excel: str):
     """
@@ -51,23 +66,32 @@ def validar_archivo_formulario(ruta_excel: str, tipo_formulario: str, tipo_colum
     Retorna: (bool, DataFrame)
     """
 
-    if tipo_formulario == "Formulario de Participaciones en Instancias Externas":
-        # Usa el validador normal
-        return validar_excel(ruta_excel)
+    with Etapa("validacion", total=1, detalle=os.path.basename(str(ruta_excel))) as avance:
+        if tipo_formulario == FORMULARIO_INSTANCIAS:
+            # Usa el validador normal
+            valido, df = validar_excel(ruta_excel)
 
-    elif tipo_formulario == "Formulario de Iniciativas VcM":
-        # Usa validador VForm
-        return ctr_validar_excel_vform(ruta_excel, tipo_columns)
+        elif tipo_formulario == FORMULARIO_VFORM:
+            # Usa validador VForm
+            valido, df = ctr_validar_excel_vform(ruta_excel, tipo_columns)
 
-    else:
-        print("⚠ Tipo de formulario desconocido")
-        return False, None
+        else:
+            print("⚠ Tipo de formulario desconocido")
+            return False, None
+
+        avance(filas=len(df) if df is not None else 0)
+
+    return valido, df
 
 
 def get_dependencias(df):
     """Devuelve una lista de dependencias encontradas en el DataFrame."""
     return obtener_dependencias(df)
 
+def get_tablas_multivalor(df):
+    """Ámbitos y ODS explotados una vez (tablas largas fila → código) para los PDFs."""
+    return tablas_multivalor(df)
+
 def get_dependencias_vform(df):
     return obtener_dependencias_vform(df)
 
@@ -104,64 +128,223 @@ def get_subdependencias_vform(df):
             jerarquia[dependencia] = []
 
     return jerarquia
+# -------------------------------------------------------------
+# 📅 Filtro por meses
+# -------------------------------------------------------------
+MESES = [
+    "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
+    "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
+]
+
+# Columna de fecha con la que se filtra cada formulario
+COLUMNA_FECHA_FILTRO = {
+    FORMULARIO_INSTANCIAS: "Hora de inicio",
+    FORMULARIO_VFORM: "Fecha de creación"
+}
+
+
+def numero_mes(texto):
+    """1-12 para "Marzo", "marzo" o "♈ Marzo" (como lo entrega la ventana de filtro)."""
+    nombre = str(texto).strip().split(" ")[-1].capitalize()
+    if nombre not in MESES:
+        raise ValueError(f"❌ Mes desconocido: '{texto}'. Opciones: {', '.join(MESES)}")
+    return MESES.index(nombre) + 1
+
+
+def aplicar_filtro_meses(df: pd.DataFrame, filtro: dict, tipo_formulario: str):
+    """
+    Filtra `df` por el período de `filtro`:
+        {"modo": "mes", "anio": 2025, "mes": "Marzo"}     (o "mes": "todo")
+        {"modo": "rango", "anio": 2025, "inicio": "Marzo", "fin": "Junio"}
+    Sin filtro, sin año o sin la columna de fecha, devuelve `df` tal cual.
+    """
+    if df is None or not isinstance(df, pd.DataFrame) or not filtro:
+        return df
+
+    columna_fecha = COLUMNA_FECHA_FILTRO.get(tipo_formulario, "Fecha de creación")
+    anio = filtro.get("anio")
+    if columna_fecha not in df.columns or anio is None:
+        return df
+
+    df2 = df.copy()
+    df2[columna_fecha] = pd.to_datetime(df2[columna_fecha], errors="coerce", dayfirst=True)
+    fechas = df2[columna_fecha].dt
+
+    if filtro["modo"] == "mes":
+        if filtro["mes"] == "todo":
+            return df2[fechas.year == anio]
+        return df2[(fechas.year == anio) & (fechas.month == numero_mes(filtro["mes"]))]
+
+    m1, m2 = numero_mes(filtro["inicio"]), numero_mes(filtro["fin"])
+    return df2[(fechas.year == anio) & (fechas.month >= m1) & (fechas.month <= m2)]
+
+
+# -------------------------------------------------------------
+# 📒 Carpeta de salida y bitácora (reanudación)
+# -------------------------------------------------------------
+def _preparar_salida(ruta_salida_base: str, prefijo: str, reanudar_en: str = None, zip_salida: bool = False,
+                     **parametros):
+    """
+    Crea la carpeta de salida fechada e inicia una bitácora nueva con los
+    parámetros del trabajo. Si `reanudar_en` apunta a una carpeta de una
+    ejecución interrumpida, la reutiliza junto con su bitácora.
+
+    Con `zip_salida=True` la salida es un único "<prefijo> <fecha>.zip"
+    (ver `abrir_destino` / `cerrar_destino`) y no hay bitácora: un ZIP
+    incompleto nunca se publica, así que no hay nada que reanudar.
+    """
+    if reanudar_en:
+        print(f"⏯ Reanudando exportación en: {reanudar_en}")
+        return reanudar_en, BitacoraExportacion(reanudar_en, reanudar=True)
+
+    fecha = datetime.now().strftime("%Y-%m-%d")
+    ruta_salida_final = os.path.join(ruta_salida_base, f"{prefijo} {fecha}")
+
+    if zip_salida:
+        ruta_salida_final += ".zip"
+        _DESTINOS_ZIP[ruta_salida_final] = DestinoZip(ruta_salida_final, parametros)
+        return ruta_salida_final, None
+
+    os.makedirs(ruta_salida_final, exist_ok=True)
+
+    bitacora = BitacoraExportacion(ruta_salida_final)
+    bitacora.guardar_parametros(**parametros)
+    return ruta_salida_final, bitacora
+
+
+# ZIPs abiertos por ejecución: las etapas siguientes (PDFs) escriben en el mismo archivo
+_DESTINOS_ZIP = {}
+
+
+def abrir_destino(ruta_salida_final: str):
+    """`DestinoZip` abierto de una ejecución, o None si la salida es una carpeta."""
+    return _DESTINOS_ZIP.get(ruta_salida_final)
+
+
+def cerrar_destino(ruta_salida_final: str, descartar: bool = False):
+    """Publica el ZIP de la ejecución (con su índice). Sin efecto para carpetas."""
+    destino = _DESTINOS_ZIP.pop(ruta_salida_final, None)
+    if destino is not None:
+        destino.cerrar(descartar=descartar)
+        if not descartar:
+            print(f"🗜 Archivo ZIP generado: {ruta_salida_final}")
+
+
+def abrir_bitacora(ruta_salida_final: str):
+    """Bitácora existente de una carpeta de salida (para las etapas siguientes, p. ej. PDFs)."""
+    if ruta_salida_final in _DESTINOS_ZIP:
+        return None
+    return BitacoraExportacion(ruta_salida_final, reanudar=True)
+
+
+def get_parametros_reanudacion(ruta_salida_final: str):
+    """
+    Lee la bitácora de una exportación interrumpida.
+    Retorna el dict de parámetros (con selecciones jerárquicas como tuplas) o None.
+    """
+    datos = leer_bitacora(ruta_salida_final)
+    if not datos or not datos.get("parametros"):
+        return None
+
+    parametros = dict(datos["parametros"])
+    seleccionadas = parametros.get("seleccionadas")
+    if seleccionadas and all(isinstance(s, list) for s in seleccionadas):
+        parametros["seleccionadas"] = [tuple(s) for s in seleccionadas]
+    return parametros
+
+
 # -------------------------------------------------------------
 # 🚀 Procesar por dependencias
 # -------------------------------------------------------------
-def procesar_excel_dependencias(df: pd.DataFrame, ruta_salida_base: str, seleccionadas: list = None):
+def procesar_excel_dependencias(df: pd.DataFrame, ruta_salida_base: str, seleccionadas: list = None,
+                                reanudar_en: str = None, metadatos: dict = None, formatos: list = None,
+                                perfil_excel: str = "clasico", zip_salida: bool = False):
     """Procesa el Excel y exporta los archivos en una subcarpeta dentro de la carpeta seleccionada."""
+    ruta_salida_final = None
     try:
+        formatos = normalizar_formatos(formatos)
+
         print("📊 Dividiendo por dependencias...")
-        dfs = dividir_por_dependencia(df)
+        with Etapa("division") as avance:
+            dfs = dividir_por_dependencia(df)
+            avance(filas=len(df))
 
-        # 🗂️ Crear carpeta de salida
-        fecha = datetime.now().strftime("%Y-%m-%d")
-        ruta_salida_final = os.path.join(ruta_salida_base, f"Instancias Externas (VcM) - Dependencias {fecha}")
-        os.makedirs(ruta_salida_final, exist_ok=True)
+        # 🗂️ Crear (o reutilizar) carpeta de salida
+        ruta_salida_final, bitacora = _preparar_salida(
+            ruta_salida_base, "Instancias Externas (VcM) - Dependencias", reanudar_en, zip_salida,
+            tipo="instancias", modo="dependencias", seleccionadas=seleccionadas,
+            formatos=formatos, perfil_excel=perfil_excel, **(metadatos or {})
+        )
 
         print(f"💾 Exportando dependencias en: {ruta_salida_final}")
-        exportar_dependencias(dfs, ruta_salida_final, seleccionadas=seleccionadas)
+        exportar_dependencias(dfs, ruta_salida_final, seleccionadas=seleccionadas,
+                              bitacora=bitacora, formatos=formatos, perfil_excel=perfil_excel,
+                              destino=abrir_destino(ruta_salida_final))
 
         print("\n✅ Proceso ETL completado con éxito.")
         return ruta_salida_final, dfs
     except Exception as e:
+        cerrar_destino(ruta_salida_final, descartar=True)
         print(f"❌ Error durante el proceso ETL: {e}")
         return None, None
 
 
-def get_excels_dependencias_vform(df1: pd.DataFrame, df2: pd.DataFrame, ruta_salida_base: str, seleccionadas: list = None):
+def get_excels_dependencias_vform(df1: pd.DataFrame, df2: pd.DataFrame, ruta_salida_base: str, seleccionadas: list = None,
+                                  reanudar_en: str = None, metadatos: dict = None, formatos: list = None,
+                                  perfil_excel: str = "clasico", zip_salida: bool = False):
     """Procesa el Excel y exporta los archivos en una subcarpeta dentro de la carpeta seleccionada."""
+    ruta_salida_final = None
     try:
+        formatos = normalizar_formatos(formatos)
+
         print("📊 Dividiendo por dependencias...")
-        dfs1 = dividir_dependencias_vform(df1)
+        with Etapa("division") as avance:
+            dfs1 = dividir_dependencias_vform(df1)
+            avance(filas=len(df1))
 
-        # 🗂️ Crear carpeta de salida
-        fecha = datetime.now().strftime("%Y-%m-%d")
-        ruta_salida_final = os.path.join(ruta_salida_base, f"Iniciativas (VcM) - Dependencias {fecha}")
-        os.makedirs(ruta_salida_final, exist_ok=True)
+        # 🗂️ Crear (o reutilizar) carpeta de salida
+        ruta_salida_final, bitacora = _preparar_salida(
+            ruta_salida_base, "Iniciativas (VcM) - Dependencias", reanudar_en, zip_salida,
+            tipo="vform", modo="dependencias", seleccionadas=seleccionadas,
+            formatos=formatos, perfil_excel=perfil_excel, **(metadatos or {})
+        )
 
         print(f"💾 Exportando dependencias en: {ruta_salida_final}")
-        dfs2 = exportar_dependencias_vform(dfs1, df2, ruta_salida_final, seleccionadas=seleccionadas)
+        dfs2 = exportar_dependencias_vform(dfs1, df2, ruta_salida_final, seleccionadas=seleccionadas,
+                                           bitacora=bitacora, formatos=formatos, perfil_excel=perfil_excel,
+                                           destino=abrir_destino(ruta_salida_final))
 
         print("\n✅ Proceso ETL completado con éxito.")
         return ruta_salida_final, dfs1, dfs2
     except Exception as e:
+        cerrar_destino(ruta_salida_final, descartar=True)
         print(f"❌ Error durante el proceso ETL: {e}")
         return None, None, None
 
 # -------------------------------------------------------------
 # 🚀 Procesar por subdependencias
 # -------------------------------------------------------------
-def procesar_excel_subdependencias(df: pd.DataFrame, ruta_salida_base: str, seleccionadas: list = None):
+def procesar_excel_subdependencias(df: pd.DataFrame, ruta_salida_base: str, seleccionadas: list = None,
+                                   reanudar_en: str = None, metadatos: dict = None, formatos: list = None,
+                                   perfil_excel: str = "clasico", zip_salida: bool = False):
     """Procesa y exporta solo las subdependencias seleccionadas."""
+    ruta_salida_final = None
     try:
-        print("📊 Dividiendo por subdependencias...")
-        df_dependencias = dividir_por_dependencia(df)
-        dfs_sub = dividir_por_subdependencia(df_dependencias)
+        formatos = normalizar_formatos(formatos)
 
-        # 🗂️ Crear carpeta de salida
-        fecha = datetime.now().strftime("%Y-%m-%d")
-        ruta_salida_final = os.path.join(ruta_salida_base, f"Instancias Externas (VcM) - Subdependencias {fecha}")
-        os.makedirs(ruta_salida_final, exist_ok=True)
+        print("📊 Dividiendo por subdependencias...")
+        with Etapa("division", total=2) as avance:
+            df_dependencias = dividir_por_dependencia(df)
+            avance(filas=len(df))
+            dfs_sub = dividir_por_subdependencia(df_dependencias)
+            avance()
+
+        # 🗂️ Crear (o reutilizar) carpeta de salida
+        ruta_salida_final, bitacora = _preparar_salida(
+            ruta_salida_base, "Instancias Externas (VcM) - Subdependencias", reanudar_en, zip_salida,
+            tipo="instancias", modo="subdependencias", seleccionadas=seleccionadas,
+            formatos=formatos, perfil_excel=perfil_excel, **(metadatos or {})
+        )
 
         # 🧩 Ajustar la lista de seleccionadas si viene como lista de tuplas (dep, subdep)
         if seleccionadas and all(isinstance(s, tuple) and len(s) == 2 for s in seleccionadas):
@@ -170,25 +353,44 @@ def procesar_excel_subdependencias(df: pd.DataFrame, ruta_salida_base: str, sele
             seleccionadas_sub = seleccionadas
 
         print(f"💾 Exportando dependencias en: {ruta_salida_final}")
-        exportar_subdependencias(dfs_sub, ruta_salida_final, seleccionadas=seleccionadas_sub)
+        exportar_subdependencias(dfs_sub, ruta_salida_final, seleccionadas=seleccionadas_sub,
+                                 bitacora=bitacora, formatos=formatos, perfil_excel=perfil_excel,
+                                 destino=abrir_destino(ruta_salida_final))
 
         print("\n✅ Proceso ETL completado con éxito.")
         return ruta_salida_final, dfs_sub
 
     except Exception as e:
+        cerrar_destino(ruta_salida_final, descartar=True)
         print(f"❌ Error durante el proceso ETL: {e}")
         return None, None
 
-def get_excels_subdependencias_vform(df1: pd.DataFrame, df2: pd.DataFrame, ruta_salida_base: str, seleccionadas: list = None):
-    """Procesa y exporta solo las subdependencias seleccionadas."""
+def get_excels_subdependencias_vform(df1: pd.DataFrame, df2: pd.DataFrame, ruta_salida_base: str, seleccionadas: list = None,
+                                     reanudar_en: str = None, metadatos: dict = None, formatos: list = None,
+                                     perfil_excel: str = "clasico", agrupacion: str = "archivo",
+                                     zip_salida: bool = False):
+    """
+    Procesa y exporta solo las subdependencias seleccionadas.
+    `agrupacion`: "archivo" (un Excel por subdependencia), "dependencia"
+    (un Excel por dependencia) o "unico" (un Excel para toda la ejecución).
+    `zip_salida=True` escribe todo en un único ZIP; las etapas siguientes lo
+    obtienen con `abrir_destino` y lo publican con `cerrar_destino`.
+    """
+    ruta_salida_final = None
     try:
+        formatos = normalizar_formatos(formatos)
+
         print("📊 Dividiendo por subdependencias...")
-        dfs_sub1 = dividir_subdependencias_vform(df1)
+        with Etapa("division") as avance:
+            dfs_sub1 = dividir_subdependencias_vform(df1)
+            avance(filas=len(df1))
 
-        # 🗂️ Crear carpeta de salida
-        fecha = datetime.now().strftime("%Y-%m-%d")
-        ruta_salida_final = os.path.join(ruta_salida_base, f"Iniciativas (VcM) - Subdependencias {fecha}")
-        os.makedirs(ruta_salida_final, exist_ok=True)
+        # 🗂️ Crear (o reutilizar) carpeta de salida
+        ruta_salida_final, bitacora = _preparar_salida(
+            ruta_salida_base, "Iniciativas (VcM) - Subdependencias", reanudar_en, zip_salida,
+            tipo="vform", modo="subdependencias", seleccionadas=seleccionadas,
+            formatos=formatos, perfil_excel=perfil_excel, agrupacion=agrupacion, **(metadatos or {})
+        )
 
         # 🧩 Ajustar la lista de seleccionadas si viene como lista de tuplas (dep, subdep)
         if seleccionadas and all(isinstance(s, tuple) and len(s) == 2 for s in seleccionadas):
@@ -197,48 +399,224 @@ def get_excels_subdependencias_vform(df1: pd.DataFrame, df2: pd.DataFrame, ruta_
             seleccionadas_sub = seleccionadas
 
         print(f"💾 Exportando dependencias en: {ruta_salida_final}")
-        dfs_sub2 = exportar_subdependencias_vform(dfs_sub1, df2, ruta_salida_final, seleccionadas=seleccionadas_sub)
+        dfs_sub2 = exportar_subdependencias_vform(dfs_sub1, df2, ruta_salida_final, seleccionadas=seleccionadas_sub,
+                                                  bitacora=bitacora, formatos=formatos, perfil_excel=perfil_excel,
+                                                  agrupacion=agrupacion, destino=abrir_destino(ruta_salida_final))
 
         print("\n✅ Proceso ETL completado con éxito.")
         return ruta_salida_final, dfs_sub1, dfs_sub2
 
     except Exception as e:
+        cerrar_destino(ruta_salida_final, descartar=True)
         print(f"❌ Error durante el proceso ETL: {e}")
         return None, None, None
     
-def get_excels_union(df1: pd.DataFrame, df2: pd.DataFrame, ruta_salida_base: str):
-    """Procesa, une y exporta el dataset combinado en un solo Excel."""
+def get_excels_union(df1: pd.DataFrame, df2: pd.DataFrame, ruta_salida_base: str,
+                     reanudar_en: str = None, metadatos: dict = None, formatos: list = None,
+                     perfil_excel: str = "clasico", zip_salida: bool = False,
+                     estrategia_duplicados: str = "permitir"):
+    """
+    Procesa, une y exporta el dataset combinado en un solo Excel.
+    `df2` puede ser una Síntesis o varias (lista o dict {nombre: DataFrame});
+    `estrategia_duplicados` decide qué hacer con IDs repetidos (ver `preparar_union`).
+    """
 
+    ruta_salida_final = None
     try:
+        formatos = normalizar_formatos(formatos)
+
         print("🔗 Iniciando proceso de unión de datasets...")
 
         # ================================
-        # 1️⃣ UNIR DATASETS
+        # 1️⃣ PREPARAR UNIÓN (índice de ID)
         # ================================
-        print("📊 Realizando unión por columna 'ID'...")
-        df_unido = unir_dataset(df1, df2)
+        print("📊 Preparando unión por columna 'ID'...")
+        with Etapa("division") as avance:
+            plan = preparar_union(df1, df2, estrategia_duplicados=estrategia_duplicados)
+            avance(filas=len(df1))
 
-        if df_unido is None:
+        if plan is None:
             print("❌ No se pudo generar la unión. Proceso detenido.")
-            return None, None, None
+            return None
 
         # ================================
-        # 2️⃣ CREAR CARPETA DE SALIDA
+        # 2️⃣ CREAR (O REUTILIZAR) CARPETA DE SALIDA
         # ================================
-        fecha = datetime.now().strftime("%Y-%m-%d")
-        ruta_salida_final = os.path.join(ruta_salida_base, f"Union Dataset {fecha}")
-        os.makedirs(ruta_salida_final, exist_ok=True)
+        ruta_salida_final, bitacora = _preparar_salida(
+            ruta_salida_base, "Union Dataset", reanudar_en, zip_salida,
+            tipo="vform", modo="union", seleccionadas=None, formatos=formatos,
+            perfil_excel=perfil_excel, estrategia_duplicados=estrategia_duplicados, **(metadatos or {})
+        )
+
+        if bitacora is not None and bitacora.completada("excel", "union"):
+            print(f"⏭ Dataset unificado ya exportado en: {ruta_salida_final}")
+            return ruta_salida_final
 
         print(f"💾 Exportando dataset unificado en: {ruta_salida_final}")
 
         # ================================
         # 3️⃣ EXPORTAR EXCEL
         # ================================
-        logs_export = exportar_union(df_unido, ruta_salida_final, nombre="Dataset_Unificado")
+        # La unión se arma y escribe por bloques: nunca se materializa completa
+        logs_export = exportar_union_por_bloques(plan, ruta_salida_final, nombre="Dataset_Unificado",
+                                                 formatos=formatos, perfil_excel=perfil_excel,
+                                                 destino=abrir_destino(ruta_salida_final))
+        if bitacora is not None:
+            bitacora.registrar("excel", "union")
+            bitacora.finalizar("excel")
+
+        # La unión no tiene etapa de PDFs: el ZIP (si corresponde) se publica aquí
+        cerrar_destino(ruta_salida_final)
 
         print("\n✅ Proceso ETL completado con éxito.")
         return ruta_salida_final
 
     except Exception as e:
+        cerrar_destino(ruta_salida_final, descartar=True)
         print(f"❌ Error durante el proceso de unión: {e}")
         return None
+
+
+# -------------------------------------------------------------
+# 🏁 Exportación completa: Excel + PDFs
+# -------------------------------------------------------------
+def _descartar_zip_si_falla(funcion):
+    """
+    Si `funcion` no termina (cancelación, error o interrupción), los ZIP
+    que abrió quedan a medio escribir: se descartan en vez de publicarse.
+    """
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        zips_previos = set(_DESTINOS_ZIP)
+        try:
+            return funcion(*args, **kwargs)
+        except BaseException as e:
+            for ruta in set(_DESTINOS_ZIP) - zips_previos:
+                cerrar_destino(ruta, descartar=True)
+            if isinstance(e, Cancelado):
+                print("⏹ Exportación cancelada.")
+            raise
+    return envoltura
+
+
+def combinar_sintesis(sintesis):
+    """
+    [(ruta, DataFrame)] → la Síntesis para `ejecutar_exportacion`: el
+    DataFrame si es una sola, o {nombre del archivo: DataFrame} si son
+    varias (en la unión, el nombre sufija sus columnas repetidas).
+    """
+    if len(sintesis) == 1:
+        return sintesis[0][1]
+
+    por_nombre = {}
+    for ruta, df in sintesis:
+        base = os.path.splitext(os.path.basename(ruta))[0]
+        nombre, n = base, 2
+        while nombre in por_nombre:
+            nombre, n = f"{base} ({n})", n + 1
+        por_nombre[nombre] = df
+    return por_nombre
+
+
+def sintesis_unica(sintesis):
+    """
+    La Síntesis de los modos por dependencia / subdependencia. `sintesis`
+    puede ser un DataFrame o una lista / dict {nombre: DataFrame}; varias
+    Síntesis solo se combinan en el modo "union".
+    """
+    if isinstance(sintesis, pd.DataFrame):
+        return sintesis
+    varias = list(sintesis.values()) if isinstance(sintesis, dict) else list(sintesis)
+    if len(varias) != 1:
+        raise ValueError("❌ Varias Síntesis solo se pueden combinar en el modo 'union'.")
+    return varias[0]
+
+
+@_descartar_zip_si_falla
+def ejecutar_exportacion(tipo_formulario: str, modo: str, datos, ruta_salida_base: str,
+                         seleccionadas: list = None, reanudar_en: str = None, filtro: dict = None,
+                         formatos: list = None, perfil_excel: str = "clasico", agrupacion: str = "archivo",
+                         zip_salida: bool = False, multivalor=None, perfil_render: str = None,
+                         compresion_pdf: str = None, consolidado: bool = False, informe="completo",
+                         tiempos: list = None, estrategia_duplicados: str = "permitir"):
+    """
+    Ejecuta un trabajo completo (Excel y luego PDFs) como lo hace la interfaz.
+
+    `datos`: DataFrame ya validado y filtrado (instancias) o
+    {"iniciativas": df1, "sintesis": df2} (VcM). `modo`: "dependencias",
+    "subdependencias" o "union" (solo VcM, sin PDFs). En "union", `df2`
+    puede ser una lista o dict de Síntesis y `estrategia_duplicados` decide
+    qué hacer con IDs repetidos (ver `preparar_union`). El resto de los
+    parámetros se pasa tal cual a la exportación y a los generadores de PDF.
+
+    Retorna {"ruta": carpeta o ZIP final (None si falló), "pdfs": [rutas]}.
+    Si se cancela o falla, un ZIP a medio escribir se descarta (solo se
+    publica al terminar bien); una carpeta queda con su bitácora para reanudar.
+    """
+    # Lo que no es de la exportación a Excel también queda en la bitácora:
+    # al reanudar se generan los mismos PDFs que en la ejecución original
+    metadatos = {"filtro": filtro, "perfil_render": perfil_render, "compresion_pdf": compresion_pdf,
+                 "informe": informe, "consolidado": consolidado}
+    opciones = dict(reanudar_en=reanudar_en, metadatos=metadatos, formatos=formatos,
+                    perfil_excel=perfil_excel, zip_salida=zip_salida)
+    opciones_pdf = dict(perfil_render=perfil_render, compresion_pdf=compresion_pdf,
+                        consolidado=consolidado, informe=informe, tiempos=tiempos)
+
+    if tipo_formulario == FORMULARIO_INSTANCIAS:
+        if modo == "dependencias":
+            ruta_final, dfs = procesar_excel_dependencias(datos, ruta_salida_base, seleccionadas, **opciones)
+        elif modo == "subdependencias":
+            ruta_final, dfs = procesar_excel_subdependencias(datos, ruta_salida_base, seleccionadas, **opciones)
+        else:
+            raise ValueError(f"❌ Modo no disponible para instancias externas: '{modo}'")
+
+        if not ruta_final or not dfs:
+            return {"ruta": None, "pdfs": []}
+
+        try:
+            pdfs = generar_graficos_y_pdfs(
+                dfs, seleccionadas, modo, ruta_final,
+                bitacora=abrir_bitacora(ruta_final), destino=abrir_destino(ruta_final),
+                multivalor=multivalor, **opciones_pdf
+            )
+        except BaseException:
+            cerrar_destino(ruta_final, descartar=True)
+            raise
+        cerrar_destino(ruta_final)
+
+        return {"ruta": ruta_final, "pdfs": pdfs}
+
+    if tipo_formulario != FORMULARIO_VFORM:
+        raise ValueError(f"❌ Tipo de formulario desconocido: '{tipo_formulario}'")
+
+    df1, df2 = datos["iniciativas"], datos["sintesis"]
+
+    if modo == "union":
+        ruta_final = get_excels_union(df1, df2, ruta_salida_base, estrategia_duplicados=estrategia_duplicados,
+                                      **opciones)
+        return {"ruta": ruta_final, "pdfs": []}
+
+    df2 = sintesis_unica(df2)
+    if modo == "dependencias":
+        ruta_final, d1, d2 = get_excels_dependencias_vform(df1, df2, ruta_salida_base, seleccionadas, **opciones)
+    elif modo == "subdependencias":
+        ruta_final, d1, d2 = get_excels_subdependencias_vform(df1, df2, ruta_salida_base, seleccionadas,
+                                                              agrupacion=agrupacion, **opciones)
+    else:
+        raise ValueError(f"❌ Modo desconocido: '{modo}'")
+
+    if ruta_final is None:
+        return {"ruta": None, "pdfs": []}
+
+    try:
+        pdfs = generar_resumenes_pdf_vform(
+            d1, d2, seleccionadas, modo, ruta_final,
+            bitacora=abrir_bitacora(ruta_final), destino=abrir_destino(ruta_final),
+            **opciones_pdf
+        )
+    except BaseException:
+        cerrar_destino(ruta_final, descartar=True)
+        raise
+    cerrar_destino(ruta_final)
+
+    return {"ruta": ruta_final, "pdfs": pdfs}
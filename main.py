@@ -1,3 +1,15 @@
+import sys
+
+
 if __name__ == "__main__":
+    # Necesario para el pool de gráficos en el ejecutable congelado (Windows)
+    from multiprocessing import freeze_support
+    freeze_support()
+
+    # Con argumentos: modo por lotes (sin interfaz, ver cli.py)
+    if len(sys.argv) > 1:
+        from cli import main
+        sys.exit(main(sys.argv[1:]))
+
     from ui.main_window import lanzar_app
     lanzar_app()
@@ -0,0 +1,117 @@
+import os
+import json
+from datetime import datetime
+
+
+NOMBRE_BITACORA = ".zodiac_bitacora.json"
+
+
+# ============================================================
+# 📒 Bitácora de trabajos de exportación
+# ============================================================
+class BitacoraExportacion:
+    """
+    Registra qué particiones de una exportación ya quedaron escritas.
+
+    La bitácora vive como JSON oculto en la carpeta de salida y se reescribe
+    atómicamente después de cada partición. Cada etapa ("excel", "pdf", ...)
+    lleva su propia lista de particiones completadas, de modo que una
+    ejecución interrumpida puede reanudarse sin rehacer trabajo terminado.
+    """
+
+    def __init__(self, ruta_salida, reanudar=False):
+        self.ruta_salida = ruta_salida
+        self.ruta_archivo = os.path.join(ruta_salida, NOMBRE_BITACORA)
+        self.datos = {"parametros": {}, "etapas": {}}
+        self._claves = {}     # etapa → set de claves completadas (la lista va al JSON)
+
+        if reanudar:
+            previa = leer_bitacora(ruta_salida)
+            if previa:
+                self.datos = previa
+
+    # ------------------------------------------------------------
+    # Parámetros del trabajo
+    # ------------------------------------------------------------
+    def guardar_parametros(self, **parametros):
+        """Guarda (o completa) los parámetros necesarios para reanudar."""
+        self.datos["parametros"].update(_a_json(parametros))
+        self.datos.setdefault("creada", datetime.now().isoformat(timespec="seconds"))
+        self._escribir()
+
+    @property
+    def parametros(self):
+        return self.datos.get("parametros", {})
+
+    # ------------------------------------------------------------
+    # Particiones por etapa
+    # ------------------------------------------------------------
+    def _etapa(self, etapa):
+        return self.datos["etapas"].setdefault(
+            etapa, {"completadas": [], "finalizada": False}
+        )
+
+    def _completadas(self, etapa):
+        if etapa not in self._claves:
+            self._claves[etapa] = {tuple(c) for c in self._etapa(etapa)["completadas"]}
+        return self._claves[etapa]
+
+    def completada(self, etapa, clave):
+        return tuple(_clave(clave)) in self._completadas(etapa)
+
+    def registrar(self, etapa, clave):
+        """Marca `clave` como terminada en `etapa` y persiste la bitácora."""
+        clave = _clave(clave)
+        completadas = self._completadas(etapa)
+        if tuple(clave) not in completadas:
+            completadas.add(tuple(clave))
+            self._etapa(etapa)["completadas"].append(clave)
+        self._escribir()
+
+    def finalizar(self, etapa):
+        self._etapa(etapa)["finalizada"] = True
+        self._escribir()
+
+    def pendientes(self, etapa, claves):
+        """Filtra `claves` dejando solo las que aún no están completadas."""
+        return [c for c in claves if not self.completada(etapa, c)]
+
+    # ------------------------------------------------------------
+    # Persistencia atómica
+    # ------------------------------------------------------------
+    def _escribir(self):
+        os.makedirs(self.ruta_salida, exist_ok=True)
+        ruta_tmp = self.ruta_archivo + ".tmp"
+        with open(ruta_tmp, "w", encoding="utf-8") as f:
+            json.dump(self.datos, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(ruta_tmp, self.ruta_archivo)
+
+
+def leer_bitacora(ruta_salida):
+    """Devuelve el contenido de la bitácora de `ruta_salida`, o None si no existe."""
+    ruta = os.path.join(ruta_salida, NOMBRE_BITACORA)
+    if not os.path.isfile(ruta):
+        return None
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _clave(clave):
+    """Claves de partición como listas JSON: 'dep' → ['dep'], (dep, sub) → [dep, sub]."""
+    if isinstance(clave, (tuple, list)):
+        return [str(c) for c in clave]
+    return [str(clave)]
+
+
+def _a_json(valor):
+    """Convierte tuplas anidadas a listas para que el JSON sea estable."""
+    if isinstance(valor, dict):
+        return {k: _a_json(v) for k, v in valor.items()}
+    if isinstance(valor, (tuple, list)):
+        return [_a_json(v) for v in valor]
+    return valor
@@ -0,0 +1,304 @@
+import os
+import io
+import json
+import hashlib
+import tempfile
+import zipfile
+import dataclasses
+import functools
+
+import numpy as np
+import pandas as pd
+import matplotlib
+
+from scripts.comun.render import firma_render
+
+
+# ============================================================
+# 🗃 Caché en disco de gráficos renderizados
+# ============================================================
+# Clave = (función, versión, huella de los datos agregados, perfil y formato de render).
+# Valor = bytes ya renderizados (PNG/SVG); los gráficos que devuelven varios
+# buffers ({tipo: buffer} o [buffer, ...]) se guardan en un ZIP sin comprimir.
+RUTA_CACHE_GRAFICOS = os.path.join(os.path.expanduser("~"), ".zodiac_etl", "cache_graficos")
+LIMITE_CACHE_MB = 256
+
+_EXT_IMAGEN = ".img"
+_EXT_GRUPO = ".zip"
+_INDICE_GRUPO = "claves.json"
+
+
+class NoHasheable(TypeError):
+    """El argumento no tiene una huella estable (el gráfico se renderiza sin caché)."""
+
+
+# ------------------------------------------------------------
+# 🔑 Huella de los datos
+# ------------------------------------------------------------
+def _actualizar(h, obj):
+    if obj is None or isinstance(obj, (str, bool, int, float)):
+        h.update(repr((type(obj).__name__, obj)).encode())
+
+    elif isinstance(obj, pd.DataFrame):
+        h.update(b"DF")
+        _actualizar(h, [str(c) for c in obj.columns])
+        _actualizar(h, [str(t) for t in obj.dtypes])
+        try:
+            filas = pd.util.hash_pandas_object(obj, index=True)
+        except TypeError:
+            # celdas no hasheables (listas, dicts...) → texto
+            filas = pd.util.hash_pandas_object(obj.astype(str), index=True)
+        h.update(filas.to_numpy().tobytes())
+
+    elif isinstance(obj, pd.Series):
+        h.update(b"S")
+        _actualizar(h, str(obj.name))
+        _actualizar(h, str(obj.dtype))
+        try:
+            filas = pd.util.hash_pandas_object(obj, index=True)
+        except TypeError:
+            filas = pd.util.hash_pandas_object(obj.astype(str), index=True)
+        h.update(filas.to_numpy().tobytes())
+
+    elif isinstance(obj, np.ndarray):
+        h.update(b"A" + str(obj.dtype).encode() + repr(obj.shape).encode())
+        h.update(obj.tobytes() if obj.dtype != object else repr(obj.tolist()).encode())
+
+    elif dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        h.update(b"DC" + type(obj).__qualname__.encode())
+        for campo in dataclasses.fields(obj):
+            _actualizar(h, campo.name)
+            _actualizar(h, getattr(obj, campo.name))
+
+    elif isinstance(obj, dict):
+        h.update(b"D%d" % len(obj))
+        for clave, valor in obj.items():
+            _actualizar(h, clave)
+            _actualizar(h, valor)
+
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"L%d" % len(obj))
+        for valor in obj:
+            _actualizar(h, valor)
+
+    elif isinstance(obj, (np.generic, pd.Timestamp)):
+        h.update(repr(obj).encode())
+
+    else:
+        raise NoHasheable(type(obj).__name__)
+
+
+def huella(*objetos):
+    """SHA-256 estable de DataFrames, Series, dataclasses y contenedores básicos."""
+    h = hashlib.sha256()
+    for obj in objetos:
+        _actualizar(h, obj)
+    return h.hexdigest()
+
+
+# ------------------------------------------------------------
+# 🗃 Almacén LRU con límite de tamaño
+# ------------------------------------------------------------
+class CacheGraficos:
+    """
+    Caché de imágenes en una carpeta. Cada entrada es un archivo
+    `<clave>.img` (bytes de la imagen) o `<clave>.zip` (varias imágenes).
+
+    El orden LRU se lleva con la fecha de modificación: un acierto la
+    actualiza y, al superar `limite_mb`, se borran las entradas más
+    antiguas hasta quedar en el 90 % del límite. Las escrituras son
+    atómicas, así que varios procesos pueden compartir la carpeta.
+    """
+
+    def __init__(self, ruta=RUTA_CACHE_GRAFICOS, limite_mb=LIMITE_CACHE_MB):
+        self.ruta = ruta
+        self.limite = int(limite_mb * 1024 * 1024)
+        self.aciertos = 0
+        self.fallos = 0
+        self._tamano = None
+
+    # --- Lectura ---
+    def obtener(self, clave):
+        """Bytes (o {clave: bytes} / [bytes]) guardados, o None si no hay entrada."""
+        for ext in (_EXT_IMAGEN, _EXT_GRUPO):
+            archivo = os.path.join(self.ruta, clave + ext)
+            try:
+                with open(archivo, "rb") as f:
+                    datos = f.read()
+                os.utime(archivo)
+            except OSError:
+                continue
+
+            self.aciertos += 1
+            return datos if ext == _EXT_IMAGEN else _leer_grupo(datos)
+
+        self.fallos += 1
+        return None
+
+    # --- Escritura ---
+    def guardar(self, clave, valor):
+        """Guarda bytes, {clave: bytes} o [bytes]."""
+        if isinstance(valor, bytes):
+            ext, datos = _EXT_IMAGEN, valor
+        else:
+            ext, datos = _EXT_GRUPO, _escribir_grupo(valor)
+
+        os.makedirs(self.ruta, exist_ok=True)
+        fd, temporal = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=self.ruta)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(datos)
+            os.replace(temporal, os.path.join(self.ruta, clave + ext))
+        except OSError:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            return
+
+        if self._tamano is None:
+            self._tamano = self.tamano()
+        else:
+            self._tamano += len(datos)
+
+        if self._tamano > self.limite:
+            self.podar()
+
+    # --- Mantenimiento ---
+    def _entradas(self):
+        try:
+            nombres = os.listdir(self.ruta)
+        except OSError:
+            return []
+
+        entradas = []
+        for nombre in nombres:
+            if not nombre.endswith((_EXT_IMAGEN, _EXT_GRUPO)):
+                continue
+            try:
+                info = os.stat(os.path.join(self.ruta, nombre))
+            except OSError:
+                continue
+            entradas.append((info.st_mtime, info.st_size, nombre))
+        return entradas
+
+    def tamano(self):
+        """Bytes ocupados por las entradas."""
+        return sum(tam for _, tam, _ in self._entradas())
+
+    def podar(self, objetivo=None):
+        """Borra las entradas menos usadas hasta quedar bajo `objetivo` bytes (90 % del límite)."""
+        objetivo = int(self.limite * 0.9) if objetivo is None else objetivo
+        entradas = sorted(self._entradas())
+        total = sum(tam for _, tam, _ in entradas)
+
+        for _, tam, nombre in entradas:
+            if total <= objetivo:
+                break
+            try:
+                os.remove(os.path.join(self.ruta, nombre))
+                total -= tam
+            except OSError:
+                pass
+
+        self._tamano = total
+        return total
+
+    def vaciar(self):
+        return self.podar(objetivo=0)
+
+
+def _escribir_grupo(valor):
+    claves = list(valor.keys()) if isinstance(valor, dict) else None
+    datos = list(valor.values()) if isinstance(valor, dict) else list(valor)
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr(_INDICE_GRUPO, json.dumps({"claves": claves, "n": len(datos)}))
+        for i, contenido in enumerate(datos):
+            zf.writestr(str(i), contenido)
+    return buffer.getvalue()
+
+
+def _leer_grupo(datos):
+    with zipfile.ZipFile(io.BytesIO(datos)) as zf:
+        indice = json.loads(zf.read(_INDICE_GRUPO))
+        contenidos = [zf.read(str(i)) for i in range(indice["n"])]
+    if indice["claves"] is None:
+        return contenidos
+    return dict(zip(indice["claves"], contenidos))
+
+
+# ------------------------------------------------------------
+# ⚙ Caché activa del proceso
+# ------------------------------------------------------------
+_cache_activa = CacheGraficos()
+
+
+def configurar_cache(ruta=RUTA_CACHE_GRAFICOS, limite_mb=LIMITE_CACHE_MB, activa=True):
+    """Cambia carpeta/límite de la caché, o la desactiva con `activa=False`."""
+    global _cache_activa
+    _cache_activa = CacheGraficos(ruta, limite_mb) if activa else None
+    return _cache_activa
+
+
+def cache_activa():
+    return _cache_activa
+
+
+def _a_bytes(resultado):
+    """Bytes de un resultado cacheable, o None si no se puede guardar."""
+    if isinstance(resultado, io.BytesIO):
+        return resultado.getvalue()
+    if isinstance(resultado, dict) and resultado and \
+            all(isinstance(v, io.BytesIO) for v in resultado.values()) and \
+            all(isinstance(k, (str, int, float, bool)) for k in resultado):
+        return {k: v.getvalue() for k, v in resultado.items()}
+    if isinstance(resultado, list) and resultado and all(isinstance(v, io.BytesIO) for v in resultado):
+        return [v.getvalue() for v in resultado]
+    return None
+
+
+def _a_buffers(datos):
+    if isinstance(datos, bytes):
+        return io.BytesIO(datos)
+    if isinstance(datos, dict):
+        return {k: io.BytesIO(v) for k, v in datos.items()}
+    return [io.BytesIO(v) for v in datos]
+
+
+def render_cacheado(version=1):
+    """
+    Decorador para funciones de gráfico que devuelven un BytesIO (o
+    {clave: BytesIO} / [BytesIO]). Con la misma función, versión, datos
+    y perfil de render se devuelven los bytes guardados sin llamar a
+    matplotlib. Subir `version` al cambiar el dibujo invalida las entradas.
+
+    Resultados vacíos o `None` no se guardan.
+    """
+    def decorador(funcion):
+        nombre = f"{funcion.__module__}.{funcion.__qualname__}"
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            cache = _cache_activa
+            if cache is None:
+                return funcion(*args, **kwargs)
+
+            try:
+                clave = huella(nombre, version, firma_render(), matplotlib.__version__,
+                               list(args), dict(sorted(kwargs.items())))
+            except NoHasheable:
+                return funcion(*args, **kwargs)
+
+            datos = cache.obtener(clave)
+            if datos is not None:
+                return _a_buffers(datos)
+
+            resultado = funcion(*args, **kwargs)
+            datos = _a_bytes(resultado)
+            if datos is not None:
+                cache.guardar(clave, datos)
+            return resultado
+
+        return envoltura
+
+    return decorador
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+
+# ============================================================
+# 🧊 Cubo de conteos por subdependencia
+# ============================================================
+# Formato largo, una fila por combinación con conteo > 0:
+#   dependencia | subdependencia | medida | valor | cantidad
+#
+# Se calcula UNA vez al nivel más fino y cada nivel superior se obtiene
+# sumando (`acumular`), sin volver a recorrer las filas. No lleva eje de
+# mes: el filtro de meses se aplica antes de dividir y ningún informe
+# desglosa por mes.
+COLUMNAS_CUBO = ["dependencia", "subdependencia", "medida", "valor", "cantidad"]
+
+NIVELES = {
+    "subdependencia": ["dependencia", "subdependencia"],
+    "dependencia": ["dependencia"],
+    "institucion": [],
+}
+
+
+def _contar(valores):
+    """
+    Conteo por valor de una medida con factorize + bincount.
+    Los valores salen en orden de primera aparición (como `value_counts`
+    en los empates); los nulos no cuentan.
+    """
+    codigos, unicos = pd.factorize(valores, sort=False)
+    conteos = np.bincount(codigos[codigos >= 0], minlength=len(unicos))
+    no_cero = np.flatnonzero(conteos)
+    return np.asarray(unicos, dtype=object)[no_cero], conteos[no_cero]
+
+
+def _recorrer_particiones(particiones):
+    """(dependencia, subdependencia, df) de un dict plano o jerárquico."""
+    for dependencia, valor in particiones.items():
+        if isinstance(valor, pd.DataFrame):
+            yield dependencia, dependencia, valor
+        else:
+            for subdependencia, df in valor.items():
+                yield dependencia, subdependencia, df
+
+
+def construir_cubo(particiones, medir, seleccionadas=None):
+    """
+    Construye el cubo recorriendo cada fila una sola vez.
+
+    Parámetros:
+        particiones: {dep: DataFrame} o {dep: {subdep: DataFrame}}; una
+            dependencia sin subdependencias se registra con subdependencia = dependencia
+        medir: función df → [(medida, Serie de valores), ...]; cada valor
+            de la Serie cuenta 1 (se permiten índices repetidos tras un explode)
+        seleccionadas: opcional, claves dep o (dep, subdep) a incluir
+
+    Retorna:
+        DataFrame con COLUMNAS_CUBO
+    """
+    columnas = {c: [] for c in COLUMNAS_CUBO}
+
+    for dependencia, subdependencia, df in _recorrer_particiones(particiones):
+        if seleccionadas is not None and \
+                dependencia not in seleccionadas and (dependencia, subdependencia) not in seleccionadas:
+            continue
+
+        for medida, valores in medir(df):
+            if valores is None or len(valores) == 0:
+                continue
+            unicos, conteos = _contar(valores)
+            n = len(conteos)
+            columnas["dependencia"].append(np.full(n, dependencia, dtype=object))
+            columnas["subdependencia"].append(np.full(n, subdependencia, dtype=object))
+            columnas["medida"].append(np.full(n, medida, dtype=object))
+            columnas["valor"].append(np.array([str(v) for v in unicos], dtype=object))
+            columnas["cantidad"].append(conteos)
+
+    if not columnas["cantidad"]:
+        return pd.DataFrame(columns=COLUMNAS_CUBO).astype({"cantidad": "int64"})
+
+    return pd.DataFrame({c: np.concatenate(partes) for c, partes in columnas.items()})
+
+
+def filtrar_cubo(cubo, dependencia=None, subdependencia=None):
+    """Subcubo de una dependencia y/o subdependencia."""
+    mascara = pd.Series(True, index=cubo.index)
+    if dependencia is not None:
+        mascara &= cubo["dependencia"] == dependencia
+    if subdependencia is not None:
+        mascara &= cubo["subdependencia"] == subdependencia
+    return cubo[mascara]
+
+
+def acumular(cubo, nivel="dependencia"):
+    """
+    Sube el cubo a `nivel` ("subdependencia", "dependencia" o "institucion")
+    sumando cantidades.
+    """
+    if nivel not in NIVELES:
+        raise ValueError(f"❌ Nivel desconocido: '{nivel}'. Opciones: {', '.join(NIVELES)}")
+
+    claves = NIVELES[nivel] + ["medida", "valor"]
+    return cubo.groupby(claves, sort=False, as_index=False)["cantidad"].sum()
+
+
+def conteo_medida(cubo, medida):
+    """
+    Serie valor → cantidad de `medida` (sumando todo lo que quede en `cubo`),
+    ordenada de mayor a menor. None si la medida no tiene filas.
+    """
+    filas = cubo[cubo["medida"] == medida]
+    if filas.empty:
+        return None
+    return (
+        filas.groupby("valor", sort=False)["cantidad"]
+        .sum()
+        .sort_values(ascending=False, kind="stable")
+        .rename_axis(None)
+        .rename("count")
+    )
@@ -0,0 +1,212 @@
+import re
+import warnings
+
+import pandas as pd
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.table import Table, TableStyleInfo
+
+
+# ============================================================
+# 📘 Perfiles de exportación Excel
+# ============================================================
+# - "clasico": hoja principal + una hoja extra por cada Estado (filas duplicadas)
+# - "tabla":   cada dataset una sola vez como Tabla de Excel con autofiltro y
+#              paneles inmovilizados, más una hoja "Resumen Estado" con conteos
+PERFILES_EXCEL = ("clasico", "tabla")
+
+# ============================================================
+# 📚 Agrupación de libros (modo subdependencias)
+# ============================================================
+# - "archivo":     un libro por subdependencia dentro de la carpeta de su dependencia
+# - "dependencia": un libro por dependencia, una hoja por subdependencia
+# - "unico":       un solo libro para toda la ejecución
+AGRUPACIONES_EXCEL = ("archivo", "dependencia", "unico")
+
+# Caracteres no permitidos por Excel en nombres de hoja
+_INVALIDOS_HOJA = re.compile(r"[\\/:*?\[\]]")
+_LARGO_HOJA = 31
+
+
+def normalizar_perfil_excel(perfil=None):
+    perfil = (perfil or "clasico").strip().lower()
+    if perfil not in PERFILES_EXCEL:
+        raise ValueError(
+            f"❌ Perfil Excel desconocido: '{perfil}'. Opciones: {', '.join(PERFILES_EXCEL)}"
+        )
+    return perfil
+
+
+def normalizar_agrupacion_excel(agrupacion=None):
+    agrupacion = (agrupacion or "archivo").strip().lower()
+    if agrupacion not in AGRUPACIONES_EXCEL:
+        raise ValueError(
+            f"❌ Agrupación Excel desconocida: '{agrupacion}'. Opciones: {', '.join(AGRUPACIONES_EXCEL)}"
+        )
+    return agrupacion
+
+
+def nombre_hoja_unico(nombre, usados):
+    """
+    Nombre de hoja válido para Excel y único dentro del libro.
+
+    Reemplaza los caracteres no permitidos, recorta a 31 caracteres y, si
+    el nombre ya existe (Excel no distingue mayúsculas), agrega " (2)",
+    " (3)", ... recortando la base para respetar el largo máximo.
+    `usados` es un set que se actualiza con el nombre elegido.
+    """
+    base = _INVALIDOS_HOJA.sub("_", str(nombre)).strip().strip("'") or "Hoja"
+    hoja = base[:_LARGO_HOJA].rstrip()
+    n = 2
+    while hoja.lower() in usados:
+        sufijo = f" ({n})"
+        hoja = base[:_LARGO_HOJA - len(sufijo)].rstrip() + sufijo
+        n += 1
+    usados.add(hoja.lower())
+    return hoja
+
+
+def _nombre_tabla(hoja, usados):
+    """displayName válido y único dentro del libro (solo letras, dígitos y '_')."""
+    base = re.sub(r"\W", "_", hoja, flags=re.ASCII).strip("_") or "Datos"
+    nombre = f"Tabla_{base}"
+    n = 2
+    while nombre.lower() in usados:
+        nombre = f"Tabla_{base}_{n}"
+        n += 1
+    return nombre
+
+
+def escribir_hoja_excel(writer, df, hoja, perfil="clasico"):
+    """
+    Escribe `df` en la hoja `hoja`.
+    En el perfil "tabla" además la registra como Tabla de Excel
+    (autofiltro + filas con bandas) e inmoviliza la fila de encabezados.
+    """
+    hoja = hoja[:31]
+    df.to_excel(writer, sheet_name=hoja, index=False)
+
+    if perfil != "tabla":
+        return
+
+    ws = writer.sheets[hoja]
+    ws.freeze_panes = "A2"
+
+    filas, columnas = df.shape
+    if filas == 0 or columnas == 0:
+        return
+
+    usados = {n.lower() for w in writer.book.worksheets for n in w.tables}
+    _agregar_tabla(ws, hoja, filas, columnas, usados)
+
+
+def _agregar_tabla(ws, hoja, filas, columnas, usados, encabezados=None):
+    """
+    Registra A1:<última celda> como Tabla de Excel con nombre único.
+    En modo write_only las celdas ya no se pueden leer, así que los nombres
+    de columna de la tabla se toman de `encabezados`.
+    """
+    tabla = Table(
+        displayName=_nombre_tabla(hoja, usados),
+        ref=f"A1:{get_column_letter(columnas)}{filas + 1}"
+    )
+    if encabezados is not None:
+        tabla._initialise_columns()
+        for columna, nombre in zip(tabla.tableColumns, encabezados):
+            columna.name = str(nombre)
+    tabla.tableStyleInfo = TableStyleInfo(
+        name="TableStyleMedium2",
+        showRowStripes=True,
+        showColumnStripes=False
+    )
+    with warnings.catch_warnings():
+        # Aviso de write_only que no aplica: las columnas ya vienen nombradas
+        warnings.filterwarnings("ignore", message="In write-only mode you must add table columns")
+        ws.add_table(tabla)
+    usados.add(tabla.displayName.lower())
+
+
+def escribir_resumen_estados(writer, datasets, col_estado="Estado", hoja="Resumen Estado"):
+    """
+    Agrega una hoja con los conteos por Estado de cada dataset (calculados en pandas).
+
+    `datasets` = {"Nombre de hoja": DataFrame}. Los datasets sin columna de
+    estado se omiten; si ninguno la tiene, no se crea la hoja.
+    """
+    bloques = []
+    for nombre, df in datasets.items():
+        if col_estado not in df.columns:
+            continue
+        conteo = contar_estados(df, col_estado).reset_index(name="Cantidad")
+        conteo.insert(0, "Hoja", nombre)
+        bloques.append(conteo)
+
+    if not bloques:
+        return None
+
+    resumen = pd.concat(bloques, ignore_index=True)
+    escribir_hoja_excel(writer, resumen, hoja, perfil="tabla")
+    return resumen
+
+
+def contar_estados(df, col_estado="Estado"):
+    """Cantidad de filas por Estado (los vacíos cuentan como "(Sin estado)")."""
+    return (
+        df[col_estado]
+        .fillna("(Sin estado)")
+        .astype(str)
+        .value_counts()
+        .rename_axis(col_estado)
+    )
+
+
+# ============================================================
+# 🚰 Escritura por bloques (libro openpyxl en modo write_only)
+# ============================================================
+_BORDE = Side(style="thin")
+
+
+class HojaPorBloques:
+    """
+    Hoja de un `Workbook(write_only=True)` que recibe DataFrames por bloques.
+
+    Las filas se escriben directo al XML de la hoja, sin mantener celdas en
+    memoria. El encabezado imita el estilo de `DataFrame.to_excel`; en el
+    perfil "tabla" se inmoviliza la primera fila y, al cerrar, el rango
+    completo se registra como Tabla de Excel.
+    """
+
+    def __init__(self, libro, hoja, columnas, perfil="clasico"):
+        self.hoja = hoja[:31]
+        self.columnas = list(columnas)
+        self.perfil = perfil
+        self.filas = 0
+
+        self.ws = libro.create_sheet(self.hoja)
+        if perfil == "tabla":
+            self.ws.freeze_panes = "A2"
+        self.ws.append(self._encabezado())
+
+    def _encabezado(self):
+        celdas = []
+        for col in self.columnas:
+            celda = WriteOnlyCell(self.ws, value=str(col))
+            celda.font = Font(bold=True)
+            celda.border = Border(left=_BORDE, right=_BORDE, top=_BORDE, bottom=_BORDE)
+            celda.alignment = Alignment(horizontal="center", vertical="top")
+            celdas.append(celda)
+        return celdas
+
+    def agregar(self, df):
+        """Agrega las filas de `df` (mismas columnas que el encabezado)."""
+        valores = df.astype(object).where(df.notna(), None)
+        for fila in valores.itertuples(index=False, name=None):
+            self.ws.append(fila)
+        self.filas += len(df)
+
+    def cerrar(self, usados):
+        """Registra la Tabla (perfil "tabla"); `usados` = nombres de tabla del libro."""
+        if self.perfil == "tabla" and self.filas and self.columnas:
+            _agregar_tabla(self.ws, self.hoja, self.filas, len(self.columnas), usados,
+                           encabezados=self.columnas)
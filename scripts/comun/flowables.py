@@ -0,0 +1,286 @@
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Flowable, Paragraph, Spacer, Table, LongTable, TableStyle
+from reportlab.graphics.shapes import Drawing
+from reportlab.graphics.charts.piecharts import Pie
+
+
+# ============================================================
+# 🟦 Tarjetas de resumen dibujadas directamente en el PDF
+# ============================================================
+# Reemplazan la imagen de matplotlib con tarjetas: se dibujan con
+# primitivas de ReportLab (rectángulos y texto), sin rasterizar ni
+# incrustar imágenes.
+FUENTE_TITULO = "Helvetica-Bold"
+FUENTE_VALOR = "Helvetica-Bold"
+
+
+def _ajustar_fuente(texto, fuente, tamano, ancho_max, minimo=6):
+    """Tamaño de fuente (≤ `tamano`) para que `texto` quepa en `ancho_max`."""
+    while tamano > minimo and stringWidth(texto, fuente, tamano) > ancho_max:
+        tamano -= 0.5
+    return tamano
+
+
+class TarjetasResumen(Flowable):
+    """
+    Columna de tarjetas "título ....... [valor]".
+
+    `tarjetas` es una lista de (titulo, valor, color). Cada tarjeta es un
+    rectángulo redondeado del color indicado con el título a la izquierda
+    y el valor en una caja gris con doble borde (60 %-80 % del ancho).
+    Si no caben en la página, se dividen entre páginas.
+    """
+
+    def __init__(self, tarjetas, width=460, alto_tarjeta=34, separacion=8,
+                 tamano_titulo=11, tamano_valor=13):
+        super().__init__()
+        self.tarjetas = list(tarjetas)
+        self.width = width
+        self.alto_tarjeta = alto_tarjeta
+        self.separacion = separacion
+        self.tamano_titulo = tamano_titulo
+        self.tamano_valor = tamano_valor
+        self.height = self._alto(len(self.tarjetas))
+
+    def _alto(self, n):
+        return max(0, n * self.alto_tarjeta + (n - 1) * self.separacion) + 4
+
+    def _copia(self, tarjetas):
+        return TarjetasResumen(
+            tarjetas, self.width, self.alto_tarjeta, self.separacion,
+            self.tamano_titulo, self.tamano_valor
+        )
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        caben = int((availHeight - 4 + self.separacion) // (self.alto_tarjeta + self.separacion))
+        if caben <= 0 or caben >= len(self.tarjetas):
+            return []
+        return [self._copia(self.tarjetas[:caben]), self._copia(self.tarjetas[caben:])]
+
+    def draw(self):
+        c = self.canv
+        ancho = self.width - 4
+        caja_x, caja_ancho = ancho * 0.60, ancho * 0.20
+        caja_alto = self.alto_tarjeta * 0.55
+
+        y = self.height - 2 - self.alto_tarjeta
+        for titulo, valor, color in self.tarjetas:
+            c.saveState()
+
+            # --- Tarjeta ---
+            c.setStrokeColor(colors.black)
+            c.setLineWidth(1.5)
+            c.setFillColor(colors.toColor(color))
+            c.roundRect(2, y, ancho, self.alto_tarjeta, radius=6, stroke=1, fill=1)
+
+            # --- Título ---
+            tamano = _ajustar_fuente(str(titulo), FUENTE_TITULO, self.tamano_titulo, caja_x - 16)
+            c.setFillColor(colors.black)
+            c.setFont(FUENTE_TITULO, tamano)
+            c.drawString(12, y + (self.alto_tarjeta - tamano * 0.7) / 2, str(titulo))
+
+            # --- Caja del valor (doble borde) ---
+            caja_y = y + (self.alto_tarjeta - caja_alto) / 2
+            c.setFillColor(colors.HexColor("#d9d9d9"))
+            c.setLineWidth(2)
+            c.rect(caja_x, caja_y, caja_ancho, caja_alto, stroke=1, fill=1)
+            c.setLineWidth(0.8)
+            c.rect(caja_x - 1.5, caja_y - 1.5, caja_ancho + 3, caja_alto + 3, stroke=1, fill=0)
+
+            texto = str(valor)
+            tamano = _ajustar_fuente(texto, FUENTE_VALOR, self.tamano_valor, caja_ancho - 6)
+            c.setFillColor(colors.black)
+            c.setFont(FUENTE_VALOR, tamano)
+            c.drawCentredString(caja_x + caja_ancho / 2, caja_y + (caja_alto - tamano * 0.7) / 2, texto)
+
+            c.restoreState()
+            y -= self.alto_tarjeta + self.separacion
+
+
+# ============================================================
+# 🥧 Torta + tabla de leyenda (ReportLab)
+# ============================================================
+# La torta es un Drawing vectorial y la leyenda una Table de ReportLab,
+# que ajusta texto y se divide entre páginas sola: listas largas de
+# categorías no agrandan ninguna imagen.
+COLORES_TORTA = [
+    "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+    "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf",
+]
+PORCENTAJE_MIN_ETIQUETA = 3.0   # porciones más chicas: el % solo va en la tabla
+
+_ESTILO_TITULO_TORTA = ParagraphStyle(
+    "TituloTorta", fontName="Helvetica-Bold", fontSize=12, leading=15, alignment=TA_CENTER
+)
+_ESTILO_CELDA_TORTA = ParagraphStyle(
+    "CeldaTorta", fontName="Helvetica", fontSize=9, leading=11, alignment=TA_CENTER
+)
+
+
+def dibujo_torta(valores, diametro=200, colores=COLORES_TORTA):
+    """Drawing con una torta (sentido antihorario desde las 12, % dentro de cada porción)."""
+    total = float(sum(valores))
+
+    torta = Pie()
+    torta.x = torta.y = 0
+    torta.width = torta.height = diametro
+    torta.data = [float(v) for v in valores]
+    torta.startAngle = 90
+    torta.direction = "anticlockwise"
+    torta.simpleLabels = 1
+    torta.labels = [
+        f"{v / total * 100:.1f}%" if total and v / total * 100 >= PORCENTAJE_MIN_ETIQUETA else ""
+        for v in valores
+    ]
+    torta.slices.labelRadius = 0.65
+    torta.slices.fontName = "Helvetica"
+    torta.slices.fontSize = 9
+    torta.slices.strokeColor = colors.white
+    torta.slices.strokeWidth = 0.5
+    for i in range(len(valores)):
+        torta.slices[i].fillColor = colors.HexColor(colores[i % len(colores)])
+
+    dibujo = Drawing(diametro, diametro)
+    dibujo.add(torta)
+    dibujo.hAlign = "CENTER"
+    return dibujo
+
+
+def tabla_leyenda(conteo, encabezado, width=400, colores=COLORES_TORTA):
+    """Table "Color | `encabezado` | Cantidad | Porcentaje" de un conteo (valor → cantidad)."""
+    total = conteo.sum()
+    filas = [["Color", encabezado, "Cantidad", "Porcentaje"]]
+    for valor, cantidad in conteo.items():
+        filas.append([
+            "",
+            Paragraph(escape(str(valor)), _ESTILO_CELDA_TORTA),
+            str(cantidad),
+            f"{cantidad / total * 100:.1f}%",
+        ])
+
+    tabla = Table(filas, colWidths=[width * p for p in (0.07, 0.60, 0.15, 0.18)], repeatRows=1)
+    estilo = [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightblue),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.gray),
+        ("TOPPADDING", (0, 0), (-1, -1), 3),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 3),
+    ]
+    estilo += [
+        ("BACKGROUND", (0, i), (0, i), colors.HexColor(colores[(i - 1) % len(colores)]))
+        for i in range(1, len(filas))
+    ]
+    tabla.setStyle(TableStyle(estilo))
+    return tabla
+
+
+def torta_con_leyenda(conteo, titulo, encabezado, width=400, diametro=200):
+    """
+    Flowables [título, torta, tabla] para un conteo (Series valor → cantidad),
+    en el orden del conteo.
+    """
+    return [
+        Paragraph(escape(titulo), _ESTILO_TITULO_TORTA),
+        Spacer(1, 8),
+        dibujo_torta(conteo.values, diametro=diametro),
+        Spacer(1, 10),
+        tabla_leyenda(conteo, encabezado, width=width),
+    ]
+
+
+# ============================================================
+# 📋 Tablas largas (resúmenes de registros)
+# ============================================================
+# LongTable calcula el alto de las filas solo hasta llenar la página en
+# curso, así que la tabla se diagrama página a página. Las celdas que
+# caben en una línea van como texto plano; solo las que hay que envolver
+# se convierten en Paragraph. Estilos creados una sola vez.
+ANCHO_TABLA_RESUMEN = 500   # ~ancho útil en A4 vertical con márgenes
+_RELLENO_CELDA = 3          # LEFTPADDING / RIGHTPADDING
+
+ESTILO_CELDA_TABLA = ParagraphStyle(
+    "TablaTexto", alignment=TA_LEFT, fontName="Helvetica", fontSize=7, leading=8, wordWrap="CJK"
+)
+# Corte por palabras (mucho más rápido que "CJK", que mide carácter a
+# carácter): se usa cuando todas las palabras caben en el ancho de la celda.
+ESTILO_CELDA_TABLA_PALABRAS = ParagraphStyle(
+    "TablaTextoPalabras", parent=ESTILO_CELDA_TABLA, wordWrap=None
+)
+ESTILO_ENCABEZADO_TABLA = ParagraphStyle(
+    "Encabezado", alignment=TA_CENTER, fontSize=8, leading=9,
+    textColor=colors.black, spaceAfter=2, wordWrap="CJK"
+)
+ESTILO_TABLA_RESUMEN = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.gray),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (-1, -1), ESTILO_CELDA_TABLA.fontName),
+    ('FONTSIZE', (0, 1), (-1, -1), ESTILO_CELDA_TABLA.fontSize),
+    ('LEADING', (0, 1), (-1, -1), ESTILO_CELDA_TABLA.leading),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.lightgrey]),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('LEFTPADDING', (0, 0), (-1, -1), _RELLENO_CELDA),
+    ('RIGHTPADDING', (0, 0), (-1, -1), _RELLENO_CELDA),
+])
+
+
+def _celdas_columna(valores, ancho):
+    """
+    Texto plano si cabe en una línea de `ancho`; si no, Paragraph con corte
+    por palabras, o "CJK" solo si alguna palabra es más ancha que la celda.
+    """
+    limite = ancho - 2 * _RELLENO_CELDA
+    fuente, tamano = ESTILO_CELDA_TABLA.fontName, ESTILO_CELDA_TABLA.fontSize
+    estilos = {}
+
+    celdas = []
+    for valor in valores:
+        texto = str(valor)
+        if texto not in estilos:
+            if "\n" not in texto and stringWidth(texto, fuente, tamano) <= limite:
+                estilos[texto] = None
+            elif all(stringWidth(p, fuente, tamano) <= limite for p in texto.split()):
+                estilos[texto] = ESTILO_CELDA_TABLA_PALABRAS
+            else:
+                estilos[texto] = ESTILO_CELDA_TABLA
+
+        estilo = estilos[texto]
+        celdas.append(texto if estilo is None else Paragraph(escape(texto), estilo))
+    return celdas
+
+
+def tabla_larga(df, proporciones, total_ancho=ANCHO_TABLA_RESUMEN):
+    """
+    LongTable de `df` (valores ya formateados) con encabezado repetido en
+    cada página. `proporciones` reparte `total_ancho` entre las columnas.
+    """
+    proporciones = list(proporciones)[:len(df.columns)]
+    suma = sum(proporciones) or 1
+    anchos = [total_ancho * p / suma for p in proporciones]
+
+    encabezados = [Paragraph(escape(str(col)), ESTILO_ENCABEZADO_TABLA) for col in df.columns]
+    columnas = [
+        _celdas_columna(df.iloc[:, j].tolist(), ancho)
+        for j, ancho in enumerate(anchos)
+    ]
+
+    tabla = LongTable([encabezados] + [list(fila) for fila in zip(*columnas)],
+                      colWidths=anchos, repeatRows=1)
+    tabla.setStyle(ESTILO_TABLA_RESUMEN)
+    return tabla
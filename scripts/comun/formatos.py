@@ -0,0 +1,220 @@
+import os
+from contextlib import contextmanager
+from urllib.parse import quote
+
+import pandas as pd
+
+
+# ============================================================
+# 📦 Formatos de salida soportados
+# ============================================================
+FORMATOS_SALIDA = ("xlsx", "parquet", "feather", "csv")
+FORMATOS_COLUMNARES = ("parquet", "feather", "csv")
+
+# Formatos que dependen de pyarrow (dependencia opcional)
+_REQUIEREN_PYARROW = ("parquet", "feather")
+
+
+def normalizar_formatos(formatos=None):
+    """
+    Acepta None, un string ("parquet" o "xlsx,csv") o una lista y devuelve
+    una tupla validada sin duplicados. Por defecto solo se exporta Excel.
+    """
+    if formatos is None:
+        return ("xlsx",)
+
+    if isinstance(formatos, str):
+        formatos = formatos.split(",")
+
+    resultado = []
+    for formato in formatos:
+        formato = str(formato).strip().lower().lstrip(".")
+        if not formato:
+            continue
+        if formato not in FORMATOS_SALIDA:
+            raise ValueError(
+                f"❌ Formato de salida desconocido: '{formato}'. "
+                f"Opciones: {', '.join(FORMATOS_SALIDA)}"
+            )
+        if formato not in resultado:
+            resultado.append(formato)
+
+    if not resultado:
+        return ("xlsx",)
+
+    if any(f in _REQUIEREN_PYARROW for f in resultado):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("❌ Los formatos Parquet/Feather requieren el paquete 'pyarrow'.")
+
+    return tuple(resultado)
+
+
+def formatos_columnares(formatos):
+    """Subconjunto de `formatos` que se escribe como archivo columnar/plano."""
+    return [f for f in formatos if f in FORMATOS_COLUMNARES]
+
+
+# ============================================================
+# 🗂️ Layout particionado (estilo Hive)
+# ============================================================
+def _segmento(clave, valor):
+    """Segmento 'clave=valor' con el valor codificado (lo decodifica pyarrow)."""
+    return f"{clave}={quote(str(valor).strip(), safe='')}"
+
+
+def ruta_particion(formato, dataset, dependencia=None, subdependencia=None):
+    """
+    Ruta relativa de una partición:
+        <formato>/<dataset>/dependencia=<dep>/subdependencia=<sub>/part-0.<ext>
+    """
+    partes = [formato, dataset]
+    if dependencia is not None:
+        partes.append(_segmento("dependencia", dependencia))
+    if subdependencia is not None:
+        partes.append(_segmento("subdependencia", subdependencia))
+    partes.append(f"part-0.{formato}")
+    return os.path.join(*partes)
+
+
+def columnas_particiones(particiones):
+    """
+    Unión ordenada de columnas de todas las particiones (dict plano o
+    jerárquico). Permite que cada archivo del dataset comparta esquema
+    aunque la división haya eliminado columnas vacías.
+    """
+    columnas = {}
+
+    def recorrer(valor):
+        if isinstance(valor, pd.DataFrame):
+            for col in valor.columns:
+                columnas.setdefault(col, None)
+        elif isinstance(valor, dict):
+            for v in valor.values():
+                recorrer(v)
+
+    recorrer(particiones)
+    return list(columnas)
+
+
+# ============================================================
+# 💾 Escritura de una partición
+# ============================================================
+def _preparar_columnar(df, columnas=None):
+    """Esquema estable: columnas alineadas, índice plano y texto como string."""
+    if columnas is not None:
+        df = df.reindex(columns=columnas)
+    df = df.reset_index(drop=True)
+    df.columns = [str(c) for c in df.columns]
+
+    # Texto libre y columnas vacías como string: mismo tipo en todas las particiones
+    texto = [
+        c for c in df.columns
+        if df[c].dtype == object or df[c].isna().all()
+    ]
+    if texto:
+        df = df.astype({c: "string" for c in texto})
+    return df
+
+
+def escribir_tabla(destino, relativa, df, formato, columnas=None):
+    """Escribe `df` en `relativa` dentro de `destino` con el formato indicado."""
+    df = _preparar_columnar(df, columnas)
+
+    with destino.abrir(relativa) as f:
+        if formato == "parquet":
+            df.to_parquet(f, index=False, compression="snappy")
+        elif formato == "feather":
+            df.to_feather(f, compression="lz4")
+        elif formato == "csv":
+            df.to_csv(f, index=False, encoding="utf-8-sig")
+        else:
+            raise ValueError(f"❌ Formato no columnar: '{formato}'")
+
+    return destino.ruta(relativa)
+
+
+def escribir_particion(destino, formato, dataset, df, dependencia=None, subdependencia=None, columnas=None):
+    """Escribe una partición en el layout particionado de `formato`."""
+    relativa = ruta_particion(formato, dataset, dependencia, subdependencia)
+    return escribir_tabla(destino, relativa, df, formato, columnas)
+
+
+# ============================================================
+# 🚰 Escritura por bloques (sin materializar la tabla completa)
+# ============================================================
+def tipos_columnares(df, anulables=False):
+    """
+    Tipos fijos por columna para que todos los bloques compartan esquema:
+    texto y columnas vacías como "string". Con `anulables=True` (columnas
+    que pueden quedar sin valor, p. ej. tras un LEFT JOIN) los enteros y
+    booleanos pasan a sus variantes con nulos ("Int64", "boolean").
+    """
+    tipos = {}
+    for col in df.columns:
+        serie = df[col]
+        if serie.dtype == object or serie.isna().all():
+            tipos[col] = "string"
+        elif anulables and pd.api.types.is_bool_dtype(serie.dtype):
+            tipos[col] = "boolean"
+        elif anulables and pd.api.types.is_integer_dtype(serie.dtype):
+            tipos[col] = "Int64"
+        else:
+            tipos[col] = serie.dtype
+    return tipos
+
+
+@contextmanager
+def escritor_por_bloques(destino, relativa, formato, tipos):
+    """
+    Abre `relativa` en `destino` y entrega `escribir(df)` para agregar
+    bloques con las columnas/tipos de `tipos` (ver `tipos_columnares`).
+    Parquet usa un ParquetWriter (un row group por bloque), Feather el
+    formato Arrow IPC con lz4 y CSV agrega filas bajo un único encabezado.
+    """
+    estado = {"escritor": None, "esquema": None, "bloques": 0}
+
+    def preparar(df):
+        df = df.reindex(columns=list(tipos)).astype(tipos).reset_index(drop=True)
+        df.columns = [str(c) for c in df.columns]
+        return df
+
+    with destino.abrir(relativa) as f:
+
+        def escribir(df):
+            df = preparar(df)
+
+            if formato == "csv":
+                primero = estado["bloques"] == 0
+                df.to_csv(f, index=False, header=primero,
+                          encoding="utf-8-sig" if primero else "utf-8")
+
+            elif formato in ("parquet", "feather"):
+                import pyarrow as pa
+
+                tabla = pa.Table.from_pandas(df, schema=estado["esquema"], preserve_index=False)
+                if estado["escritor"] is None:
+                    estado["esquema"] = tabla.schema
+                    if formato == "parquet":
+                        import pyarrow.parquet as pq
+                        estado["escritor"] = pq.ParquetWriter(f, tabla.schema, compression="snappy")
+                    else:
+                        estado["escritor"] = pa.ipc.new_file(
+                            f, tabla.schema, options=pa.ipc.IpcWriteOptions(compression="lz4")
+                        )
+                estado["escritor"].write_table(tabla)
+
+            else:
+                raise ValueError(f"❌ Formato no columnar: '{formato}'")
+
+            estado["bloques"] += 1
+
+        yield escribir
+
+        # Sin bloques: al menos el esquema (archivo válido y vacío)
+        if estado["bloques"] == 0:
+            escribir(pd.DataFrame(columns=list(tipos)))
+
+        if estado["escritor"] is not None:
+            estado["escritor"].close()
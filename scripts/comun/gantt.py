@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
+
+from scripts.comun.render import guardar_figura
+
+
+# ============================================================
+# 📅 Gantt paginado
+# ============================================================
+# Las filas se reparten en páginas de `filas_por_pagina`; cada página es
+# UNA figura con un eje del alto de sus filas y todas sus barras en una
+# sola colección. Todas las páginas comparten el rango de fechas y el
+# formato del eje, así que el costo crece con las páginas y no con las filas.
+FILAS_POR_PAGINA_GANTT = 30
+
+ANCHO_GANTT = 10.0        # pulgadas
+ALTO_FILA_GANTT = 0.28    # pulgadas por fila
+MARGEN_IZQ_GANTT = 1.1    # etiquetas del eje Y
+MARGEN_SUP_GANTT = 0.5    # título
+MARGEN_INF_GANTT = 0.75   # fechas y rótulo del eje X
+
+
+def _rango_fechas(inicios, fines):
+    """Límites comunes del eje X (con un pequeño margen)."""
+    x_min = float(np.min(np.minimum(inicios, fines)))
+    x_max = float(np.max(np.maximum(inicios, fines)))
+    margen = max((x_max - x_min) * 0.02, 1.0)
+    return x_min - margen, x_max + margen
+
+
+def _formatear_eje(ax, limites, etiquetas, etiqueta_y):
+    """Formato compartido por todas las páginas."""
+    localizador = mdates.AutoDateLocator()
+    ax.xaxis.set_major_locator(localizador)
+    ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(localizador))
+    ax.set_xlim(*limites)
+
+    ax.set_ylim(len(etiquetas) - 0.5, -0.5)   # primera fila arriba
+    ax.set_yticks(np.arange(len(etiquetas)))
+    ax.set_yticklabels(etiquetas)
+
+    ax.set_xlabel("Fecha")
+    ax.set_ylabel(etiqueta_y)
+    ax.grid(True, linestyle="--", alpha=0.5)
+    ax.set_axisbelow(True)
+
+
+def _rectangulos(inicios, fines, alto=0.8):
+    """Vértices (n, 4, 2) de una barra por fila: fila i ocupa y ∈ [i - alto/2, i + alto/2]."""
+    y = np.arange(len(inicios), dtype=float)
+    abajo, arriba = y - alto / 2, y + alto / 2
+    return np.stack([
+        np.column_stack([inicios, abajo]),
+        np.column_stack([fines, abajo]),
+        np.column_stack([fines, arriba]),
+        np.column_stack([inicios, arriba]),
+    ], axis=1)
+
+
+def paginas_gantt(inicios, fines, etiquetas, titulo, etiqueta_y="ID",
+                  filas_por_pagina=FILAS_POR_PAGINA_GANTT, dpi=200,
+                  color="C0", borde="black"):
+    """
+    Dibuja un Gantt paginado y devuelve una lista de BytesIO (una imagen
+    por página). `inicios` y `fines` son fechas ya convertidas y sin
+    nulos, en el orden en que se quieren las filas.
+    """
+    inicios = mdates.date2num(pd.to_datetime(pd.Series(inicios)).to_numpy())
+    fines = mdates.date2num(pd.to_datetime(pd.Series(fines)).to_numpy())
+    etiquetas = [str(e) for e in etiquetas]
+
+    total = len(etiquetas)
+    if total == 0:
+        return []
+
+    limites = _rango_fechas(inicios, fines)
+    filas_por_pagina = max(1, int(filas_por_pagina))
+    buffers = []
+
+    for i in range(0, total, filas_por_pagina):
+        j = min(i + filas_por_pagina, total)
+        n = j - i
+
+        alto = MARGEN_SUP_GANTT + MARGEN_INF_GANTT + n * ALTO_FILA_GANTT
+        fig = plt.figure(figsize=(ANCHO_GANTT, alto))
+        ax = fig.add_axes([
+            MARGEN_IZQ_GANTT / ANCHO_GANTT,
+            MARGEN_INF_GANTT / alto,
+            1 - (MARGEN_IZQ_GANTT + 0.3) / ANCHO_GANTT,
+            n * ALTO_FILA_GANTT / alto,
+        ])
+
+        ax.add_collection(PolyCollection(
+            _rectangulos(inicios[i:j], fines[i:j]),
+            facecolors=color, edgecolors=borde, linewidths=0.8
+        ))
+        _formatear_eje(ax, limites, etiquetas[i:j], etiqueta_y)
+        ax.set_title(f"{titulo} ({i + 1}-{j} de {total})", fontsize=12)
+
+        buffers.append(guardar_figura(fig, dpi=dpi))
+
+    return buffers
@@ -0,0 +1,170 @@
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import (
+    BaseDocTemplate, PageTemplate, Frame, Flowable, Paragraph, Spacer, PageBreak,
+    LongTable, TableStyle
+)
+
+
+# ============================================================
+# 📚 Informe consolidado: un solo PDF con todas las particiones
+# ============================================================
+# Un único `build` de ReportLab: las secciones (una por dependencia o
+# subdependencia) se piden a un iterador a medida que el documento las
+# consume, así que no hace falta tener todas en memoria. Cada encabezado
+# registra un marcador en el árbol de navegación del PDF
+# (dependencia → subdependencia) y una entrada del índice, que va al
+# final del documento para no necesitar una segunda pasada.
+ESTILOS = getSampleStyleSheet()   # compartidos por todos los PDFs
+
+# Márgenes y compresión (Flate) de los streams de página, para todos los PDFs
+OPCIONES_PDF = {"leftMargin": 25, "rightMargin": 25, "topMargin": 30, "bottomMargin": 25, "pageCompression": 1}
+
+_ESTILO_INDICE = [
+    ParagraphStyle("Indice0", parent=ESTILOS["Normal"], fontName="Helvetica-Bold", fontSize=10, leading=13),
+    ParagraphStyle("Indice1", parent=ESTILOS["Normal"], fontSize=9, leading=12, leftIndent=14),
+]
+
+
+def _pie_de_pagina(canvas, doc):
+    canvas.saveState()
+    canvas.setFont("Helvetica", 8)
+    canvas.setFillColor(colors.grey)
+    canvas.drawRightString(doc.pagesize[0] - doc.rightMargin, 12, f"Página {doc.page}")
+    canvas.restoreState()
+
+
+class _HistoriaDiferida(list):
+    """
+    Lista de flowables que se rellena desde un iterador cuando quedan pocos:
+    `BaseDocTemplate.build` la consume desde el inicio y las secciones
+    siguientes se generan recién entonces.
+    """
+
+    def __init__(self, partes):
+        super().__init__()
+        self._partes = iter(partes)
+        self._rellenar()
+
+    def _rellenar(self):
+        while self._partes is not None and super().__len__() < 2:
+            try:
+                self.extend(next(self._partes))
+            except StopIteration:
+                self._partes = None
+
+    def __len__(self):
+        self._rellenar()
+        return super().__len__()
+
+    def __getitem__(self, i):
+        self._rellenar()
+        return super().__getitem__(i)
+
+
+def encabezado_seccion(texto, nivel, clave):
+    """Título de sección que el documento registra en el árbol de navegación y en el índice."""
+    estilo = ESTILOS["Heading1"] if nivel == 0 else ESTILOS["Heading2"]
+    parrafo = Paragraph(escape(str(texto)), estilo)
+    parrafo.entrada_indice = (nivel, str(texto), clave)
+    return parrafo
+
+
+class IndiceSecciones(Flowable):
+    """Índice (con enlaces) de las entradas registradas por el documento hasta este punto."""
+
+    def __init__(self, entradas):
+        super().__init__()
+        self.entradas = entradas
+        self._tabla = None
+
+    def _construir(self, ancho):
+        filas = [
+            [Paragraph(f'<a href="#{clave}">{escape(texto)}</a>', _ESTILO_INDICE[min(nivel, 1)]), str(pagina)]
+            for nivel, texto, pagina, clave in self.entradas
+        ] or [[Paragraph("(sin secciones)", _ESTILO_INDICE[1]), ""]]
+        tabla = LongTable(filas, colWidths=[ancho - 50, 50])
+        tabla.setStyle(TableStyle([
+            ("ALIGN", (1, 0), (1, -1), "RIGHT"),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("LINEBELOW", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+        ]))
+        return tabla
+
+    def wrap(self, availWidth, availHeight):
+        self._tabla = self._construir(availWidth)
+        return self._tabla.wrap(availWidth, availHeight)
+
+    def split(self, availWidth, availHeight):
+        self._tabla = self._construir(availWidth)
+        return self._tabla.split(availWidth, availHeight)
+
+    def draw(self):
+        self._tabla.drawOn(self.canv, 0, 0)
+
+
+class InformeConsolidado(BaseDocTemplate):
+    """A4 con pie de página numerado; registra marcadores e índice de los `encabezado_seccion`."""
+
+    def __init__(self, archivo, titulo="", **kwargs):
+        super().__init__(archivo, pagesize=A4, title=titulo, **OPCIONES_PDF, **kwargs)
+        marco = Frame(self.leftMargin, self.bottomMargin, self.width, self.height, id="normal")
+        self.addPageTemplates([PageTemplate(id="pagina", frames=[marco], onPage=_pie_de_pagina)])
+        self.entradas_indice = []
+
+    def afterFlowable(self, flowable):
+        entrada = getattr(flowable, "entrada_indice", None)
+        if entrada is None:
+            return
+        nivel, texto, clave = entrada
+        self.canv.bookmarkPage(clave)
+        self.canv.addOutlineEntry(texto, clave, level=nivel, closed=nivel == 0)
+        self.entradas_indice.append((nivel, texto, self.page, clave))
+
+
+def construir_informe(archivo, titulo, secciones, subtitulo=None):
+    """
+    Escribe en `archivo` un PDF con portada, una sección por elemento de
+    `secciones` e índice final. `secciones` entrega
+    ((dependencia, subdependencia o None), [flowables]) en orden; las
+    subdependencias de una misma dependencia quedan anidadas bajo ella.
+    Devuelve la cantidad de secciones.
+    """
+    doc = InformeConsolidado(archivo, titulo=titulo)
+    contador = {"secciones": 0}
+
+    def partes():
+        yield [
+            Spacer(1, 180),
+            Paragraph(escape(titulo), ESTILOS["Title"]),
+            Spacer(1, 12),
+            Paragraph(escape(subtitulo or datetime.now().strftime("Generado el %d/%m/%Y %H:%M")),
+                      ESTILOS["Normal"]),
+            PageBreak(),
+        ]
+
+        dependencia_actual = None
+        for (dependencia, subdependencia), flowables in secciones:
+            n = contador["secciones"] = contador["secciones"] + 1
+            parte = []
+
+            if subdependencia is None:
+                parte.append(encabezado_seccion(dependencia, 0, f"s{n}"))
+            else:
+                if dependencia != dependencia_actual:
+                    parte.append(encabezado_seccion(dependencia, 0, f"d{n}"))
+                parte.append(encabezado_seccion(subdependencia, 1, f"s{n}"))
+            dependencia_actual = dependencia
+
+            parte.extend(flowables)
+            parte.append(PageBreak())
+            yield parte
+
+        yield [Paragraph("Índice", ESTILOS["Heading1"]), Spacer(1, 8), IndiceSecciones(doc.entradas_indice)]
+
+    doc.build(_HistoriaDiferida(partes()))
+    return contador["secciones"]
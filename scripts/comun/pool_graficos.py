@@ -0,0 +1,206 @@
+import os
+import atexit
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from scripts.comun import cache_graficos, render
+
+
+# ============================================================
+# 🏭 Pool de procesos "tibio" para renderizar gráficos
+# ============================================================
+# Matplotlib es de un solo hilo: cada proceso del pool importa pyplot con
+# backend Agg y precarga las fuentes UNA vez al arrancar, y luego atiende
+# trabajos (función de gráfico + datos agregados → buffers PNG).
+#
+# Con `procesos <= 1`, o si el pool no puede iniciarse, los trabajos se
+# ejecutan en el proceso actual con la misma interfaz (Futures ya resueltos).
+PROCESOS_GRAFICOS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+_pool = None
+_firma_pool = None
+_procesos = PROCESOS_GRAFICOS
+
+
+def _inicializar_trabajador(ruta_cache, limite_cache_mb, cache_activa, formato, perfil, compresion):
+    """Se ejecuta una vez por proceso: Agg, pyplot, fuentes y módulos de gráficos."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot
+    from matplotlib import font_manager
+    font_manager.findfont(font_manager.FontProperties(family=matplotlib.rcParams["font.family"]))
+
+    import scripts.iniciativas.graficos
+    import scripts.instancias_externas.graficos
+
+    cache_graficos.configurar_cache(ruta_cache, limite_cache_mb, activa=cache_activa)
+    render.configurar_formato_grafico(formato)
+    render.configurar_perfil_render(perfil)
+    render.configurar_compresion_pdf(compresion)
+
+
+def configurar_pool(procesos=PROCESOS_GRAFICOS):
+    """Fija el número de procesos (1 = sin paralelismo). Reinicia el pool si ya existía."""
+    global _procesos
+    cerrar_pool()
+    _procesos = max(1, int(procesos or 1))
+
+
+def obtener_pool():
+    """
+    Pool compartido (se crea al primer uso), o None si se trabaja en serie.
+    Si cambió el perfil/formato de render o la compresión de imágenes del
+    PDF, se recrea para que los procesos lo usen.
+    """
+    global _pool, _firma_pool
+    if _procesos <= 1:
+        return None
+
+    firma = (render.firma_render(), render.compresion_pdf())
+    if _pool is not None and _firma_pool != firma:
+        cerrar_pool()
+
+    if _pool is None:
+        cache = cache_graficos.cache_activa()
+        try:
+            _pool = ProcessPoolExecutor(
+                max_workers=_procesos,
+                initializer=_inicializar_trabajador,
+                initargs=(
+                    cache.ruta if cache else cache_graficos.RUTA_CACHE_GRAFICOS,
+                    cache.limite / (1024 * 1024) if cache else cache_graficos.LIMITE_CACHE_MB,
+                    cache is not None,
+                    render.formato_grafico(),
+                    render.perfil_render(),
+                    render.compresion_pdf(),
+                )
+            )
+            _firma_pool = firma
+        except (OSError, ValueError, NotImplementedError) as e:
+            print(f"⚠ No se pudo iniciar el pool de gráficos ({e}); se renderiza en serie.")
+            configurar_pool(1)
+            return None
+
+    return _pool
+
+
+@atexit.register
+def cerrar_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+# ------------------------------------------------------------
+# 📤 Envío de trabajos
+# ------------------------------------------------------------
+def _resuelto(funcion, args, kwargs):
+    futuro = Future()
+    try:
+        futuro.set_result(funcion(*args, **kwargs))
+    except Exception as e:
+        futuro.set_exception(e)
+    return futuro
+
+
+def en_serie(funcion, *args, **kwargs):
+    """Ejecuta `funcion` aquí mismo y devuelve un Future ya resuelto (misma interfaz que `enviar`)."""
+    return _resuelto(funcion, args, kwargs)
+
+
+def enviar(funcion, *args, **kwargs):
+    """
+    Encola `funcion(*args, **kwargs)` en el pool y devuelve un Future.
+    `funcion` debe estar definida a nivel de módulo (se envía por nombre).
+    """
+    pool = obtener_pool()
+    if pool is None:
+        return _resuelto(funcion, args, kwargs)
+
+    try:
+        futuro = pool.submit(funcion, *args, **kwargs)
+    except (BrokenProcessPool, RuntimeError):
+        # Un proceso murió: se sigue en serie
+        configurar_pool(1)
+        return _resuelto(funcion, args, kwargs)
+
+    futuro.trabajo = (funcion, args, kwargs)
+    return futuro
+
+
+def resultado(futuro):
+    """Resultado de un Future; si el pool se rompió, el trabajo se repite en serie."""
+    try:
+        return futuro.result()
+    except BrokenProcessPool:
+        if _pool is not None:
+            print("⚠ El pool de gráficos se detuvo; se continúa en serie.")
+            configurar_pool(1)
+        funcion, args, kwargs = futuro.trabajo
+        return funcion(*args, **kwargs)
+
+
+def resultados(futuros):
+    """Espera un dict {clave: Future} y devuelve {clave: resultado}."""
+    return {clave: resultado(futuro) for clave, futuro in futuros.items()}
+
+
+def _cancelar_pendientes(futuros):
+    """Cancela los trabajos que aún no empezaron (los que ya corren terminan solos)."""
+    for futuro in futuros:
+        futuro.cancel()
+
+
+def en_ventana(elementos, encolar, ventana=None):
+    """
+    Recorre `elementos` en orden manteniendo como máximo `ventana` de ellos
+    con trabajos en vuelo: `encolar(elemento)` envía sus trabajos y
+    devuelve {clave: Future}; se entrega (elemento, {clave: resultado}).
+
+    Así el proceso principal arma el PDF de una partición mientras el pool
+    ya renderiza las siguientes, sin acumular todas las imágenes en memoria.
+    """
+    ventana = ventana or max(2, 2 * _procesos)
+    pendientes = deque()
+
+    try:
+        for elemento in elementos:
+            pendientes.append((elemento, encolar(elemento)))
+            if len(pendientes) >= ventana:
+                listo, futuros = pendientes.popleft()
+                yield listo, resultados(futuros)
+
+        while pendientes:
+            listo, futuros = pendientes.popleft()
+            yield listo, resultados(futuros)
+    finally:
+        # Si se deja de consumir (error o cancelación), no se renderiza de más
+        _cancelar_pendientes(f for _, futuros in pendientes for f in futuros.values())
+
+
+def en_orden(elementos, lanzar, ventana=None):
+    """
+    Como `en_ventana`, pero con un solo trabajo por elemento:
+    `lanzar(elemento)` devuelve un Future y se entrega
+    (elemento, resultado) en el orden de `elementos`.
+
+    Sirve para encadenar etapas: p. ej. los PDFs de las particiones cuyos
+    gráficos ya están listos, mientras el pool sigue con los siguientes.
+    """
+    ventana = ventana or max(2, 2 * _procesos)
+    pendientes = deque()
+
+    try:
+        for elemento in elementos:
+            pendientes.append((elemento, lanzar(elemento)))
+            if len(pendientes) >= ventana:
+                listo, futuro = pendientes.popleft()
+                yield listo, resultado(futuro)
+
+        while pendientes:
+            listo, futuro = pendientes.popleft()
+            yield listo, resultado(futuro)
+    finally:
+        _cancelar_pendientes(futuro for _, futuro in pendientes)
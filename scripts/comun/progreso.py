@@ -0,0 +1,261 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+
+
+# ============================================================
+# ⏹ Cancelación cooperativa de trabajos largos
+# ============================================================
+# La interfaz corre el trabajo en un hilo de fondo y, al pulsar
+# "Cancelar", pide la cancelación; los exportadores y generadores de PDF
+# la revisan entre particiones (`comprobar_cancelacion`, o `recorrer`) y
+# cortan con `Cancelado`. Lo ya escrito queda en la bitácora, así que el
+# trabajo se puede reanudar después.
+#
+# `Cancelado` hereda de BaseException (como KeyboardInterrupt) para no
+# quedar atrapado en los `except Exception` que convierten errores en
+# resultados vacíos.
+class Cancelado(BaseException):
+    """El usuario canceló el trabajo en curso."""
+
+
+_cancelacion = threading.Event()
+
+
+def pedir_cancelacion():
+    """Pide cancelar el trabajo en curso (se puede llamar desde cualquier hilo)."""
+    _cancelacion.set()
+
+
+def cancelacion_pedida():
+    return _cancelacion.is_set()
+
+
+def comprobar_cancelacion():
+    """Lanza `Cancelado` si se pidió cancelar. Se llama entre unidades de trabajo."""
+    if _cancelacion.is_set():
+        raise Cancelado()
+
+
+@contextmanager
+def trabajo_cancelable():
+    """Delimita un trabajo: la cancelación pedida vale solo mientras este dura."""
+    _cancelacion.clear()
+    try:
+        yield
+    finally:
+        _cancelacion.clear()
+
+
+# ============================================================
+# 📶 Eventos de avance por etapa (con ETA)
+# ============================================================
+# Validadores, divisores, exportadores y generadores de PDF informan su
+# avance con `Etapa` / `recorrer`; la interfaz y la línea de comandos se
+# suscriben con `escuchar`. Sin suscriptores, emitir no cuesta nada.
+#
+# La ETA sale del ritmo observado en la etapa: segundos transcurridos por
+# unidad terminada × unidades restantes.
+ETAPAS = {
+    "validacion": "🔍 Validación",
+    "division": "📊 División",
+    "excel": "💾 Exportación",
+    "union": "🔗 Unión",
+    "pdf": "📄 PDFs",
+    "pdf_consolidado": "📚 Informe consolidado",
+}
+
+
+@dataclass(frozen=True)
+class EventoProgreso:
+    """
+    - tipo:     "inicio", "avance" o "fin"
+    - etapa:    clave de `ETAPAS`
+    - hechos / total: unidades terminadas / esperadas (total None si no se conoce)
+    - filas, bytes:   acumulados de la etapa (filas procesadas, bytes escritos)
+    - segundos: transcurridos desde el inicio de la etapa
+    - eta:      segundos restantes estimados (None sin datos suficientes)
+    - estado:   en "fin": "ok", "cancelada", "interrumpida" o "error"
+    """
+    tipo: str
+    etapa: str
+    hechos: int = 0
+    total: int = None
+    filas: int = 0
+    bytes: int = 0
+    segundos: float = 0.0
+    eta: float = None
+    detalle: str = ""
+    estado: str = "ok"
+
+    @property
+    def fraccion(self):
+        """Avance entre 0 y 1, o None si no se conoce el total."""
+        if not self.total:
+            return None
+        return min(1.0, self.hechos / self.total)
+
+    def como_dict(self):
+        return asdict(self)
+
+    def texto(self):
+        """Línea legible, p. ej. "📄 PDFs: 3/10 · 1.2 MB · quedan ~12 s"."""
+        partes = [ETAPAS.get(self.etapa, self.etapa)]
+
+        if self.tipo == "fin":
+            partes.append(f"{'terminada' if self.estado == 'ok' else self.estado} en {formatear_segundos(self.segundos)}")
+        elif self.total:
+            partes.append(f"{self.hechos}/{self.total}")
+        elif self.hechos:
+            partes.append(str(self.hechos))
+
+        if self.filas:
+            partes.append(f"{self.filas:,} filas".replace(",", "."))
+        if self.bytes:
+            partes.append(formatear_bytes(self.bytes))
+        if self.tipo == "avance" and self.eta is not None and self.eta >= 1:
+            partes.append(f"quedan ~{formatear_segundos(self.eta)}")
+        if self.detalle and self.tipo != "fin":
+            partes.append(self.detalle)
+
+        return f"{partes[0]}: " + " · ".join(partes[1:]) if len(partes) > 1 else partes[0]
+
+
+def formatear_segundos(segundos):
+    segundos = int(round(segundos))
+    if segundos < 60:
+        return f"{segundos} s"
+    minutos, segundos = divmod(segundos, 60)
+    if minutos < 60:
+        return f"{minutos} min {segundos:02d} s"
+    horas, minutos = divmod(minutos, 60)
+    return f"{horas} h {minutos:02d} min"
+
+
+def formatear_bytes(n):
+    for unidad in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unidad}" if unidad == "B" else f"{n:.1f} {unidad}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+_oyentes = []
+_activas = []      # etapas abiertas (la última recibe los bytes escritos)
+
+
+def suscribir(oyente):
+    """Agrega `oyente(evento)`; se llama en el hilo que hace el trabajo."""
+    if oyente not in _oyentes:
+        _oyentes.append(oyente)
+
+
+def desuscribir(oyente):
+    if oyente in _oyentes:
+        _oyentes.remove(oyente)
+
+
+@contextmanager
+def escuchar(oyente):
+    """Suscribe `oyente` mientras dura el bloque."""
+    suscribir(oyente)
+    try:
+        yield
+    finally:
+        desuscribir(oyente)
+
+
+def _emitir(evento):
+    for oyente in list(_oyentes):
+        try:
+            oyente(evento)
+        except Exception as e:
+            # Un problema al mostrar el avance no debe cortar la exportación
+            print(f"⚠ Error al informar el avance: {e}")
+
+
+class Etapa:
+    """
+    Avance de una etapa. Emite "inicio" al entrar, "avance" en cada
+    llamada y "fin" al salir (con estado "cancelada", "interrumpida" o
+    "error" si el bloque terminó con una excepción):
+
+        with Etapa("division") as avance:
+            dfs = dividir(df)
+            avance(filas=len(df))
+    """
+
+    def __init__(self, etapa, total=None, detalle=""):
+        self.etapa = etapa
+        self.total = total
+        self.detalle = detalle
+        self.hechos = 0
+        self.filas = 0
+        self.bytes = 0
+        self.inicio = None
+
+    def _evento(self, tipo, estado="ok", detalle=None):
+        transcurridos = time.perf_counter() - self.inicio
+        eta = None
+        if self.total and self.hechos:
+            eta = transcurridos / self.hechos * max(self.total - self.hechos, 0)
+        return EventoProgreso(
+            tipo=tipo, etapa=self.etapa, hechos=self.hechos, total=self.total,
+            filas=self.filas, bytes=self.bytes, segundos=round(transcurridos, 3),
+            eta=None if eta is None else round(eta, 1),
+            detalle=self.detalle if detalle is None else detalle, estado=estado,
+        )
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        _activas.append(self)
+        if _oyentes:
+            _emitir(self._evento("inicio"))
+        return self
+
+    def __call__(self, n=1, filas=0, detalle=""):
+        """Informa `n` unidades terminadas (y `filas` procesadas)."""
+        self.hechos += n
+        self.filas += filas
+        if _oyentes:
+            _emitir(self._evento("avance", detalle=detalle))
+
+    def __exit__(self, tipo, valor, traza):
+        if self in _activas:
+            _activas.remove(self)
+        if tipo is None:
+            estado = "ok"
+        elif issubclass(tipo, (Cancelado, KeyboardInterrupt)):
+            estado = "cancelada"
+        elif issubclass(tipo, GeneratorExit):
+            estado = "interrumpida"     # `recorrer` abandonado por quien lo consumía
+        else:
+            estado = "error"
+        if _oyentes:
+            _emitir(self._evento("fin", estado=estado, detalle=""))
+        return False
+
+
+def registrar_bytes(n):
+    """Suma `n` bytes escritos a la etapa en curso (la más interna)."""
+    if _activas:
+        _activas[-1].bytes += n
+
+
+def recorrer(elementos, etapa, total=None, filas=None, detalle=None):
+    """
+    Itera `elementos` dentro de una `Etapa`: antes de entregar cada
+    elemento revisa la cancelación y, cuando se pide el siguiente, lo
+    cuenta como terminado. `filas(elemento)` y `detalle(elemento)` son
+    opcionales; `total` por defecto es `len(elementos)` si existe.
+    """
+    if total is None and hasattr(elementos, "__len__"):
+        total = len(elementos)
+
+    with Etapa(etapa, total) as avance:
+        for elemento in elementos:
+            comprobar_cancelacion()
+            yield elemento
+            avance(filas=filas(elemento) if filas else 0,
+                   detalle=str(detalle(elemento)) if detalle else "")
@@ -0,0 +1,275 @@
+import io
+import hashlib
+from collections import OrderedDict
+
+import matplotlib
+import matplotlib.pyplot as plt
+from PIL import Image as ImagenPIL
+from reportlab import rl_config
+from reportlab.platypus import Image
+from reportlab.lib.utils import ImageReader
+
+
+# ============================================================
+# 🖼 Salida de gráficos: SVG vectorial (svglib) o PNG
+# ============================================================
+# Con el paquete opcional `svglib` los gráficos se guardan como SVG y se
+# incrustan en el PDF como Drawing de ReportLab (vectorial: sin rasterizar,
+# más liviano y nítido con cualquier zoom). Sin `svglib` se usa PNG.
+try:
+    from svglib.svglib import svg2rlg
+except ImportError:
+    svg2rlg = None
+
+FORMATOS_GRAFICOS = ("svg", "png")
+
+# Texto del SVG como texto (no como trazos): svglib lo dibuja con fuentes
+# de ReportLab y el SVG se convierte varias veces más rápido
+matplotlib.rcParams["svg.fonttype"] = "none"
+
+_formato = "svg" if svg2rlg is not None else "png"
+
+
+# ============================================================
+# 🎚 Perfiles de calidad
+# ============================================================
+# - dpi_max:    tope al DPI pedido por cada gráfico (None = el del gráfico)
+# - ajustado:   recorte `bbox_inches="tight"` (requiere un dibujado extra)
+# - suavizado:  antialiasing de líneas, áreas y texto
+# - compresion: nivel zlib del PNG (0-9; más bajo = más rápido)
+# - formato:    formato forzado (None = el configurado: SVG/PNG)
+PERFILES_RENDER = {
+    "borrador": {"dpi_max": 60, "ajustado": False, "suavizado": False, "compresion": 1, "formato": "png"},
+    "pantalla": {"dpi_max": 110, "ajustado": True, "suavizado": True, "compresion": 3, "formato": None},
+    "impresion": {"dpi_max": None, "ajustado": True, "suavizado": True, "compresion": 6, "formato": None},
+}
+
+_perfil = "impresion"
+
+
+def normalizar_perfil_render(perfil):
+    perfil = str(perfil or "impresion").strip().lower()
+    if perfil not in PERFILES_RENDER:
+        raise ValueError(
+            f"❌ Perfil de render desconocido: '{perfil}'. Opciones: {', '.join(PERFILES_RENDER)}"
+        )
+    return perfil
+
+
+def configurar_perfil_render(perfil):
+    """
+    Activa un perfil de `PERFILES_RENDER` en este proceso. El suavizado se
+    aplica a rcParams, así que afecta a las figuras creadas desde ahora.
+    """
+    global _perfil
+    _perfil = normalizar_perfil_render(perfil)
+
+    suavizado = PERFILES_RENDER[_perfil]["suavizado"]
+    for clave in ("lines.antialiased", "patch.antialiased", "text.antialiased"):
+        matplotlib.rcParams[clave] = suavizado
+
+    return _perfil
+
+
+def perfil_render():
+    return _perfil
+
+
+def firma_render():
+    """Perfil + formato efectivo (parte de la clave de la caché de gráficos)."""
+    return f"{_perfil}:{_formato_efectivo(None)}"
+
+
+def _formato_efectivo(formato):
+    return formato or PERFILES_RENDER[_perfil]["formato"] or _formato
+
+
+def normalizar_formato_grafico(formato):
+    formato = str(formato or "").strip().lower()
+    if formato not in FORMATOS_GRAFICOS:
+        raise ValueError(
+            f"❌ Formato de gráfico no soportado: '{formato}'. Opciones: {', '.join(FORMATOS_GRAFICOS)}"
+        )
+    if formato == "svg" and svg2rlg is None:
+        print("⚠ El formato SVG requiere el paquete 'svglib'; se usará PNG.")
+        return "png"
+    return formato
+
+
+def configurar_formato_grafico(formato):
+    """Fija el formato de los gráficos de este proceso ("svg" o "png")."""
+    global _formato
+    _formato = normalizar_formato_grafico(formato)
+    return _formato
+
+
+def formato_grafico():
+    return _formato
+
+
+def guardar_figura(fig, dpi=None, formato=None):
+    """
+    Guarda `fig` en un BytesIO (posición 0) y la cierra, según el perfil
+    de render activo.
+
+    `dpi` solo afecta al PNG (o a elementos rasterizados dentro del SVG);
+    sin `dpi` se usa el de matplotlib, como `plt.savefig`. El perfil puede
+    bajarlo (`dpi_max`).
+    """
+    perfil = PERFILES_RENDER[_perfil]
+    formato = _formato_efectivo(formato)
+
+    dpi = dpi if dpi is not None else fig.dpi
+    if perfil["dpi_max"] is not None:
+        dpi = min(dpi, perfil["dpi_max"])
+
+    opciones = {"dpi": dpi}
+    if perfil["ajustado"]:
+        opciones["bbox_inches"] = "tight"
+    if formato == "png":
+        opciones["pil_kwargs"] = {"compress_level": perfil["compresion"]}
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=formato, **opciones)
+    plt.close(fig)
+    buffer.seek(0)
+    return buffer
+
+
+# ============================================================
+# 🗜 Imágenes dentro del PDF
+# ============================================================
+# Cada PNG se prepara UNA vez por proceso: los buffers con los mismos
+# bytes (el mismo gráfico en varias particiones, o repetido en el informe
+# consolidado) comparten un ImageReader, y ReportLab los escribe como un
+# único XObject por documento.
+# - sin_perdida: se descarta el canal alfa si es opaco (los PNG de
+#                matplotlib son RGBA y cada uno arrastraba una máscara SMask).
+# - cuantizada:  además se reduce a 256 colores (Flate comprime mucho mejor).
+# - jpeg:        JPEG de calidad CALIDAD_JPEG_PDF, incrustado tal cual (DCT).
+# En todos los modos los streams se escriben en binario, sin ASCII85.
+COMPRESIONES_PDF = ("sin_perdida", "cuantizada", "jpeg")
+CALIDAD_JPEG_PDF = 85
+LIMITE_IMAGENES_PDF = 32   # ImageReader preparados que se conservan por proceso
+
+rl_config.useA85 = 0
+
+_compresion = "sin_perdida"
+_imagenes = OrderedDict()
+
+
+def normalizar_compresion_pdf(modo):
+    modo = str(modo or "sin_perdida").strip().lower()
+    if modo not in COMPRESIONES_PDF:
+        raise ValueError(
+            f"❌ Compresión de imágenes desconocida: '{modo}'. Opciones: {', '.join(COMPRESIONES_PDF)}"
+        )
+    return modo
+
+
+def configurar_compresion_pdf(modo):
+    """Fija cómo se incrustan los PNG en los PDFs de este proceso."""
+    global _compresion
+    _compresion = normalizar_compresion_pdf(modo)
+    _imagenes.clear()
+    return _compresion
+
+
+def compresion_pdf():
+    return _compresion
+
+
+def _rgb_sobre_blanco(imagen):
+    """RGB sin canal alfa (las zonas transparentes quedan blancas)."""
+    if imagen.mode not in ("RGBA", "LA", "P"):
+        return imagen.convert("RGB")
+    imagen = imagen.convert("RGBA")
+    fondo = ImagenPIL.new("RGB", imagen.size, "white")
+    fondo.paste(imagen, mask=imagen.getchannel("A"))
+    return fondo
+
+
+def _preparar_imagen(datos, modo):
+    imagen = ImagenPIL.open(io.BytesIO(datos))
+    imagen.load()
+
+    if modo == "sin_perdida":
+        if imagen.mode in ("RGBA", "LA") and imagen.getchannel("A").getextrema()[0] == 255:
+            imagen = imagen.convert(imagen.mode[:-1])   # alfa opaco: sin SMask
+        return ImageReader(imagen)
+
+    imagen = _rgb_sobre_blanco(imagen)
+
+    if modo == "jpeg":
+        salida = io.BytesIO()
+        imagen.save(salida, format="JPEG", quality=CALIDAD_JPEG_PDF, optimize=True)
+        salida.seek(0)
+        return ImageReader(salida)
+
+    return ImageReader(imagen.quantize(
+        256, method=ImagenPIL.Quantize.FASTOCTREE, dither=ImagenPIL.Dither.NONE
+    ).convert("RGB"))
+
+
+def imagen_compartida(buffer):
+    """
+    ImageReader del PNG de `buffer`, preparado según la compresión activa
+    y compartido entre todos los buffers con los mismos bytes.
+    """
+    datos = buffer.getvalue()
+    clave = (hashlib.sha1(datos).digest(), _compresion)
+
+    lector = _imagenes.get(clave)
+    if lector is None:
+        lector = _preparar_imagen(datos, _compresion)
+        _imagenes[clave] = lector
+        if len(_imagenes) > LIMITE_IMAGENES_PDF:
+            _imagenes.popitem(last=False)
+    else:
+        _imagenes.move_to_end(clave)
+    return lector
+
+
+class _ImagenPDF(Image):
+    """`Image` sobre un ImageReader ya abierto (el de `imagen_compartida`)."""
+
+    def __init__(self, lector, width, height):
+        self.hAlign = "CENTER"
+        self._mask = "auto"
+        self._drawing = None
+        self._file = None
+        self._dpi = False
+        self._img = lector
+        self.filename = repr(lector)
+        self._setup(width, height, "direct", 0)
+
+
+def es_svg(buffer):
+    inicio = buffer.getvalue()[:256].lstrip()
+    return inicio.startswith(b"<?xml") or inicio.startswith(b"<svg")
+
+
+def imagen_pdf(buffer, width, height=None):
+    """
+    Flowable de ReportLab para un gráfico de `guardar_figura`: Drawing
+    vectorial si es SVG, `Image` si es PNG. Se escala a `width` × `height`
+    igual que `Image` (sin conservar proporción); sin `height` se conserva
+    la proporción de la figura. Los PNG pasan por `imagen_compartida`.
+    """
+    if svg2rlg is not None and es_svg(buffer):
+        buffer.seek(0)
+        dibujo = svg2rlg(buffer)
+        buffer.seek(0)
+        if dibujo is not None and dibujo.width and dibujo.height:
+            if height is None:
+                height = width * dibujo.height / dibujo.width
+            dibujo.scale(width / dibujo.width, height / dibujo.height)
+            dibujo.width, dibujo.height = width, height
+            return dibujo
+
+    lector = imagen_compartida(buffer)
+    if height is None:
+        ancho, alto = lector.getSize()
+        height = width * alto / ancho
+
+    return _ImagenPDF(lector, width, height)
@@ -0,0 +1,215 @@
+import io
+import os
+import json
+import hashlib
+import zipfile
+import tempfile
+from datetime import datetime
+from contextlib import contextmanager
+
+from scripts.comun.progreso import registrar_bytes
+
+
+# ============================================================
+# 💾 Destino en carpeta con escritura atómica
+# ============================================================
+def _umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# `mkstemp` crea el temporal con 0600 y `os.replace` conserva ese modo:
+# se le dan los permisos que tendría un `open()` normal (0666 - umask)
+_PERMISOS_ARCHIVO = 0o666 & ~_umask()
+
+
+def _temporal_junto_a(ruta_final):
+    """Temporal oculto en la carpeta de `ruta_final`: (fd, ruta)."""
+    fd, ruta_tmp = tempfile.mkstemp(
+        dir=os.path.dirname(ruta_final) or ".",
+        prefix=f".{os.path.basename(ruta_final)}.",
+        suffix=".tmp"
+    )
+    os.chmod(ruta_tmp, _PERMISOS_ARCHIVO)
+    return fd, ruta_tmp
+
+
+class DestinoCarpeta:
+    """
+    Escribe cada artefacto en un archivo temporal dentro de la misma carpeta
+    y lo renombra atómicamente al terminar.
+
+    Si el proceso muere a mitad de una escritura, el archivo final nunca
+    queda truncado: solo puede quedar un temporal oculto (".*.tmp"), que se
+    elimina con `limpiar_temporales()`.
+    """
+
+    def __init__(self, ruta_base):
+        self.ruta_base = ruta_base
+        os.makedirs(ruta_base, exist_ok=True)
+
+    def ruta(self, relativa):
+        """Ruta absoluta del artefacto `relativa` dentro del destino."""
+        return os.path.join(self.ruta_base, relativa)
+
+    def existe(self, relativa):
+        return os.path.isfile(self.ruta(relativa))
+
+    @contextmanager
+    def abrir(self, relativa):
+        """
+        Abre un archivo binario para escribir `relativa`.
+        El archivo final solo aparece si el bloque termina sin errores.
+        """
+        ruta_final = self.ruta(relativa)
+        carpeta = os.path.dirname(ruta_final)
+        os.makedirs(carpeta, exist_ok=True)
+
+        fd, ruta_tmp = _temporal_junto_a(ruta_final)
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                yield f
+                f.flush()
+                os.fsync(f.fileno())
+                escritos = f.tell()
+            os.replace(ruta_tmp, ruta_final)
+            registrar_bytes(escritos)
+        except BaseException:
+            try:
+                os.remove(ruta_tmp)
+            except OSError:
+                pass
+            raise
+
+    def limpiar_temporales(self):
+        """Elimina temporales huérfanos de una ejecución interrumpida."""
+        eliminados = 0
+        for raiz, _, archivos in os.walk(self.ruta_base):
+            for nombre in archivos:
+                if nombre.startswith(".") and nombre.endswith(".tmp"):
+                    try:
+                        os.remove(os.path.join(raiz, nombre))
+                        eliminados += 1
+                    except OSError:
+                        pass
+        return eliminados
+
+
+# ============================================================
+# 🗜 Destino en un único ZIP (sin archivos intermedios)
+# ============================================================
+NOMBRE_INDICE_ZIP = "indice.json"
+
+# Formatos que ya vienen comprimidos: se guardan sin volver a comprimir
+_EXT_SIN_COMPRESION = (".xlsx", ".parquet", ".feather", ".png", ".jpg", ".jpeg", ".zip")
+
+
+class DestinoZip:
+    """
+    Misma interfaz que `DestinoCarpeta`, pero cada artefacto se agrega a un
+    único archivo ZIP apenas termina de generarse.
+
+    Cada artefacto se arma en memoria y entra al ZIP solo si su bloque
+    termina sin errores. El ZIP se construye sobre un temporal oculto junto
+    a `ruta_zip` y aparece con su nombre final en `cerrar()`, que además
+    agrega "indice.json" con el contenido (tamaño y SHA-256 por archivo).
+    """
+
+    def __init__(self, ruta_zip, parametros=None):
+        self.ruta_zip = ruta_zip
+        self.ruta_base = ruta_zip
+        self.parametros = parametros or {}
+        self.entradas = {}
+
+        carpeta = os.path.dirname(ruta_zip) or "."
+        os.makedirs(carpeta, exist_ok=True)
+
+        fd, self._ruta_tmp = _temporal_junto_a(ruta_zip)
+        self._archivo = os.fdopen(fd, "w+b")
+        self._zip = zipfile.ZipFile(self._archivo, "w", allowZip64=True)
+
+    @staticmethod
+    def _nombre(relativa):
+        return relativa.replace(os.sep, "/").lstrip("/")
+
+    def ruta(self, relativa):
+        """Ruta "visible" del artefacto (ZIP + nombre interno), usada en los logs."""
+        return f"{self.ruta_zip}/{self._nombre(relativa)}"
+
+    def existe(self, relativa):
+        return self._nombre(relativa) in self.entradas
+
+    @contextmanager
+    def abrir(self, relativa):
+        """
+        Entrega un buffer binario para escribir `relativa`.
+        Al cerrar el bloque sin errores, el contenido se agrega al ZIP.
+        """
+        if self._zip is None:
+            raise ValueError(f"❌ El ZIP ya fue cerrado: {self.ruta_zip}")
+
+        nombre = self._nombre(relativa)
+        buffer = io.BytesIO()
+        yield buffer
+
+        datos = buffer.getvalue()
+        info = zipfile.ZipInfo(nombre, date_time=datetime.now().timetuple()[:6])
+        info.compress_type = (
+            zipfile.ZIP_STORED if nombre.lower().endswith(_EXT_SIN_COMPRESION)
+            else zipfile.ZIP_DEFLATED
+        )
+        self._zip.writestr(info, datos)
+
+        self.entradas[nombre] = {
+            "archivo": nombre,
+            "bytes": len(datos),
+            "sha256": hashlib.sha256(datos).hexdigest()
+        }
+        registrar_bytes(len(datos))
+
+    def limpiar_temporales(self):
+        # El ZIP nunca deja temporales propios dentro del archivo
+        return 0
+
+    def cerrar(self, descartar=False):
+        """
+        Escribe el índice y publica el ZIP en `ruta_zip`.
+        Con `descartar=True` (error en la ejecución) elimina el temporal.
+        """
+        if self._zip is None:
+            return None
+
+        zip_salida, self._zip = self._zip, None
+        try:
+            if not descartar:
+                indice = {
+                    "generado": datetime.now().isoformat(timespec="seconds"),
+                    "parametros": self.parametros,
+                    "archivos": list(self.entradas.values())
+                }
+                zip_salida.writestr(
+                    NOMBRE_INDICE_ZIP,
+                    json.dumps(indice, ensure_ascii=False, indent=2, default=str),
+                    compress_type=zipfile.ZIP_DEFLATED
+                )
+            zip_salida.close()
+            self._archivo.flush()
+            os.fsync(self._archivo.fileno())
+        except BaseException:
+            descartar = True
+            raise
+        finally:
+            self._archivo.close()
+            if descartar:
+                try:
+                    os.remove(self._ruta_tmp)
+                except OSError:
+                    pass
+
+        if descartar:
+            return None
+
+        os.replace(self._ruta_tmp, self.ruta_zip)
+        return self.ruta_zip
@@ -0,0 +1,94 @@
+from dataclasses import dataclass, field
+from typing import Callable
+
+
+# ============================================================
+# 🧩 Registro de secciones de los informes PDF
+# ============================================================
+# Cada módulo de gráficos declara sus secciones en un dict
+# {nombre: Seccion} y sus tipos de informe en {tipo: (nombres, ...)}.
+# Al generar, solo se calcula lo que piden las secciones del informe:
+# los conteos (`medidas`), los trabajos del pool (`graficos`) y los datos
+# livianos que viajan al armado del PDF (`datos`).
+#
+# Las funciones de `graficos` y `datos` reciben la partición como dict
+# {"dependencia", "subdependencia", "dataset", ...} y corren en el proceso
+# principal. Las de `graficos` envían al pool solo lo que lee el gráfico
+# (conteos, estadísticas o las columnas que usa), nunca el dataset
+# completo de la partición; `dibujar` recibe los "insumos" (partición sin el dataset +
+# resultados de `graficos` y `datos`) y puede correr en el pool: allí se
+# busca por nombre en el registro, que debe estar a nivel de módulo.
+@dataclass(frozen=True)
+class Seccion:
+    """
+    - titulo:   nombre visible (menús, logs)
+    - dibujar:  insumos → ([flowables], [avisos])
+    - medidas:  grupos de conteos que necesita (ver p. ej. `medir_iniciativas`)
+    - graficos: {clave: particion → Future} que se encolan en el pool
+    - datos:    {clave: particion → valor} calculados en el proceso principal
+    """
+    titulo: str
+    dibujar: Callable
+    medidas: tuple = ()
+    graficos: dict = field(default_factory=dict)
+    datos: dict = field(default_factory=dict)
+
+
+def resolver_secciones(registro, informes, informe="completo"):
+    """
+    Nombres de las secciones a generar, en orden. `informe` es un tipo de
+    `informes`, o bien una lista (o string "a,b") de nombres de `registro`.
+    """
+    if isinstance(informe, str) and informe.strip().lower() in informes:
+        return tuple(informes[informe.strip().lower()])
+
+    nombres = informe.split(",") if isinstance(informe, str) else list(informe or ())
+    resultado = []
+    for nombre in nombres:
+        nombre = str(nombre).strip().lower()
+        if not nombre:
+            continue
+        if nombre not in registro:
+            raise ValueError(
+                f"❌ Sección o tipo de informe desconocido: '{nombre}'. "
+                f"Tipos: {', '.join(informes)} · Secciones: {', '.join(registro)}"
+            )
+        if nombre not in resultado:
+            resultado.append(nombre)
+
+    if not resultado:
+        raise ValueError("❌ El informe no tiene secciones.")
+    return tuple(resultado)
+
+
+def medidas_requeridas(registro, secciones):
+    """Unión de los grupos de conteos que necesitan `secciones`."""
+    return {medida for nombre in secciones for medida in registro[nombre].medidas}
+
+
+def encolar_graficos(registro, secciones, particion):
+    """Envía al pool los gráficos de `secciones` para `particion`: {clave: Future}."""
+    return {
+        clave: lanzar(particion)
+        for nombre in secciones
+        for clave, lanzar in registro[nombre].graficos.items()
+    }
+
+
+def preparar_datos(registro, secciones, particion):
+    """Datos livianos (no gráficos) de `secciones` para `particion`: {clave: valor}."""
+    return {
+        clave: preparar(particion)
+        for nombre in secciones
+        for clave, preparar in registro[nombre].datos.items()
+    }
+
+
+def dibujar_secciones(registro, secciones, insumos):
+    """Flowables y avisos de `secciones`, en orden: ([flowables], [avisos])."""
+    story, avisos = [], []
+    for nombre in secciones:
+        flowables, logs = registro[nombre].dibujar(insumos)
+        story.extend(flowables)
+        avisos.extend(logs)
+    return story, avisos
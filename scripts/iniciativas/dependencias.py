@@ -1,6 +1,12 @@
-import os
 import pandas as pd
 
+from scripts.comun.salida import DestinoCarpeta
+from scripts.comun.progreso import recorrer
+from scripts.comun.excel import normalizar_perfil_excel, escribir_hoja_excel, escribir_resumen_estados
+from scripts.comun.formatos import (
+    normalizar_formatos, formatos_columnares, columnas_particiones, escribir_particion
+)
+
 def obtener_dependencias_vform(df: pd.DataFrame, col_index: int = 13):
     """
     Devuelve una lista de dependencias encontradas en el DataFrame,
@@ -86,7 +92,8 @@ def dividir_dependencias_vform(df: pd.DataFrame, col_dependencia: str = "Unidad
 
 
 
-def exportar_dependencias_vform(dfs1, df2, ruta_salida, seleccionadas=None):
+def exportar_dependencias_vform(dfs1, df2, ruta_salida, seleccionadas=None, bitacora=None, formatos=None,
+                                perfil_excel="clasico", destino=None):
     """
     Exporta UN SOLO EXCEL por dependencia con las hojas:
 
@@ -96,12 +103,25 @@ def exportar_dependencias_vform(dfs1, df2, ruta_salida, seleccionadas=None):
     - "Sintesis Evaluativa (ESTADO)"        → df2 por estado
 
     Guarda los archivos directamente en `ruta_salida` sin crear carpetas.
+    Cada archivo se escribe de forma atómica; con `bitacora`, las dependencias
+    ya registradas en la etapa "excel" no se reescriben.
+
+    `formatos` agrega o reemplaza el Excel por Parquet/Feather/CSV en
+    `<formato>/<dataset>/dependencia=<dep>/part-0.<ext>`.
+
+    `perfil_excel="tabla"` escribe cada dataset una sola vez como Tabla de
+    Excel y reemplaza las hojas por Estado por una hoja "Resumen Estado".
+
+    `destino` (p. ej. `DestinoZip`) reemplaza la carpeta `ruta_salida`.
 
     Retorna:
         dict_df2_filtrados = { dependencia : df2_filtrado }
     """
 
-    os.makedirs(ruta_salida, exist_ok=True)
+    destino = destino if destino is not None else DestinoCarpeta(ruta_salida)
+    formatos = normalizar_formatos(formatos)
+    columnares = formatos_columnares(formatos)
+    perfil_excel = normalizar_perfil_excel(perfil_excel)
 
     # Filtrar dependencias seleccionadas
     if seleccionadas is not None:
@@ -121,10 +141,17 @@ def exportar_dependencias_vform(dfs1, df2, ruta_salida, seleccionadas=None):
     logs = []
     dict_df2_filtrados = {}
 
+    # Esquema común para que todas las particiones columnares coincidan
+    columnas_df1 = columnas_particiones(dfs1) if columnares else None
+
+    if bitacora is not None and destino.limpiar_temporales():
+        logs.append("🧹 Temporales de una ejecución interrumpida eliminados.")
+
     # ======================================================
     # 🔁 PROCESAR CADA DEPENDENCIA
     # ======================================================
-    for dependencia, df1_dep in dfs1.items():
+    for dependencia, df1_dep in recorrer(dfs1.items(), "excel", filas=lambda par: len(par[1]),
+                                         detalle=lambda par: par[0]):
 
         dep_sanit = sanitizar(dependencia)
 
@@ -145,24 +172,52 @@ def exportar_dependencias_vform(dfs1, df2, ruta_salida, seleccionadas=None):
         # -------------------------------------------------------
         # 2️⃣ Crear EXCEL único con todas las hojas
         # -------------------------------------------------------
-        archivo_excel = os.path.join(ruta_salida, f"{dep_sanit}.xlsx")
+        archivo_excel = destino.ruta(f"{dep_sanit}.xlsx")
+
+        if bitacora is not None and bitacora.completada("excel", dependencia):
+            logs.append(f"⏭ Ya exportada: {archivo_excel}")
+            continue
+
+        # -------------------------------------------------------
+        # 🧱 Formatos columnares (particionados)
+        # -------------------------------------------------------
+        for formato in columnares:
+            escribir_particion(destino, formato, "iniciativas", df1_dep,
+                               dependencia, columnas=columnas_df1)
+            escribir_particion(destino, formato, "sintesis_evaluativa", df2_dep,
+                               dependencia, columnas=list(df2.columns))
 
-        with pd.ExcelWriter(archivo_excel, engine="openpyxl") as writer:
+        if "xlsx" not in formatos:
+            if bitacora is not None:
+                bitacora.registrar("excel", dependencia)
+            logs.append(f"📁 Particiones generadas: {', '.join(columnares)}")
+            continue
+
+        with destino.abrir(f"{dep_sanit}.xlsx") as f, pd.ExcelWriter(f, engine="openpyxl") as writer:
 
             # ---------------------------
             # 🟦 HOJA PRINCIPAL df1
             # ---------------------------
-            df1_dep.to_excel(writer, sheet_name="Iniciativas", index=False)
+            escribir_hoja_excel(writer, df1_dep, "Iniciativas", perfil_excel)
 
             # ---------------------------
             # 🟩 HOJA PRINCIPAL df2
             # ---------------------------
-            df2_dep.to_excel(writer, sheet_name="Sintesis Evaluativa", index=False)
+            escribir_hoja_excel(writer, df2_dep, "Sintesis Evaluativa", perfil_excel)
+
+            # ---------------------------
+            # 📊 Perfil tabla: conteos por Estado
+            # ---------------------------
+            if perfil_excel == "tabla":
+                escribir_resumen_estados(writer, {
+                    "Iniciativas": df1_dep,
+                    "Sintesis Evaluativa": df2_dep
+                })
 
             # ---------------------------
             # 🟦 Hojas por estado df1
             # ---------------------------
-            if "Estado" in df1_dep.columns:
+            if perfil_excel == "clasico" and "Estado" in df1_dep.columns:
                 for estado in df1_dep["Estado"].dropna().unique():
                     df_estado = df1_dep[df1_dep["Estado"] == estado]
                     hoja = f"Iniciativas ({sanitizar(str(estado))})"
@@ -171,14 +226,20 @@ def exportar_dependencias_vform(dfs1, df2, ruta_salida, seleccionadas=None):
             # ---------------------------
             # 🟩 Hojas por estado df2
             # ---------------------------
-            if "Estado" in df2_dep.columns:
+            if perfil_excel == "clasico" and "Estado" in df2_dep.columns:
                 for estado in df2_dep["Estado"].dropna().unique():
                     df2_estado = df2_dep[df2_dep["Estado"] == estado]
                     hoja = f"Sintesis Evaluativa ({sanitizar(str(estado))})"
                     df2_estado.to_excel(writer, sheet_name=hoja[:31], index=False)
 
+        if bitacora is not None:
+            bitacora.registrar("excel", dependencia)
+
         logs.append(f"📁 Archivo generado: {archivo_excel}")
 
+    if bitacora is not None:
+        bitacora.finalizar("excel")
+
     logs.append("\n✅ Exportación completa (Dependencias VcM).")
 
     # Mostrar logs
@@ -0,0 +1,251 @@
+from dataclasses import dataclass, field
+import re
+
+import pandas as pd
+
+from scripts.comun.cubo import NIVELES, acumular, conteo_medida
+
+
+# ============================================================
+# 📌 Columnas usadas por los gráficos de Iniciativas VcM
+# ============================================================
+COL_ESTADO = "Estado"
+COL_SEDE = "Sede"
+COL_MODALIDAD = "Modalidad de Implementación de la Iniciativa"
+COL_ALCANCE = "Alcance Territorial de la Iniciativa"
+
+COLUMNAS_TIPOS = [
+    "¿La iniciativa está orientada a formación académica? (Vinculación Académica - VA)",
+    "¿La iniciativa implica la difusión y/o intercambio de conocimiento? (Articulación e Intercambio de Conocimiento - AIC)",
+    "¿La iniciativa es una actividad cultural o artística? (Vinculación Artístico-Cultural - VAC)",
+    "¿La iniciativa incluye investigación básica, aplicada o emprendimiento? (Investigación, Proyectos de Emprendimiento y Estudios - IPEE)",
+    "¿La iniciativa implica alianzas internacionales? (Internacionalización - INT)",
+    "¿La iniciativa está orientada a graduados/titulados y/o empleadores? (Graduados/Titulados, Empleabilidad y Redes - GTER)"
+]
+
+
+def etiqueta_tipo(columna):
+    """Sigla entre paréntesis de una columna de tipo (p. ej. "Vinculación Académica - VA")."""
+    match = re.search(r"\((.*?)\)", columna)
+    return match.group(1).strip() if match else columna
+
+
+# ============================================================
+# 📊 Estadísticas de una partición
+# ============================================================
+@dataclass
+class EstadisticasIniciativas:
+    """
+    Conteos de una partición que necesitan el resumen y los gráficos.
+
+    Todos los campos son conteos (enteros o Series/DataFrames de conteos),
+    así que las estadísticas de varias particiones se combinan sumando.
+    `None` indica que la columna requerida no existe en la partición.
+
+    - total:      filas de la partición
+    - estados:    filas por Estado (valor original)
+    - sedes:      filas por Sede
+    - enviadas:   filas con Estado = "Enviada" (sin distinguir mayúsculas/espacios)
+    - tipos:      por tipo de iniciativa (solo enviadas): columnas si / no / total
+    - modalidad:  enviadas por Modalidad de Implementación ("Sin dato" si vacío)
+    - alcance:    enviadas por Alcance Territorial ("Sin dato" si vacío)
+    """
+    total: int = 0
+    estados: pd.Series = field(default_factory=lambda: pd.Series(dtype="int64"))
+    sedes: pd.Series = field(default_factory=lambda: pd.Series(dtype="int64"))
+    enviadas: int = 0
+    tipos: pd.DataFrame = None
+    modalidad: pd.Series = None
+    alcance: pd.Series = None
+
+
+# Grupos de conteos que puede pedir una sección del informe (`grupos`):
+# - resumen:   estados y sedes (tarjetas)
+# - tipos:     Sí / No por tipo de iniciativa
+# - modalidad: enviadas por Modalidad de Implementación
+# - alcance:   enviadas por Alcance Territorial
+# `total` y `enviadas` se cuentan siempre. `grupos=None` = todos.
+GRUPOS_MEDIDAS = ("resumen", "tipos", "modalidad", "alcance")
+
+
+def _grupos(grupos):
+    return set(GRUPOS_MEDIDAS) if grupos is None else set(grupos)
+
+
+def _conteo_enviadas(df, mascara, columna):
+    """Conteo de `columna` entre las enviadas, con el mismo criterio que los gráficos."""
+    if columna not in df.columns:
+        return None
+    return (
+        df.loc[mascara, columna]
+        .astype(str)
+        .str.strip()
+        .replace("", "Sin dato")
+        .value_counts()
+    )
+
+
+def calcular_estadisticas(df, col_estado=COL_ESTADO, col_sede=COL_SEDE, grupos=None):
+    """
+    Calcula en una sola pasada vectorizada los conteos de la partición
+    `df` (ver `EstadisticasIniciativas`), solo de los `grupos` pedidos
+    (ver GRUPOS_MEDIDAS). El Estado se normaliza una vez y la máscara de
+    "Enviada" se reutiliza para tipos, modalidad y alcance.
+    """
+    grupos = _grupos(grupos)
+    stats = EstadisticasIniciativas(total=len(df))
+
+    if "resumen" in grupos and col_sede in df.columns:
+        stats.sedes = df[col_sede].dropna().astype(str).value_counts()
+
+    if col_estado not in df.columns:
+        return stats
+
+    estado = df[col_estado]
+    if "resumen" in grupos:
+        stats.estados = estado.dropna().astype(str).value_counts()
+
+    enviada = estado.astype(str).str.strip().str.lower() == "enviada"
+    stats.enviadas = int(enviada.sum())
+
+    # --- Tipos de iniciativa: Sí / No / respondidas ---
+    columnas = [c for c in COLUMNAS_TIPOS if c in df.columns] if "tipos" in grupos else []
+    if columnas:
+        respuestas = df.loc[enviada, columnas]
+        texto = respuestas.astype(str).apply(lambda s: s.str.lower())
+        stats.tipos = pd.DataFrame({
+            "si": (texto == "sí").sum(),
+            "no": (texto == "no").sum(),
+            "total": respuestas.count()
+        }).rename(index=etiqueta_tipo)
+
+    if "modalidad" in grupos:
+        stats.modalidad = _conteo_enviadas(df, enviada, COL_MODALIDAD)
+    if "alcance" in grupos:
+        stats.alcance = _conteo_enviadas(df, enviada, COL_ALCANCE)
+
+    return stats
+
+
+def como_estadisticas(dataset):
+    """Acepta `EstadisticasIniciativas` o un DataFrame (y lo resume)."""
+    if isinstance(dataset, EstadisticasIniciativas):
+        return dataset
+    return calcular_estadisticas(dataset)
+
+
+# ============================================================
+# 🧊 Medidas para el cubo (scripts.comun.cubo)
+# ============================================================
+def _serie_constante(valor, indice):
+    return pd.Series(valor, index=indice, dtype=object)
+
+
+def _normalizar_enviadas(df, mascara, columna):
+    return (
+        df.loc[mascara, columna]
+        .astype(str)
+        .str.strip()
+        .replace("", "Sin dato")
+    )
+
+
+def medir_iniciativas(df, col_estado=COL_ESTADO, col_sede=COL_SEDE, grupos=None):
+    """
+    Medidas de `EstadisticasIniciativas` en formato [(medida, valores)]
+    para `construir_cubo`: cada elemento de `valores` cuenta 1.
+    Mismos criterios (y `grupos`) que `calcular_estadisticas`.
+    """
+    grupos = _grupos(grupos)
+    medidas = [("total", _serie_constante("Total", df.index))]
+
+    if "resumen" in grupos and col_sede in df.columns:
+        medidas.append(("sede", df[col_sede].dropna().astype(str)))
+
+    if col_estado not in df.columns:
+        return medidas
+
+    estado = df[col_estado]
+    if "resumen" in grupos:
+        medidas.append(("estado", estado.dropna().astype(str)))
+
+    enviada = estado.astype(str).str.strip().str.lower() == "enviada"
+    medidas.append(("enviadas", _serie_constante("Enviadas", df.index[enviada])))
+
+    # --- Tipos: una Serie por medida con la sigla repetida por fila ---
+    si, no, respondidas = [], [], []
+    for columna in COLUMNAS_TIPOS:
+        if "tipos" not in grupos or columna not in df.columns:
+            continue
+        etiqueta = etiqueta_tipo(columna)
+        respuestas = df.loc[enviada, columna]
+        texto = respuestas.astype(str).str.lower()
+        si.append(_serie_constante(etiqueta, respuestas.index[texto == "sí"]))
+        no.append(_serie_constante(etiqueta, respuestas.index[texto == "no"]))
+        respondidas.append(_serie_constante(etiqueta, respuestas.index[respuestas.notna()]))
+
+    for medida, partes in (("tipo_si", si), ("tipo_no", no), ("tipo_total", respondidas)):
+        if partes:
+            medidas.append((medida, pd.concat(partes)))
+
+    if "modalidad" in grupos and COL_MODALIDAD in df.columns:
+        medidas.append(("modalidad", _normalizar_enviadas(df, enviada, COL_MODALIDAD)))
+    if "alcance" in grupos and COL_ALCANCE in df.columns:
+        medidas.append(("alcance", _normalizar_enviadas(df, enviada, COL_ALCANCE)))
+
+    return medidas
+
+
+def estadisticas_desde_cubo(cubo):
+    """
+    Reconstruye `EstadisticasIniciativas` sumando las filas de `cubo`
+    (ya filtrado a una partición, una dependencia o toda la institución).
+    """
+    def _conteo(medida):
+        return conteo_medida(cubo, medida)
+
+    def _escalar(medida):
+        conteo = conteo_medida(cubo, medida)
+        return int(conteo.sum()) if conteo is not None else 0
+
+    stats = EstadisticasIniciativas(total=_escalar("total"), enviadas=_escalar("enviadas"))
+
+    for campo, medida in (("estados", "estado"), ("sedes", "sede")):
+        conteo = _conteo(medida)
+        if conteo is not None:
+            setattr(stats, campo, conteo)
+
+    tipos = {col: _conteo(f"tipo_{col}") for col in ("si", "no", "total")}
+    if tipos["total"] is not None:
+        etiquetas = [e for e in map(etiqueta_tipo, COLUMNAS_TIPOS) if e in tipos["total"].index]
+        stats.tipos = pd.DataFrame({
+            col: (conteo if conteo is not None else pd.Series(dtype="int64"))
+            .reindex(etiquetas, fill_value=0).astype("int64")
+            for col, conteo in tipos.items()
+        })
+
+    stats.modalidad = _conteo("modalidad")
+    stats.alcance = _conteo("alcance")
+
+    return stats
+
+
+def estadisticas_por_nivel(cubo, nivel="dependencia"):
+    """
+    Estadísticas de cada grupo de `nivel` a partir del cubo, sin releer filas:
+
+    - "subdependencia" → {(dependencia, subdependencia): stats}
+    - "dependencia"    → {dependencia: stats}
+    - "institucion"    → stats del total
+    """
+    acumulado = acumular(cubo, nivel)
+    claves = NIVELES[nivel]
+
+    if not claves:
+        return estadisticas_desde_cubo(acumulado)
+
+    por_clave = claves if len(claves) > 1 else claves[0]
+    return {
+        clave: estadisticas_desde_cubo(grupo)
+        for clave, grupo in acumulado.groupby(por_clave, sort=False)
+    }
@@ -1,144 +1,65 @@
-import os
 import io
-import re
+import time
+from functools import partial
 import pandas as pd
 import numpy as np
-import matplotlib.patches as patches
 import matplotlib.pyplot as plt
 
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
-)
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_LEFT, TA_CENTER
+
+from scripts.comun.salida import DestinoCarpeta
+from scripts.comun.cache_graficos import render_cacheado
+from scripts.comun.render import guardar_figura, imagen_pdf, configurar_perfil_render, configurar_compresion_pdf
+from scripts.comun.gantt import paginas_gantt, FILAS_POR_PAGINA_GANTT
+from scripts.comun.flowables import TarjetasResumen, tabla_larga
+from scripts.comun.pool_graficos import enviar, en_serie, en_ventana, en_orden
+from scripts.comun.progreso import recorrer
+from scripts.comun.informe import ESTILOS, OPCIONES_PDF, construir_informe
+from scripts.comun.secciones import (
+    Seccion, resolver_secciones, medidas_requeridas, encolar_graficos, preparar_datos, dibujar_secciones
+)
+from scripts.comun.cubo import construir_cubo
+from scripts.iniciativas.estadisticas import (
+    EstadisticasIniciativas, calcular_estadisticas, como_estadisticas,
+    medir_iniciativas, estadisticas_por_nivel
+)
 
 
-def resumen_iniciativas(
-    dataset,
-    dependencia=None,
-    subdependencia=None,
-    col_estado="Estado",
-    col_sede="Sede",
+def tarjetas_resumen_iniciativas(
+    stats,
+    width=460,
     color_total="#1f77b4",   # azul
     color_estado="#7ec8e3",  # celeste
     color_sede="#ffdd57",    # amarillo
 ):
     """
-    Genera un resumen visual estilo tarjetas y devuelve un BytesIO con la imagen PNG.
+    Resumen de la partición en tarjetas (total, por Estado y por Sede),
+    como Flowable de ReportLab dibujado directamente en el PDF (sin
+    matplotlib ni imagen). Es el único camino del resumen.
+    `stats` son las `EstadisticasIniciativas` de la partición.
     """
+    tarjetas = [("Total de Registros:", stats.total, color_total)]
+    tarjetas += [(f"Total Estado '{estado}':", cant, color_estado) for estado, cant in stats.estados.items()]
+    tarjetas += [(f"Total Sede '{sede}':", cant, color_sede) for sede, cant in stats.sedes.items()]
+    return TarjetasResumen(tarjetas, width=width)
 
-    # ================================
-    # 🧩 Obtener DataFrame
-    # ================================
-    if isinstance(dataset, pd.DataFrame):
-        df = dataset
-    elif isinstance(dataset, dict):
-        try:
-            if dependencia and subdependencia:
-                df = dataset[dependencia][subdependencia]
-            elif dependencia:
-                df = dataset[dependencia]
-            else:
-                print("⚠ Se requiere dependencia si es dataset jerárquico.")
-                return None
-        except KeyError:
-            print("⚠ Dependencia o subdependencia no encontrada.")
-            return None
-    else:
-        print("⚠ Tipo de dataset no válido.")
-        return None
-
-    # ================================
-    # 🔢 Datos
-    # ================================
-    total_registros = len(df)
-
-    conteo_estados = df[col_estado].dropna().astype(str).value_counts() \
-        if col_estado in df.columns else {}
-
-    conteo_sedes = df[col_sede].dropna().astype(str).value_counts() \
-        if col_sede in df.columns else {}
-
-    # ================================
-    # 🎨 Crear figura
-    # ================================
-    num_items = 1 + len(conteo_estados) + len(conteo_sedes)
-    fig, ax = plt.subplots(figsize=(12, 2 + num_items * 1.5))
-    ax.axis("off")
-
-    y = 1 - 1/(num_items+1)
-    paso = 1/(num_items+1)
-
-    # ================================
-    # 🟦 Función para dibujar tarjeta
-    # ================================
-    def tarjeta(y, color, titulo, valor):
-        rect = patches.FancyBboxPatch(
-            (0.05, y), 0.90, 0.12,
-            boxstyle="round,pad=0.02",
-            edgecolor="black",
-            linewidth=2,
-            facecolor=color
-        )
-        ax.add_patch(rect)
-
-        ax.text(0.07, y + 0.065, titulo,
-                fontsize=15, fontweight="bold",
-                va="center", ha="left")
 
-        inner = patches.Rectangle(
-            (0.60, y + 0.025), 0.20, 0.07,
-            linewidth=3, edgecolor="black",
-            facecolor="#d9d9d9"
-        )
-        ax.add_patch(inner)
-
-        inner2 = patches.Rectangle(
-            (0.598, y + 0.023), 0.204, 0.074,
-            linewidth=1.5, edgecolor="black",
-            facecolor="none"
-        )
-        ax.add_patch(inner2)
+COLUMNAS_GANTT = ("ID", "Fecha de Inicio de la Iniciativa", "Fecha de Término de la Iniciativa")
 
-        ax.text(0.70, y + 0.06, str(valor),
-                fontsize=18, fontweight="bold",
-                va="center", ha="center")
 
-    # ================================
-    # 1️⃣ Total
-    # ================================
-    tarjeta(y, color_total, "Total de Registros:", total_registros)
-    y -= paso
+def columnas_gantt_iniciativas(df):
+    """Solo las columnas que usa el Gantt (ID y fechas): es lo que viaja al pool."""
+    return df[[col for col in COLUMNAS_GANTT if col in df.columns]]
 
-    # 2️⃣ Estados
-    for estado, cant in conteo_estados.items():
-        tarjeta(y, color_estado, f"Total Estado '{estado}':", cant)
-        y -= paso
 
-    # 3️⃣ Sedes
-    for sede, cant in conteo_sedes.items():
-        tarjeta(y, color_sede, f"Total Sede '{sede}':", cant)
-        y -= paso
-
-    plt.tight_layout()
-
-    # ================================
-    # 📤 Exportar como Buffer
-    # ================================
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format="png", dpi=150, bbox_inches="tight")
-    plt.close(fig)
-    buffer.seek(0)
-    return buffer
-
-
-def graficar_gantt_iniciativas(dataset, dependencia=None, subdependencia=None, max_por_grafico=6):
+@render_cacheado(version=2)
+def graficar_gantt_iniciativas(dataset, dependencia=None, subdependencia=None, filas_por_pagina=FILAS_POR_PAGINA_GANTT):
     """
-    Genera gráficos de Gantt en lotes de máximo `max_por_grafico` registros por imagen.
+    Genera el Gantt de las iniciativas en páginas de `filas_por_pagina`
+    registros (ver `scripts.comun.gantt`).
     - Ignora automáticamente cualquier registro sin fechas válidas.
-    - Devuelve una lista de buffers BytesIO (uno por gráfico).
+    - Devuelve una lista de buffers BytesIO (uno por página).
     """
 
     # Identificar dataset correcto
@@ -163,9 +84,7 @@ def graficar_gantt_iniciativas(dataset, dependencia=None, subdependencia=None, m
         return []
 
     # Columnas exactas
-    col_id  = "ID"
-    col_ini = "Fecha de Inicio de la Iniciativa"
-    col_fin = "Fecha de Término de la Iniciativa"
+    col_id, col_ini, col_fin = COLUMNAS_GANTT
 
     for col in [col_id, col_ini, col_fin]:
         if col not in df.columns:
@@ -175,7 +94,7 @@ def graficar_gantt_iniciativas(dataset, dependencia=None, subdependencia=None, m
     # ---------------------------------------------------
     # 🔥 Convertir fechas y eliminar filas sin fechas
     # ---------------------------------------------------
-    df_plot = df.copy()
+    df_plot = df[[col_id, col_ini, col_fin]].copy()
 
     df_plot[col_ini] = pd.to_datetime(df_plot[col_ini], dayfirst=True, errors="coerce")
     df_plot[col_fin] = pd.to_datetime(df_plot[col_fin], dayfirst=True, errors="coerce")
@@ -191,64 +110,26 @@ def graficar_gantt_iniciativas(dataset, dependencia=None, subdependencia=None, m
     df_plot = df_plot.sort_values(col_ini).reset_index(drop=True)
 
     # -----------------------------------------------
-    # 🔥 DIVIDIR EN LOTES DE max_por_grafico FILAS
+    # 🔥 PÁGINAS DE filas_por_pagina FILAS
     # -----------------------------------------------
-    buffers = []
-    total = len(df_plot)
-
-    for i in range(0, total, max_por_grafico):
-
-        df_chunk = df_plot.iloc[i:i + max_por_grafico]
-
-        if df_chunk.empty:
-            continue
-
-        # Datos chunk
-        y_labels = df_chunk[col_id].astype(str).tolist()
-        y_pos = np.arange(len(y_labels))
-        duraciones = (df_chunk[col_fin] - df_chunk[col_ini]).dt.days
-
-        # ---------------------------
-        # 📊 Crear gráfico por chunk
-        # ---------------------------
-        fig, ax = plt.subplots(figsize=(10, 5))
-
-        ax.barh(
-            y=y_pos,
-            width=duraciones,
-            left=df_chunk[col_ini],
-            edgecolor='black'
-        )
-
-        ax.set_yticks(y_pos)
-        ax.set_yticklabels(y_labels)
-
-        ax.set_xlabel("Fecha")
-        ax.set_ylabel("ID de la Iniciativa")
-
-        titulo = f"Gantt de Iniciativas ({i+1}-{min(i+max_por_grafico, total)})"
-        if dependencia:
-            titulo += f" - {dependencia}"
-        if subdependencia:
-            titulo += f" / {subdependencia}"
-
-        ax.set_title(titulo, fontsize=12)
-        ax.grid(True, linestyle="--", alpha=0.5)
-
-        plt.tight_layout()
-
-        # Guardar en buffer
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format="png", dpi=200, bbox_inches="tight")
-        plt.close(fig)
-        buffer.seek(0)
-
-        buffers.append(buffer)
-
-    return buffers
+    titulo = "Gantt de Iniciativas"
+    if dependencia:
+        titulo += f" - {dependencia}"
+    if subdependencia:
+        titulo += f" / {subdependencia}"
+
+    return paginas_gantt(
+        df_plot[col_ini], df_plot[col_fin], df_plot[col_id].astype(str).tolist(),
+        titulo, etiqueta_y="ID de la Iniciativa",
+        filas_por_pagina=filas_por_pagina, dpi=200
+    )
 
-def crear_tabla_resumen_iniciativas(dataset):
-    """Crea una tabla resumen de iniciativas con estilo, numeración y ajuste automático de texto."""
+def datos_tabla_resumen_iniciativas(dataset):
+    """
+    Columnas de la tabla resumen ya formateadas (texto, numeradas y con
+    nombres amigables), o None si no hay ninguna. Es lo único del dataset
+    que necesita el armado del PDF.
+    """
 
     # --- Columnas esperadas y nombres amigables ---
     columnas_originales = {
@@ -282,131 +163,53 @@ def crear_tabla_resumen_iniciativas(dataset):
     # Renombrar columnas
     df_mostrar.rename(columns=columnas_existentes, inplace=True)
 
-    # --- Estilos para texto ---
-    estilo_celda = ParagraphStyle(
-        name='TablaTexto',
-        alignment=TA_LEFT,
-        fontSize=7,
-        leading=8,
-        wordWrap='CJK'
-    )
+    return df_mostrar
 
-    estilo_encabezado = ParagraphStyle(
-        name='Encabezado',
-        alignment=TA_CENTER,
-        fontSize=8,
-        leading=9,
-        textColor=colors.black,
-        wordWrap='CJK'
-    )
 
-    # Convertir filas y encabezados a Paragraph
-    encabezados = [Paragraph(str(col), estilo_encabezado) for col in df_mostrar.columns]
-    filas = [
-        [Paragraph(str(c), estilo_celda) for c in fila]
-        for fila in df_mostrar.values.tolist()
-    ]
+# Proporciones pensadas para las columnas de la tabla resumen
+PROPORCIONES_TABLA_INICIATIVAS = [
+    0.5,   # N°
+    1.0,   # ID
+    2.0,   # Email
+    3.0,   # Iniciativa
+    1.2,   # Estado
+    1.5,   # Sede
+    1.3,   # Fecha Inicio
+    1.3    # Fecha Término
+]
 
-    tabla_datos = [encabezados] + filas
-
-    # Crear tabla
-    tabla = Table(tabla_datos, repeatRows=1)
-
-    # Estilos visuales
-    tabla_estilo = TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('GRID', (0, 0), (-1, -1), 0.25, colors.gray),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.lightgrey]),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('LEFTPADDING', (0, 0), (-1, -1), 3),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-    ])
-    tabla.setStyle(tabla_estilo)
-
-    # --- Ajuste de anchos de columna ---
-    total_ancho = 500  # ancho útil de página
-    # Proporciones pensadas para estas columnas
-    col_proporciones = [
-        0.5,   # N°
-        1.0,   # ID
-        2.0,   # Email
-        3.0,   # Iniciativa
-        1.2,   # Estado
-        1.5,   # Sede
-        1.3,   # Fecha Inicio
-        1.3    # Fecha Término
-    ]
 
-    # Ajustar solo las columnas que existen
-    ncols = len(df_mostrar.columns)
-    proporciones_uso = col_proporciones[:ncols]
-    suma = sum(proporciones_uso) if proporciones_uso else 1
-    col_widths = [
-        total_ancho * (p / suma)
-        for p in proporciones_uso
-    ]
-
-    tabla._argW = col_widths
-
-    return tabla
+def crear_tabla_resumen_iniciativas(dataset):
+    """Crea una tabla resumen de iniciativas (LongTable) con estilo, numeración y ajuste automático de texto."""
+    df_mostrar = datos_tabla_resumen_iniciativas(dataset)
+    if df_mostrar is None:
+        return None
+    return tabla_larga(df_mostrar, PROPORCIONES_TABLA_INICIATIVAS)
 
+@render_cacheado(version=1)
 def graficar_porcentajes_tipos_iniciativa(dataset):
     """
     Genera un gráfico de barras horizontal con % Sí / No para cada tipo de iniciativa.
     Filtra solo las iniciativas con Estado = 'Enviada'.
+    `dataset`: DataFrame de la partición o sus `EstadisticasIniciativas`.
     Devuelve un buffer BytesIO con un PNG.
     """
 
-    # --- Columnas de interés ---
-    columnas = [
-        "¿La iniciativa está orientada a formación académica? (Vinculación Académica - VA)",
-        "¿La iniciativa implica la difusión y/o intercambio de conocimiento? (Articulación e Intercambio de Conocimiento - AIC)",
-        "¿La iniciativa es una actividad cultural o artística? (Vinculación Artístico-Cultural - VAC)",
-        "¿La iniciativa incluye investigación básica, aplicada o emprendimiento? (Investigación, Proyectos de Emprendimiento y Estudios - IPEE)",
-        "¿La iniciativa implica alianzas internacionales? (Internacionalización - INT)",
-        "¿La iniciativa está orientada a graduados/titulados y/o empleadores? (Graduados/Titulados, Empleabilidad y Redes - GTER)"
-    ]
-
-    # --- Filtrar solo Estado = Enviada ---
-    df = dataset.copy()
-    df = df[df["Estado"].astype(str).str.strip().str.lower() == "enviada"]
+    stats = como_estadisticas(dataset)
 
-    if df.empty:
+    if stats.enviadas == 0:
         print("⚠ No hay iniciativas con Estado = 'Enviada'.")
         return None
 
-    # --- Preparar cálculos ---
-    etiquetas = []
-    porcentajes_si = []
-    porcentajes_no = []
-    cantidades_si = []
-    cantidades_no = []
-
-    for col in columnas:
-        if col not in df.columns:
-            continue
-
-        total = df[col].count()
-        si = (df[col].astype(str).str.lower() == "sí").sum()
-        no = (df[col].astype(str).str.lower() == "no").sum()
-
-        if total == 0:
-            continue
-
-        match = re.search(r"\((.*?)\)", col)
-        etiqueta = match.group(1).strip() if match else col
-
-        etiquetas.append(etiqueta)
-        cantidades_si.append(si)
-        cantidades_no.append(no)
+    # --- Preparar cálculos (conteos ya agregados) ---
+    tipos = stats.tipos if stats.tipos is not None else pd.DataFrame(columns=["si", "no", "total"])
+    tipos = tipos[tipos["total"] > 0]
 
-        porcentajes_si.append((si / total) * 100)
-        porcentajes_no.append((no / total) * 100)
+    etiquetas = tipos.index.tolist()
+    cantidades_si = tipos["si"].tolist()
+    cantidades_no = tipos["no"].tolist()
+    porcentajes_si = (tipos["si"] / tipos["total"] * 100).tolist()
+    porcentajes_no = (tipos["no"] / tipos["total"] * 100).tolist()
 
     # --- Crear gráfico ---
     fig, ax = plt.subplots(figsize=(14, 7))
@@ -444,44 +247,32 @@ def graficar_porcentajes_tipos_iniciativa(dataset):
     plt.tight_layout()
 
     # --- Guardar a buffer ---
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format="png", dpi=200, bbox_inches="tight")
-    plt.close(fig)
-    buffer.seek(0)
+    buffer = guardar_figura(fig, dpi=200)
 
     return buffer
 
+@render_cacheado(version=1)
 def graficar_modalidades_cantidad(dataset):
     """
     Genera un gráfico de barras horizontal mostrando la cantidad de iniciativas
     por modalidad (columna 'Modalidad de Implementación de la Iniciativa'),
     filtrando solo las iniciativas con Estado = 'Enviada'.
+    `dataset`: DataFrame de la partición o sus `EstadisticasIniciativas`.
     Devuelve un buffer BytesIO con el PNG del gráfico.
     """
 
+    stats = como_estadisticas(dataset)
+
     # Validaciones
-    if "Estado" not in dataset.columns or "Modalidad de Implementación de la Iniciativa" not in dataset.columns:
+    if stats.modalidad is None:
         print("⚠ Columnas requeridas no encontradas.")
         return None
 
-    # --- Filtrar Estado = Enviada ---
-    df = dataset.copy()
-    df["Estado"] = df["Estado"].astype(str).str.strip().str.lower()
-    df = df[df["Estado"] == "enviada"]
-
-    if df.empty:
+    if stats.enviadas == 0:
         print("⚠ No hay iniciativas con Estado = 'Enviada'.")
         return None
 
-    # --- Contar modalidades ---
-    df["Modalidad de Implementación de la Iniciativa"] = (
-        df["Modalidad de Implementación de la Iniciativa"]
-        .astype(str)
-        .str.strip()
-        .replace("", "Sin dato")
-    )
-
-    conteo = df["Modalidad de Implementación de la Iniciativa"].value_counts()
+    conteo = stats.modalidad
 
     modalidades = conteo.index.tolist()
     cantidades = conteo.values.tolist()
@@ -514,48 +305,32 @@ def graficar_modalidades_cantidad(dataset):
     plt.tight_layout()
 
     # --- Guardar en buffer ---
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format="png", dpi=200, bbox_inches="tight")
-    plt.close(fig)
-    buffer.seek(0)
+    buffer = guardar_figura(fig, dpi=200)
 
     return buffer
 
+@render_cacheado(version=1)
 def graficar_alcance_territorial_cantidad(dataset):
     """
     Genera un gráfico de barras horizontal mostrando la cantidad de iniciativas por
     alcance territorial (columna 'Alcance Territorial de la Iniciativa'),
     filtrando solo las iniciativas con Estado = 'Enviada'.
+    `dataset`: DataFrame de la partición o sus `EstadisticasIniciativas`.
     Devuelve un buffer BytesIO con el PNG del gráfico.
     """
 
-    import matplotlib.pyplot as plt
-    import numpy as np
-    import io
+    stats = como_estadisticas(dataset)
 
     # Validaciones
-    if "Estado" not in dataset.columns or "Alcance Territorial de la Iniciativa" not in dataset.columns:
+    if stats.alcance is None:
         print("⚠ Columnas requeridas no encontradas.")
         return None
 
-    # --- Filtrar Estado = Enviada ---
-    df = dataset.copy()
-    df["Estado"] = df["Estado"].astype(str).str.strip().str.lower()
-    df = df[df["Estado"] == "enviada"]
-
-    if df.empty:
+    if stats.enviadas == 0:
         print("⚠ No hay iniciativas con Estado = 'Enviada'.")
         return None
 
-    # --- Contar alcance territorial ---
-    df["Alcance Territorial de la Iniciativa"] = (
-        df["Alcance Territorial de la Iniciativa"]
-        .astype(str)
-        .str.strip()
-        .replace("", "Sin dato")
-    )
-
-    conteo = df["Alcance Territorial de la Iniciativa"].value_counts()
+    conteo = stats.alcance
 
     alcances = conteo.index.tolist()
     cantidades = conteo.values.tolist()
@@ -588,26 +363,259 @@ def graficar_alcance_territorial_cantidad(dataset):
     plt.tight_layout()
 
     # --- Guardar en buffer ---
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format="png", dpi=200, bbox_inches="tight")
-    plt.close(fig)
-    buffer.seek(0)
+    buffer = guardar_figura(fig, dpi=200)
 
     return buffer
 
 
-def generar_resumenes_pdf_vform(dfs1, dfs2, seleccionadas, modo, ruta_salida):
+# ==========================================================
+# 🧩 SECCIONES DEL INFORME VcM
+# ==========================================================
+# Cada sección declara sus conteos, gráficos y datos (ver
+# `scripts.comun.secciones`); un tipo de informe es una tupla de secciones.
+def _titulo_seccion(texto, estilo="Heading3", espacio=8):
+    return [Paragraph(f"<b>{texto}</b>", ESTILOS[estilo]), Spacer(1, espacio)]
+
+
+def _dibujar_resumen(insumos):
+    return [
+        *_titulo_seccion("Resumen de Iniciativas"),
+        tarjetas_resumen_iniciativas(insumos["stats"], width=460),
+        Spacer(1, 20)
+    ], []
+
+
+def _dibujar_grafico(insumos, clave, titulo, aviso):
+    buffer = insumos.get(clave)
+    if not buffer:
+        return [], [f"⚠ No se pudo generar {aviso} para {insumos['dependencia']}/{insumos['subdependencia']}."]
+    return [*_titulo_seccion(titulo), imagen_pdf(buffer, width=460, height=300), Spacer(1, 20)], []
+
+
+def _dibujar_gantt(insumos):
+    paginas = insumos.get("gantt")
+    if not paginas:
+        return [], [f"⚠ No se pudieron generar gráficos Gantt para {insumos['dependencia']}/{insumos['subdependencia']}."]
+
+    story = []
+    for idx, gantt_img in enumerate(paginas, start=1):
+        story += _titulo_seccion(f"Gráfico Gantt ({idx})", "Heading4", 6)
+        story += [imagen_pdf(gantt_img, width=460), Spacer(1, 20)]
+    return story, []
+
+
+def _dibujar_tabla(insumos):
+    tabla = insumos.get("tabla")
+    if tabla is None:
+        return [], [
+            f"⚠ No fue posible generar la tabla resumen de iniciativas para "
+            f"{insumos['dependencia']}/{insumos['subdependencia']}."
+        ]
+    return [
+        *_titulo_seccion("Tabla Resumen de Iniciativas", espacio=10),
+        tabla_larga(tabla, PROPORCIONES_TABLA_INICIATIVAS),
+        Spacer(1, 20)
+    ], []
+
+
+SECCIONES_VFORM = {
+    "resumen": Seccion(
+        "Resumen de Iniciativas", _dibujar_resumen, medidas=("resumen",)
+    ),
+    "tipos": Seccion(
+        "Tipos de iniciativa",
+        partial(_dibujar_grafico, clave="barras", aviso="gráfico de tipos",
+                titulo="Distribución porcentual por tipo de iniciativa"),
+        medidas=("tipos",),
+        graficos={"barras": lambda p: enviar(graficar_porcentajes_tipos_iniciativa, p["stats"])}
+    ),
+    "modalidades": Seccion(
+        "Modalidad de Implementación",
+        partial(_dibujar_grafico, clave="modalidades", aviso="gráfico de modalidades",
+                titulo="Modalidad de Implementación"),
+        medidas=("modalidad",),
+        graficos={"modalidades": lambda p: enviar(graficar_modalidades_cantidad, p["stats"])}
+    ),
+    "alcance": Seccion(
+        "Alcance Territorial",
+        partial(_dibujar_grafico, clave="alcance", aviso="gráfico de alcance territorial",
+                titulo="Alcance de Iniciativas"),
+        medidas=("alcance",),
+        graficos={"alcance": lambda p: enviar(graficar_alcance_territorial_cantidad, p["stats"])}
+    ),
+    "gantt": Seccion(
+        "Gantt", _dibujar_gantt,
+        graficos={"gantt": lambda p: enviar(
+            graficar_gantt_iniciativas, columnas_gantt_iniciativas(p["dataset"]),
+            dependencia=p["dependencia"], subdependencia=p["subdependencia"]
+        )}
+    ),
+    "tabla": Seccion(
+        "Tabla resumen", _dibujar_tabla,
+        datos={"tabla": lambda p: datos_tabla_resumen_iniciativas(p["dataset"])}
+    ),
+}
+
+# Tipos de informe: secciones en el orden en que aparecen
+INFORMES_VFORM = {
+    "completo": ("resumen", "tipos", "modalidades", "alcance", "gantt", "tabla"),
+    "graficos": ("resumen", "tipos", "modalidades", "alcance", "gantt"),
+    "tabla": ("resumen", "tabla"),
+}
+
+
+def contenido_pdf_vform(secciones, insumos):
+    """
+    Flowables del cuerpo del PDF de una partición (sin el título) y sus
+    avisos: ([flowables], [logs]). `insumos`: dependencia, subdependencia,
+    stats y lo calculado para `secciones`. Lo usan el PDF por partición y
+    el informe consolidado.
+    """
+    return dibujar_secciones(SECCIONES_VFORM, secciones, insumos)
+
+
+def armar_pdf_vform(secciones, insumos):
+    """
+    Arma el PDF de una partición y devuelve {"pdf": bytes, "logs": [...],
+    "segundos": float}. Recibe solo lo ya calculado (estadísticas, buffers
+    de los gráficos y las columnas de la tabla resumen), así que puede
+    ejecutarse en el pool de procesos.
+    """
+    inicio = time.perf_counter()
+    dependencia, subdependencia = insumos["dependencia"], insumos["subdependencia"]
+
+    contenido, logs = contenido_pdf_vform(secciones, insumos)
+    story = [
+        Paragraph(
+            f"<b>{dependencia}</b>" +
+            (f" / {subdependencia}" if subdependencia else ""),
+            ESTILOS['Heading2']
+        ),
+        Spacer(1, 12),
+        *contenido
+    ]
+
+    # === Construcción del PDF (en memoria) ===
+    salida = io.BytesIO()
+    doc = SimpleDocTemplate(salida, pagesize=A4, **OPCIONES_PDF)
+    doc.build(story)
+
+    return {"pdf": salida.getvalue(), "logs": logs, "segundos": time.perf_counter() - inicio}
+
+
+NOMBRE_INFORME_VFORM = "Informe_Iniciativas_VcM.pdf"
+
+
+def _informe_consolidado_vform(pendientes, secciones, encolar, insumos, destino, bitacora, tiempos, logs):
+    """
+    Escribe todas las particiones de `pendientes` en un único PDF. Los
+    gráficos siguen renderizándose en el pool por ventanas; cada sección
+    se arma cuando el documento la pide.
+    """
+    ruta = destino.ruta(NOMBRE_INFORME_VFORM)
+
+    if bitacora is not None and bitacora.completada("pdf_consolidado", NOMBRE_INFORME_VFORM):
+        logs.append(f"⏭ Informe consolidado ya generado: {ruta}")
+        print("\n".join(logs))
+        return [ruta]
+
+    inicio = time.perf_counter()
+
+    def partes():
+        for pendiente, graficos in recorrer(en_ventana(pendientes, encolar), "pdf_consolidado",
+                                            total=len(pendientes),
+                                            filas=lambda listo: len(listo[0][1]["dataset"]),
+                                            detalle=lambda listo: listo[0][2]):
+            datos = insumos(pendiente, graficos)
+            contenido, avisos = contenido_pdf_vform(secciones, datos)
+            logs.extend(avisos)
+            yield (datos["dependencia"], datos["subdependencia"]), contenido
+
+    with destino.abrir(NOMBRE_INFORME_VFORM) as f:
+        n = construir_informe(f, "Resumen de Iniciativas VcM", partes())
+
+    if bitacora is not None:
+        bitacora.registrar("pdf_consolidado", NOMBRE_INFORME_VFORM)
+        bitacora.finalizar("pdf_consolidado")
+
+    total = time.perf_counter() - inicio
+    if tiempos is not None:
+        tiempos.append({
+            "particion": None, "pdf": ruta,
+            "segundos_pdf": round(total, 3), "segundos_total": round(total, 3),
+        })
+
+    logs.append(f"\n📚 Informe consolidado generado: {ruta} ({n} secciones · {total:.1f} s)")
+    print("\n".join(logs))
+    return [ruta]
+
+
+def generar_resumenes_pdf_vform(dfs1, dfs2, seleccionadas, modo, ruta_salida, bitacora=None, destino=None,
+                                perfil_render=None, compresion_pdf=None, pdf_paralelo=True, tiempos=None,
+                                consolidado=False, informe="completo"):
     """
-    Genera un PDF para cada dependencia o subdependencia seleccionada,
-    incluyendo el resumen visual creado por la función resumen_iniciativas(),
-    gráficos Gantt y la tabla resumen de iniciativas.
+    Genera un PDF para cada dependencia o subdependencia seleccionada con
+    las secciones del tipo de `informe` (ver INFORMES_VFORM; por defecto
+    tarjetas de resumen, gráficos de tipos/modalidades/alcance, Gantt y
+    tabla resumen). Solo se calculan los conteos, gráficos y datos de las
+    secciones pedidas; `informe` también acepta una lista de nombres de
+    SECCIONES_VFORM.
     Usa logs internos optimizados y solo hace un print al final.
+
+    Los PDFs se escriben de forma atómica. Con `bitacora`, las particiones
+    ya registradas en la etapa "pdf" no se vuelven a generar.
+    `destino` (p. ej. `DestinoZip`) reemplaza la carpeta `ruta_salida`.
+    `perfil_render` ("borrador", "pantalla" o "impresion") fija la calidad
+    de los gráficos; sin él se usa el perfil activo.
+    `compresion_pdf` ("sin_perdida", "cuantizada" o "jpeg") fija cómo se
+    incrustan los PNG en el PDF (ver `scripts.comun.render`).
+
+    Con `pdf_paralelo` cada PDF se arma en el pool de procesos
+    (`armar_pdf_vform`) y aquí solo se escriben los bytes, en el orden de
+    `seleccionadas`. Si se entrega la lista `tiempos`, se le agrega un
+    dict por PDF: {"particion", "pdf", "segundos_pdf", "segundos_total"}.
+
+    Con `consolidado` se escribe un solo PDF (NOMBRE_INFORME_VFORM) con
+    portada, una sección por partición, árbol de marcadores
+    dependencia → subdependencia e índice final (ver
+    `scripts.comun.informe`); devuelve [ruta del informe].
     """
 
-    os.makedirs(ruta_salida, exist_ok=True)
+    destino = destino if destino is not None else DestinoCarpeta(ruta_salida)
+    if perfil_render is not None:
+        configurar_perfil_render(perfil_render)
+    if compresion_pdf is not None:
+        configurar_compresion_pdf(compresion_pdf)
+    secciones = resolver_secciones(SECCIONES_VFORM, INFORMES_VFORM, informe)
+    medidas = medidas_requeridas(SECCIONES_VFORM, secciones)
     pdfs_generados = []
     logs = []
 
+    # ==========================================================
+    # 🧊 CUBO DE CONTEOS (una pasada por fila para todas las particiones)
+    # ==========================================================
+    # Por subdependencia; dependencias e institución se obtienen sumando.
+    # Solo las medidas que piden las secciones del informe.
+    claves = {tuple(sel) if isinstance(sel, list) else sel for sel in seleccionadas}
+    cubo = construir_cubo(
+        dfs1, partial(medir_iniciativas, grupos=medidas), seleccionadas=claves
+    )
+    stats_por_particion = estadisticas_por_nivel(
+        cubo, "subdependencia" if modo == "subdependencias" else "dependencia"
+    )
+
+    institucion = estadisticas_por_nivel(cubo, "institucion")
+    logs.append(
+        f"🧊 Cubo de conteos: {len(cubo)} filas · "
+        f"{institucion.total} iniciativas ({institucion.enviadas} enviadas) en la selección"
+    )
+    logs.append(f"🧩 Secciones: {', '.join(SECCIONES_VFORM[n].titulo for n in secciones)}")
+
+    # ==========================================================
+    # 📋 PARTICIONES PENDIENTES
+    # ==========================================================
+    pendientes = []
+
     for sel in seleccionadas:
 
         # --- Selección del dataset ---
@@ -645,118 +653,81 @@ def generar_resumenes_pdf_vform(dfs1, dfs2, seleccionadas, modo, ruta_salida):
             logs.append(f"⚠ Dataset vacío para '{dependencia}'.")
             continue
 
-        # ==========================================================
-        # ⬛ GENERAR RESUMEN VISUAL
-        # ==========================================================
-        buffer_resumen = resumen_iniciativas(
-            dataset,
-            dependencia=dependencia,
-            subdependencia=subdependencia
-        )
+        safe_name = f"{dependencia}_{subdependencia or ''}".replace("/", "_")
+        pdf_path = destino.ruta(f"{safe_name}.pdf")
 
-        if buffer_resumen is None:
-            logs.append(f"⚠ No se pudo generar resumen para {dependencia}/{subdependencia}.")
+        if not consolidado and bitacora is not None and bitacora.completada("pdf", sel):
+            pdfs_generados.append(pdf_path)
+            logs.append(f"⏭ PDF ya generado: {pdf_path}")
             continue
 
-        # ==========================================================
-        # 📊 GENERAR GRÁFICOS GANTT
-        # ==========================================================
-        buffer_gantt = graficar_gantt_iniciativas(
-            dataset,
-            dependencia=dependencia,
-            subdependencia=subdependencia
-        )
-
-        # ==========================================================
-        # 📋 GENERAR TABLA RESUMEN (NUEVO)
-        # ==========================================================
-        tabla_resumen = crear_tabla_resumen_iniciativas(dataset)
-
-        if tabla_resumen is None:
-            logs.append(f"⚠ No fue posible generar la tabla resumen de iniciativas para {dependencia}/{subdependencia}.")
-
-        buffer_barras = graficar_porcentajes_tipos_iniciativa(dataset)
-        buffer_modalidades = graficar_modalidades_cantidad(dataset)
-        buffer_alcance = graficar_alcance_territorial_cantidad(dataset)
-
-        # ==========================================================
-        # 📄 CREAR PDF
-        # ==========================================================
-        safe_name = f"{dependencia}_{subdependencia or ''}".replace("/", "_")
-        pdf_path = os.path.join(ruta_salida, f"{safe_name}.pdf")
-
-        styles = getSampleStyleSheet()
-        story = [
-            Paragraph(
-                f"<b>{dependencia}</b>" +
-                (f" / {subdependencia}" if subdependencia else ""),
-                styles['Heading2']
-            ),
-            Spacer(1, 12)
-        ]
+        # Los conteos salen del cubo y alimentan el resumen y los gráficos de barras
+        clave = tuple(sel) if modo == "subdependencias" else sel
+        stats = stats_por_particion.get(clave) or calcular_estadisticas(dataset, grupos=medidas)
+
+        particion = {"dependencia": dependencia, "subdependencia": subdependencia,
+                     "dataset": dataset, "stats": stats}
+        pendientes.append((sel, particion, safe_name, pdf_path))
+
+    # ==========================================================
+    # 🏭 GRÁFICOS Y PDFs EN EL POOL
+    # ==========================================================
+    # Etapa 1: gráficos de las secciones pedidas, por ventana de particiones;
+    # cada trabajo recibe solo estadísticas o columnas del Gantt.
+    # Etapa 2: con los gráficos listos, el PDF se arma en el pool con
+    # estadísticas + buffers + datos de las secciones (no el DataFrame).
+    # Aquí solo se escriben los bytes, en orden.
+    inicios = {}
+    lanzar_pdf = enviar if pdf_paralelo else en_serie
+
+    def encolar(pendiente):
+        _, particion, safe_name, _ = pendiente
+        inicios[safe_name] = time.perf_counter()
+        return encolar_graficos(SECCIONES_VFORM, secciones, particion)
+
+    def insumos(pendiente, graficos):
+        particion = pendiente[1]
+        datos = {clave: valor for clave, valor in particion.items() if clave != "dataset"}
+        datos.update(graficos)
+        datos.update(preparar_datos(SECCIONES_VFORM, secciones, particion))
+        return datos
+
+    if consolidado:
+        return _informe_consolidado_vform(pendientes, secciones, encolar, insumos, destino, bitacora, tiempos, logs)
+
+    def encolar_pdf(listo):
+        pendiente, graficos = listo
+        return lanzar_pdf(armar_pdf_vform, secciones, insumos(pendiente, graficos))
+
+    # Avance: ((pendiente, gráficos), armado) con pendiente = (sel, partición, nombre, ruta)
+    armados = en_orden(en_ventana(pendientes, encolar), encolar_pdf)
+    for (pendiente, _), armado in recorrer(armados, "pdf", total=len(pendientes),
+                                           filas=lambda listo: len(listo[0][0][1]["dataset"]),
+                                           detalle=lambda listo: listo[0][0][2]):
+
+        sel, _, safe_name, pdf_path = pendiente
+        logs.extend(armado["logs"])
+
+        # === Escritura atómica ===
+        with destino.abrir(f"{safe_name}.pdf") as f:
+            f.write(armado["pdf"])
+
+        if bitacora is not None:
+            bitacora.registrar("pdf", sel)
 
-        # === Resumen visual ===
-        story.append(Paragraph("<b>Resumen de Iniciativas</b>", styles['Heading3']))
-        story.append(Spacer(1, 8))
-        story.append(Image(buffer_resumen, width=460, height=300))
-        story.append(Spacer(1, 20))
-
-        # === Gráfico de tipos de iniciativa ===
-        if buffer_barras:
-            story.append(Paragraph("<b>Distribución porcentual por tipo de iniciativa</b>", styles['Heading3']))
-            story.append(Spacer(1, 8))
-            story.append(Image(buffer_barras, width=460, height=300))
-            story.append(Spacer(1, 20))
-        else:
-            logs.append(f"⚠ No se pudo generar gráfico de tipos para {dependencia}/{subdependencia}.")
-
-        # === Modalidades ===
-        if buffer_modalidades:
-            story.append(Paragraph("<b>Modalidad de Implementación</b>", styles['Heading3']))
-            story.append(Spacer(1, 8))
-            story.append(Image(buffer_modalidades, width=460, height=300))
-            story.append(Spacer(1, 20))
-        else:
-            logs.append(f"⚠ No se pudo generar gráfico de modalidades para {dependencia}/{subdependencia}.")
-
-        # === Alcance Territorial ===
-        if buffer_alcance:
-            story.append(Paragraph("<b>Alcance de Iniciativas</b>", styles['Heading3']))
-            story.append(Spacer(1, 8))
-            story.append(Image(buffer_alcance, width=460, height=300))
-            story.append(Spacer(1, 20))
-        else:
-            logs.append(f"⚠ No se pudo generar gráfico de alcance territorial para {dependencia}/{subdependencia}.")
+        pdfs_generados.append(pdf_path)
 
-        # === Gráficos Gantt ===
-        if not buffer_gantt:
-            logs.append(f"⚠ No se pudieron generar gráficos Gantt para {dependencia}/{subdependencia}.")
-        else:
-            for idx, gantt_img in enumerate(buffer_gantt, start=1):
-                story.append(Paragraph(f"<b>Gráfico Gantt ({idx})</b>", styles['Heading4']))
-                story.append(Spacer(1, 6))
-                story.append(Image(gantt_img, width=460, height=280))
-                story.append(Spacer(1, 20))
-
-        # === NUEVO: Tabla Resumen ===
-        if tabla_resumen:
-            story.append(Paragraph("<b>Tabla Resumen de Iniciativas</b>", styles['Heading3']))
-            story.append(Spacer(1, 10))
-            story.append(tabla_resumen)
-            story.append(Spacer(1, 20))
-
-        # === Construcción del PDF ===
-        doc = SimpleDocTemplate(
-            pdf_path, pagesize=A4,
-            leftMargin=25, rightMargin=25,
-            topMargin=30, bottomMargin=25
-        )
-        doc.build(story)
+        total = time.perf_counter() - inicios.pop(safe_name)
+        if tiempos is not None:
+            tiempos.append({
+                "particion": sel, "pdf": pdf_path,
+                "segundos_pdf": round(armado["segundos"], 3), "segundos_total": round(total, 3),
+            })
 
-        buffer_resumen.close()
-        pdfs_generados.append(pdf_path)
+        logs.append(f"✅ PDF generado: {pdf_path} (PDF {armado['segundos']:.1f} s · total {total:.1f} s)")
 
-        logs.append(f"✅ PDF generado: {pdf_path}")
+    if bitacora is not None:
+        bitacora.finalizar("pdf")
 
     logs.append(f"\n📂 Se generaron {len(pdfs_generados)} PDFs correctamente.")
 
@@ -4,6 +4,16 @@ import unicodedata
 import re
 import difflib
 
+from scripts.comun.salida import DestinoCarpeta
+from scripts.comun.progreso import recorrer
+from scripts.comun.excel import (
+    normalizar_perfil_excel, normalizar_agrupacion_excel, nombre_hoja_unico,
+    escribir_hoja_excel, escribir_resumen_estados
+)
+from scripts.comun.formatos import (
+    normalizar_formatos, formatos_columnares, columnas_particiones, escribir_particion
+)
+
 def normalizar_cadena(texto: str):
     """Normaliza cadenas para evitar duplicados por diferencias mínimas."""
     if texto is None:
@@ -147,20 +157,124 @@ def dividir_subdependencias_vform(df: pd.DataFrame):
 
 
 
-def exportar_subdependencias_vform(subdfs, df2, ruta_salida, seleccionadas=None):
+def _escribir_libro_subdependencia(writer, df_sub, df2_filtrado, perfil_excel, sanitizar):
+    """Hojas del libro individual de una subdependencia (agrupación "archivo")."""
+
+    # 🟦 Hoja principal 1
+    escribir_hoja_excel(writer, df_sub, "Iniciativas", perfil_excel)
+
+    # 🟩 Hoja principal 2
+    escribir_hoja_excel(writer, df2_filtrado, "Sintesis Evaluativa", perfil_excel)
+
+    # 📊 Perfil tabla: conteos por Estado en lugar de hojas duplicadas
+    if perfil_excel == "tabla":
+        escribir_resumen_estados(writer, {
+            "Iniciativas": df_sub,
+            "Sintesis Evaluativa": df2_filtrado
+        })
+
+    # ----------------------------
+    # 🟦 Hojas por ESTADO df_sub
+    # ----------------------------
+    if perfil_excel == "clasico" and "Estado" in df_sub.columns:
+        for estado in df_sub["Estado"].dropna().unique():
+            df_estado = df_sub[df_sub["Estado"] == estado]
+            hoja = f"Iniciativas ({sanitizar(estado)})"
+            df_estado.to_excel(writer, sheet_name=hoja[:31], index=False)
+
+    # ----------------------------
+    # 🟩 Hojas por ESTADO df2
+    # ----------------------------
+    if perfil_excel == "clasico" and "Estado" in df2_filtrado.columns:
+        for estado in df2_filtrado["Estado"].dropna().unique():
+            df2_estado = df2_filtrado[df2_filtrado["Estado"] == estado]
+            hoja = f"Sintesis Evaluativa ({sanitizar(estado)})"
+            df2_estado.to_excel(writer, sheet_name=hoja[:31], index=False)
+
+
+def _escribir_libro_consolidado(writer, miembros, agrupacion, perfil_excel):
+    """
+    Hojas de un libro consolidado (agrupación "dependencia" o "unico").
+
+    Cada subdependencia ocupa dos hojas: "<subdep>" (Iniciativas) y
+    "SE <subdep>" (Síntesis Evaluativa). Los nombres se recortan a 31
+    caracteres y se desambiguan, así que la hoja "Índice" al inicio
+    indica a qué dependencia/subdependencia corresponde cada una.
+    Las hojas por Estado del perfil "clasico" no se generan aquí.
     """
-    Exporta UN SOLO EXCEL POR SUBDEPENDENCIA con las siguientes hojas:
+    usados = {"índice", "resumen estado"}
+    indice = []
+    hojas = []
+
+    for dependencia, subdep, df_sub, df2_filtrado in miembros:
+        etiqueta = subdep
+        if agrupacion == "unico" and subdep != dependencia:
+            etiqueta = f"{dependencia} - {subdep}"
+
+        hoja_ini = nombre_hoja_unico(etiqueta, usados)
+        hoja_se = nombre_hoja_unico(f"SE {etiqueta}", usados)
+
+        indice.append({
+            "Dependencia": dependencia,
+            "Subdependencia": subdep,
+            "Hoja Iniciativas": hoja_ini,
+            "Hoja Sintesis Evaluativa": hoja_se,
+            "Iniciativas": len(df_sub),
+            "Sintesis Evaluativa": len(df2_filtrado)
+        })
+        hojas.append((hoja_ini, df_sub))
+        hojas.append((hoja_se, df2_filtrado))
+
+    # 🗂 Índice primero, luego una hoja por subdependencia
+    escribir_hoja_excel(writer, pd.DataFrame(indice), "Índice", perfil_excel)
 
-    - "Iniciativas"                          → df_sub completo
-    - "Sintesis Evaluativa"                  → df2 filtrado completo
-    - "Iniciativas (ESTADO)"                 → df_sub por estado
-    - "Sintesis Evaluativa (ESTADO)"         → df2 filtrado por estado
+    for hoja, df in hojas:
+        escribir_hoja_excel(writer, df, hoja, perfil_excel)
+
+    if perfil_excel == "tabla":
+        escribir_resumen_estados(writer, dict(hojas))
+
+
+def exportar_subdependencias_vform(subdfs, df2, ruta_salida, seleccionadas=None, bitacora=None, formatos=None,
+                                   perfil_excel="clasico", agrupacion="archivo", destino=None):
+    """
+    Exporta las subdependencias a Excel según `agrupacion`:
+
+    - "archivo" (por defecto): UN EXCEL POR SUBDEPENDENCIA en la carpeta de
+      su dependencia, con las hojas:
+        - "Iniciativas"                          → df_sub completo
+        - "Sintesis Evaluativa"                  → df2 filtrado completo
+        - "Iniciativas (ESTADO)"                 → df_sub por estado
+        - "Sintesis Evaluativa (ESTADO)"         → df2 filtrado por estado
+    - "dependencia": UN EXCEL POR DEPENDENCIA (`<dep>.xlsx`) con una hoja de
+      Iniciativas y una de Síntesis por subdependencia, más una hoja "Índice".
+    - "unico": UN SOLO EXCEL para toda la ejecución (`Subdependencias.xlsx`)
+      con la misma estructura que "dependencia".
+
+    Cada libro se escribe de forma atómica con una sola sesión de escritura.
+    Si se entrega una `bitacora`, las subdependencias ya registradas en la
+    etapa "excel" no se reescriben; en los modos consolidados un libro solo
+    se reescribe (completo) si alguna de sus subdependencias está pendiente.
+
+    `formatos` (p. ej. ("xlsx", "parquet")) agrega o reemplaza el Excel por
+    archivos Parquet/Feather/CSV en un layout particionado:
+        <formato>/iniciativas/dependencia=<dep>/subdependencia=<sub>/part-0.<ext>
+        <formato>/sintesis_evaluativa/dependencia=<dep>/subdependencia=<sub>/part-0.<ext>
+
+    `destino` (p. ej. `DestinoZip`) reemplaza la carpeta `ruta_salida`.
 
     Retorna:
         dict_df2_filtrado[(dependencia, subdependencia)] = df2 filtrado
     """
 
-    os.makedirs(ruta_salida, exist_ok=True)
+    destino = destino if destino is not None else DestinoCarpeta(ruta_salida)
+    formatos = normalizar_formatos(formatos)
+    columnares = formatos_columnares(formatos)
+    perfil_excel = normalizar_perfil_excel(perfil_excel)
+    agrupacion = normalizar_agrupacion_excel(agrupacion)
+
+    # Esquema común para que todas las particiones columnares coincidan
+    columnas_df1 = columnas_particiones(subdfs) if columnares else None
 
     def sanitizar(nombre):
         for c in r'\/:*?"<>|':
@@ -170,35 +284,27 @@ def exportar_subdependencias_vform(subdfs, df2, ruta_salida, seleccionadas=None)
     logs = []
     dict_df2_filtrado = {}   # <-- lo que se retorna al final
 
+    if bitacora is not None and destino.limpiar_temporales():
+        logs.append("🧹 Temporales de una ejecución interrumpida eliminados.")
+
     # =====================================================
-    # 🔁 PROCESAR CADA DEPENDENCIA
+    # 1️⃣ SUBDEPENDENCIAS SELECCIONADAS Y df2 FILTRADO
     # =====================================================
-    for dependencia, subgrupos in subdfs.items():
+    libros = {}   # ruta relativa del libro → [(dep, subdep, df_sub, df2_filtrado)]
 
-        carpeta_dep = os.path.join(ruta_salida, sanitizar(dependencia))
-        exportados = 0
+    for dependencia, subgrupos in subdfs.items():
 
         # Dependencia sin subdependencias
         if isinstance(subgrupos, pd.DataFrame):
             subgrupos = { dependencia: subgrupos }
 
-        # =====================================================
-        # 🔁 PROCESAR SUBDEPENDENCIAS
-        # =====================================================
         for subdep, df_sub in subgrupos.items():
 
             # Saltar si no está seleccionada
             if seleccionadas and subdep not in seleccionadas:
                 continue
 
-            os.makedirs(carpeta_dep, exist_ok=True)
-
-            subdep_sanit = sanitizar(subdep)
-            archivo_excel = os.path.join(carpeta_dep, f"{subdep_sanit}.xlsx")
-
-            # ============================================
-            # 2️⃣ Filtrar df2 por los IDs de esta subdependencia
-            # ============================================
+            # Filtrar df2 por los IDs de esta subdependencia
             if "ID" in df_sub.columns and "ID" in df2.columns:
                 ids_sub = df_sub["ID"].dropna().unique()
                 df2_filtrado = df2[df2["ID"].isin(ids_sub)].copy()
@@ -207,49 +313,64 @@ def exportar_subdependencias_vform(subdfs, df2, ruta_salida, seleccionadas=None)
 
             dict_df2_filtrado[(dependencia, subdep)] = df2_filtrado
 
-            # ============================================
-            # 📘 CREAR EXCEL CON MÚLTIPLES HOJAS
-            # ============================================
-            with pd.ExcelWriter(archivo_excel, engine="openpyxl") as writer:
-
-                # 🟦 Hoja principal 1
-                df_sub.to_excel(writer, sheet_name="Iniciativas", index=False)
-
-                # 🟩 Hoja principal 2
-                df2_filtrado.to_excel(writer, sheet_name="Sintesis Evaluativa", index=False)
-
-                # ----------------------------
-                # 🟦 Hojas por ESTADO df_sub
-                # ----------------------------
-                if "Estado" in df_sub.columns:
-                    for estado in df_sub["Estado"].dropna().unique():
-                        df_estado = df_sub[df_sub["Estado"] == estado]
-                        hoja = f"Iniciativas ({sanitizar(estado)})"
-                        df_estado.to_excel(writer, sheet_name=hoja[:31], index=False)
-
-                # ----------------------------
-                # 🟩 Hojas por ESTADO df2
-                # ----------------------------
-                if "Estado" in df2_filtrado.columns:
-                    for estado in df2_filtrado["Estado"].dropna().unique():
-                        df2_estado = df2_filtrado[df2_filtrado["Estado"] == estado]
-                        hoja = f"Sintesis Evaluativa ({sanitizar(estado)})"
-                        df2_estado.to_excel(writer, sheet_name=hoja[:31], index=False)
-
-            exportados += 1
-
-        # Si no exportó nada, eliminar carpeta
-        if exportados == 0 and os.path.isdir(carpeta_dep):
-            try:
-                os.rmdir(carpeta_dep)
-            except OSError:
-                pass
-
-        logs.append(f"📁 Dependencia procesada: {dependencia}")
+            if agrupacion == "archivo":
+                relativa = os.path.join(sanitizar(dependencia), f"{sanitizar(subdep)}.xlsx")
+            elif agrupacion == "dependencia":
+                relativa = f"{sanitizar(dependencia)}.xlsx"
+            else:
+                relativa = "Subdependencias.xlsx"
+
+            libros.setdefault(relativa, []).append((dependencia, subdep, df_sub, df2_filtrado))
+
+    # =====================================================
+    # 🔁 ESCRIBIR CADA LIBRO
+    # =====================================================
+    for relativa, miembros in recorrer(libros.items(), "excel", filas=lambda par: sum(len(m[2]) for m in par[1]),
+                                       detalle=lambda par: par[0]):
+
+        archivo_excel = destino.ruta(relativa)
+
+        pendientes = [
+            m for m in miembros
+            if bitacora is None or not bitacora.completada("excel", (m[0], m[1]))
+        ]
+
+        # ⏭ Ya exportado en una ejecución anterior
+        if not pendientes:
+            logs.append(f"⏭ Ya exportada: {archivo_excel}")
+            continue
+
+        # ============================================
+        # 🧱 FORMATOS COLUMNARES (particionados)
+        # ============================================
+        for dependencia, subdep, df_sub, df2_filtrado in pendientes:
+            for formato in columnares:
+                escribir_particion(destino, formato, "iniciativas", df_sub,
+                                   dependencia, subdep, columnas=columnas_df1)
+                escribir_particion(destino, formato, "sintesis_evaluativa", df2_filtrado,
+                                   dependencia, subdep, columnas=list(df2.columns))
+
+        # ============================================
+        # 📘 CREAR EXCEL (una sola sesión de escritura)
+        # ============================================
+        if "xlsx" in formatos:
+            with destino.abrir(relativa) as f, pd.ExcelWriter(f, engine="openpyxl") as writer:
+                if agrupacion == "archivo":
+                    _, _, df_sub, df2_filtrado = miembros[0]
+                    _escribir_libro_subdependencia(writer, df_sub, df2_filtrado, perfil_excel, sanitizar)
+                else:
+                    _escribir_libro_consolidado(writer, miembros, agrupacion, perfil_excel)
+
+            logs.append(f"📁 Archivo generado: {archivo_excel} ({len(miembros)} subdependencia(s))")
+
+        if bitacora is not None:
+            for dependencia, subdep, _, _ in pendientes:
+                bitacora.registrar("excel", (dependencia, subdep))
+
+    if bitacora is not None:
+        bitacora.finalizar("excel")
 
     logs.append(f"\n✅ Exportación completa en: {ruta_salida}")
     print("\n".join(logs))
 
     return dict_df2_filtrado
-
-
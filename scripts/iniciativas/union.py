@@ -1,91 +1,289 @@
-import os
-import pandas as pd
+from contextlib import ExitStack
 
-def unir_dataset(df1: pd.DataFrame, df2: pd.DataFrame):
+import pandas as pd
+from openpyxl import Workbook
+
+from scripts.comun.salida import DestinoCarpeta
+from scripts.comun.progreso import recorrer
+from scripts.comun.excel import normalizar_perfil_excel, nombre_hoja_unico, contar_estados, HojaPorBloques
+from scripts.comun.formatos import (
+    normalizar_formatos, formatos_columnares, tipos_columnares, escritor_por_bloques
+)
+
+# ============================================================
+# 🔗 Motor de unión por ID
+# ============================================================
+# Estrategias para IDs repetidos en una Síntesis:
+# - "error":    se informa y no se une
+# - "permitir": uno-a-muchos (cada coincidencia genera una fila; comportamiento histórico)
+# - "primero":  se conserva la primera fila de cada ID
+# - "ultimo":   se conserva la última fila de cada ID
+# - "agregar":  una fila por ID con los valores distintos unidos por " | "
+ESTRATEGIAS_DUPLICADOS = ("error", "permitir", "primero", "ultimo", "agregar")
+
+
+def normalizar_estrategia_duplicados(estrategia=None):
+    estrategia = (estrategia or "permitir").strip().lower()
+    if estrategia not in ESTRATEGIAS_DUPLICADOS:
+        raise ValueError(
+            f"❌ Estrategia de duplicados desconocida: '{estrategia}'. "
+            f"Opciones: {', '.join(ESTRATEGIAS_DUPLICADOS)}"
+        )
+    return estrategia
+
+
+def _sintesis_por_nombre(df2):
+    """Acepta un DataFrame, una lista o un dict {nombre: DataFrame}."""
+    if isinstance(df2, pd.DataFrame):
+        return {"Síntesis": df2}
+    if isinstance(df2, dict):
+        return dict(df2)
+    return {f"Síntesis {i}": df for i, df in enumerate(df2, start=1)}
+
+
+def estadisticas_union(df1, conteos_df2, col_id="ID"):
     """
-    Une df1 y df2 utilizando la columna 'ID'.
-    - Mantiene todas las filas de df1 (LEFT JOIN).
-    - Incluye todas las columnas de df1 y todas las de df2.
-    - IDs sin coincidencia en df2 quedan con NaN.
-    
+    Estadísticas del LEFT JOIN a partir del índice de IDs de df2
+    (`conteos_df2` = filas por ID), sin materializar la unión.
+    """
+    multiplicidad = df1[col_id].map(conteos_df2)
+    con_match = multiplicidad.notna()
+    ids_df1 = df1[col_id].nunique()
+    coincidencias = df1.loc[con_match, col_id].nunique()
+
+    return {
+        "filas_df1": len(df1),
+        "ids_df1": ids_df1,
+        "ids_df2": len(conteos_df2),
+        "coincidencias": coincidencias,
+        "sin_correspondencia": ids_df1 - coincidencias,
+        "ids_duplicados_df2": int((conteos_df2 > 1).sum()),
+        "filas_resultantes": int(multiplicidad.fillna(1).sum()),
+        "filas_con_expansion": int((multiplicidad > 1).sum()),
+    }
+
+
+def _colapsar_duplicados(df2, estrategia, col_id="ID"):
+    """Deja una fila por ID según la estrategia ("primero", "ultimo" o "agregar")."""
+    if estrategia in ("primero", "ultimo"):
+        keep = "first" if estrategia == "primero" else "last"
+        return df2.drop_duplicates(subset=col_id, keep=keep)
+
+    # "agregar": valores distintos (no nulos) de cada columna, en orden de aparición
+    base = df2[[col_id]].drop_duplicates()
+    for col in df2.columns:
+        if col == col_id:
+            continue
+        valores = df2[[col_id, col]].dropna(subset=[col])
+        valores = valores.assign(**{col: valores[col].astype(str)}).drop_duplicates()
+        unidos = valores.groupby(col_id, sort=False)[col].agg(" | ".join)
+        base[col] = base[col_id].map(unidos)
+    return base
+
+
+def preparar_union(df1: pd.DataFrame, df2, estrategia_duplicados: str = "permitir", col_id: str = "ID"):
+    """
+    Valida e indexa por ID cada Síntesis (`df2`: DataFrame, lista o dict
+    {nombre: DataFrame}) SIN unir todavía.
+
+    Cada Síntesis se indexa por ID una sola vez: de ese índice salen las
+    estadísticas de coincidencia y la detección de uno-a-muchos, que se
+    informan antes de materializar nada. Las columnas repetidas (p. ej.
+    "Estado") se renombran "<columna> (<nombre>)".
+
     Retorna:
-        df_unido, logs
+        plan = {"df1", "col_id", "partes": [{"nombre", "datos", "expandir"}]}
+        o None si la unión no es posible. Se consume con `unir_bloque`,
+        `iterar_union`, `unir_dataset` o `exportar_union_por_bloques`.
     """
 
     logs = []
     logs.append("🔗 Iniciando unión de datasets (df1 + df2)")
+    estrategia = normalizar_estrategia_duplicados(estrategia_duplicados)
+    sintesis = _sintesis_por_nombre(df2)
 
     # -------------------------------
     # 1️⃣ Validaciones
     # -------------------------------
-    if "ID" not in df1.columns:
-        logs.append("❌ df1 no contiene columna 'ID'.")
+    if col_id not in df1.columns:
+        logs.append(f"❌ df1 no contiene columna '{col_id}'.")
         print("\n".join(logs))
-        return None, logs
+        return None
 
-    if "ID" not in df2.columns:
-        logs.append("❌ df2 no contiene columna 'ID'.")
-        print("\n".join(logs))
-        return None, logs
+    for nombre, df in sintesis.items():
+        if col_id not in df.columns:
+            logs.append(f"❌ {nombre} no contiene columna '{col_id}'.")
+            print("\n".join(logs))
+            return None
 
     logs.append(f"📊 df1: {df1.shape[0]} filas – {df1.shape[1]} columnas")
-    logs.append(f"📊 df2: {df2.shape[0]} filas – {df2.shape[1]} columnas")
 
-    # -------------------------------
-    # 2️⃣ Información sobre IDs
-    # -------------------------------
-    ids_df1 = set(df1["ID"].dropna().unique())
-    ids_df2 = set(df2["ID"].dropna().unique())
+    partes = []
+    columnas_usadas = set(df1.columns)
+
+    for nombre, df in sintesis.items():
+
+        logs.append(f"📊 {nombre}: {df.shape[0]} filas – {df.shape[1]} columnas")
+
+        sin_id = df[col_id].isna().sum()
+        if sin_id:
+            logs.append(f"  ⚠ {sin_id} fila(s) sin {col_id} descartadas.")
+            df = df[df[col_id].notna()]
+
+        # -------------------------------
+        # 2️⃣ Índice de IDs y estadísticas
+        # -------------------------------
+        conteos = df[col_id].value_counts(sort=False)
+        stats = estadisticas_union(df1, conteos, col_id)
+
+        logs.append(f"  🔍 Coincidencias de ID: {stats['coincidencias']}")
+        logs.append(f"  ⚠ IDs sin correspondencia: {stats['sin_correspondencia']}")
+
+        # -------------------------------
+        # 3️⃣ Uno-a-muchos (antes de unir)
+        # -------------------------------
+        expandir = False
+        if stats["ids_duplicados_df2"]:
+            logs.append(
+                f"  ⚠ {stats['ids_duplicados_df2']} ID(s) repetidos: la unión directa tendría "
+                f"{stats['filas_resultantes']} filas (+{stats['filas_resultantes'] - stats['filas_df1']})."
+            )
+
+            if estrategia == "error":
+                logs.append("❌ Unión cancelada (estrategia 'error'). Use 'primero', 'ultimo' o 'agregar'.")
+                print("\n".join(logs))
+                return None
+
+            if estrategia == "permitir":
+                expandir = True
+            else:
+                df = _colapsar_duplicados(df, estrategia, col_id)
+                logs.append(f"  🧹 Duplicados colapsados con estrategia '{estrategia}'.")
+
+        # Columnas repetidas → "<columna> (<nombre>)"
+        renombres = {
+            c: f"{c} ({nombre})" for c in df.columns
+            if c != col_id and c in columnas_usadas
+        }
+        df = df.rename(columns=renombres)
+        columnas_usadas.update(df.columns)
+
+        # IDs únicos: índice listo para búsquedas posicionales
+        partes.append({
+            "nombre": nombre,
+            "datos": df if expandir else df.set_index(col_id),
+            "expandir": expandir
+        })
 
-    ids_comunes = ids_df1 & ids_df2
-    ids_sin_df2 = ids_df1 - ids_df2
+    print("\n".join(logs))
+    return {"df1": df1, "col_id": col_id, "partes": partes}
 
-    logs.append(f"🔍 Coincidencias de ID: {len(ids_comunes)}")
-    logs.append(f"⚠ IDs sin correspondencia en df2: {len(ids_sin_df2)}")
 
-    # -------------------------------
-    # 3️⃣ MERGE sin sufijos
-    # -------------------------------
-    logs.append("📥 Realizando merge LEFT (df1 como principal)...")
+def unir_bloque(plan, bloque):
+    """
+    Une un bloque de filas de df1 con las Síntesis del plan: reindex sobre
+    el índice de ID para las partes con IDs únicos y merge solo para las
+    partes uno-a-muchos permitidas (las filas se multiplican a propósito).
+    """
+    col_id = plan["col_id"]
+    unido = bloque.reset_index(drop=True)
 
-    df_unido = df1.merge(df2, on="ID", how="left")
+    unicas = [p["datos"] for p in plan["partes"] if not p["expandir"]]
+    if unicas:
+        ids = unido[col_id].to_numpy()
+        unido = pd.concat(
+            [unido] + [datos.reindex(ids).reset_index(drop=True) for datos in unicas],
+            axis=1
+        )
 
-    logs.append(f"📁 Unión completada: {df_unido.shape[0]} filas – {df_unido.shape[1]} columnas")
+    for parte in plan["partes"]:
+        if parte["expandir"]:
+            unido = unido.merge(parte["datos"], on=col_id, how="left")
 
-    # -------------------------------
-    # 4️⃣ Columnas nuevas
-    # -------------------------------
-    columnas_nuevas = [c for c in df_unido.columns if c not in df1.columns]
-    logs.append(f"🆕 Columnas agregadas desde df2: {len(columnas_nuevas)}")
+    return unido
 
-    # -------------------------------
-    # 5️⃣ Finalización
-    # -------------------------------
+
+def iterar_union(plan, filas_por_bloque=5000):
+    """Genera la unión en bloques de `filas_por_bloque` filas de df1 (al menos un bloque)."""
+    df1 = plan["df1"]
+    for inicio in range(0, max(len(df1), 1), filas_por_bloque):
+        yield unir_bloque(plan, df1.iloc[inicio:inicio + filas_por_bloque])
+
+
+def columnas_union(plan):
+    """Columnas del resultado de la unión, en orden, y sus tipos columnares."""
+    tipos = tipos_columnares(plan["df1"])
+    for parte in plan["partes"]:
+        datos = parte["datos"]
+        if not parte["expandir"]:
+            datos = datos.reset_index()
+        tipos.update({
+            c: t for c, t in tipos_columnares(datos, anulables=True).items()
+            if c != plan["col_id"]
+        })
+
+    # Mismo orden que `unir_bloque`: reindex primero, merges al final
+    orden = list(plan["df1"].columns)
+    for parte in sorted(plan["partes"], key=lambda p: p["expandir"]):
+        datos = parte["datos"] if parte["expandir"] else parte["datos"].reset_index()
+        orden += [c for c in datos.columns if c != plan["col_id"]]
+
+    return {c: tipos[c] for c in orden}
+
+
+def unir_dataset(df1: pd.DataFrame, df2, estrategia_duplicados: str = "permitir", col_id: str = "ID"):
+    """
+    Une df1 con una o varias Síntesis (`df2`: DataFrame, lista o dict
+    {nombre: DataFrame}) utilizando la columna 'ID'.
+    - Mantiene todas las filas de df1 (LEFT JOIN).
+    - Incluye todas las columnas de df1 y todas las de cada Síntesis; las
+      columnas repetidas (p. ej. "Estado") se renombran "<columna> (<nombre>)".
+    - IDs sin coincidencia en df2 quedan con NaN.
+
+    Con IDs únicos (o colapsados con `estrategia_duplicados`) la unión es un
+    reindex posicional sobre el índice de ID, sin merge. Para exportar sin
+    materializar el resultado completo, ver `exportar_union_por_bloques`.
+
+    Retorna:
+        df_unido, o None si la unión no es posible
+    """
+    plan = preparar_union(df1, df2, estrategia_duplicados, col_id)
+    if plan is None:
+        return None
+
+    logs = ["📥 Realizando unión LEFT (df1 como principal)..."]
+
+    df_unido = unir_bloque(plan, df1)
+
+    logs.append(f"📁 Unión completada: {df_unido.shape[0]} filas – {df_unido.shape[1]} columnas")
+    logs.append(f"🆕 Columnas agregadas desde df2: {df_unido.shape[1] - df1.shape[1]}")
     logs.append("✅ Unión de datasets finalizada correctamente.")
 
     print("\n".join(logs))
     return df_unido
 
 
-def exportar_union(df_unido, ruta_salida, nombre="Union"):
+def exportar_union_por_bloques(plan, ruta_salida, nombre="Union", formatos=None, perfil_excel="clasico",
+                               destino=None, filas_por_bloque=5000):
     """
-    Exporta un único archivo Excel con el DataFrame unido y hojas según Estado,
-    respetando el estilo de logs utilizado en las otras funciones del proyecto.
+    Exporta la unión descrita por `plan` (ver `preparar_union`) SIN
+    materializar el DataFrame unido: df1 se recorre en bloques, las columnas
+    de df2 se buscan en el índice de ID y cada bloque se escribe de
+    inmediato en todas las salidas.
 
-    Hojas generadas:
-        - "Dataset Unificado"
-        - "Dataset Unificado (ESTADO)"  → por cada estado
-
-    Parámetros:
-        df_unido:  DataFrame ya unido por 'unir_dataset'
-        ruta_salida: carpeta donde se guardará el archivo
-        nombre: nombre base del archivo Excel (sin extensión)
+    - Excel: libro openpyxl en modo write_only. La hoja "Dataset Unificado"
+      y (perfil "clasico") las hojas "Dataset (ESTADO)" reciben sus filas
+      intercaladas a medida que llegan los bloques; en el perfil "tabla" la
+      hoja "Resumen Estado" se arma con conteos acumulados.
+    - Parquet/Feather/CSV: un escritor por formato que agrega bloque a bloque.
 
     Retorna:
         logs: lista con todos los mensajes generados
     """
 
-    os.makedirs(ruta_salida, exist_ok=True)
+    destino = destino if destino is not None else DestinoCarpeta(ruta_salida)
+    formatos = normalizar_formatos(formatos)
+    perfil_excel = normalizar_perfil_excel(perfil_excel)
 
     logs = []
 
@@ -96,45 +294,131 @@ def exportar_union(df_unido, ruta_salida, nombre="Union"):
         return str(nombre).strip()
 
     nombre_sanit = sanitizar(nombre)
-    archivo_excel = os.path.join(ruta_salida, f"{nombre_sanit}.xlsx")
-
-    logs.append("🔗 Iniciando exportación de dataset unificado...")
-
-    # -----------------------------------------------------
-    # Validación
-    # -----------------------------------------------------
-    if not isinstance(df_unido, pd.DataFrame):
-        logs.append("❌ df_unido no es un DataFrame válido.")
-        print("\n".join(logs))
-        return logs
+    tipos = columnas_union(plan)
+    columnas = list(tipos)
+
+    logs.append("🔗 Iniciando exportación de dataset unificado (por bloques)...")
+    logs.append(f"📊 Filas df1: {len(plan['df1'])}, Columnas: {len(columnas)}")
+
+    with ExitStack() as pila:
+
+        # -----------------------------------------------------
+        # Escritores columnares (uno por formato)
+        # -----------------------------------------------------
+        escritores = [
+            pila.enter_context(escritor_por_bloques(destino, f"{nombre_sanit}.{formato}", formato, tipos))
+            for formato in formatos_columnares(formatos)
+        ]
+
+        # -----------------------------------------------------
+        # Libro Excel en modo write_only
+        # -----------------------------------------------------
+        libro = None
+        if "xlsx" in formatos:
+            f_excel = pila.enter_context(destino.abrir(f"{nombre_sanit}.xlsx"))
+            libro = Workbook(write_only=True)
+            hoja_principal = HojaPorBloques(libro, "Dataset Unificado", columnas, perfil_excel)
+
+        hojas_estado = {}
+        hojas_usadas = {"dataset unificado", "resumen estado"}
+        conteo_estados = None
+        filas = 0
+
+        # -----------------------------------------------------
+        # 🔁 Recorrer df1 por bloques
+        # -----------------------------------------------------
+        bloques = len(range(0, max(len(plan["df1"]), 1), filas_por_bloque))
+        for bloque in recorrer(iterar_union(plan, filas_por_bloque), "union", total=bloques, filas=len):
+            bloque = bloque.reindex(columns=columnas)
+            filas += len(bloque)
+
+            for escribir in escritores:
+                escribir(bloque)
+
+            if libro is None:
+                continue
+
+            hoja_principal.agregar(bloque)
+
+            if "Estado" not in bloque.columns:
+                continue
+
+            # 📊 Perfil tabla: conteos acumulados por Estado
+            if perfil_excel == "tabla":
+                conteo = contar_estados(bloque)
+                conteo_estados = conteo if conteo_estados is None else conteo_estados.add(conteo, fill_value=0)
+
+            # 🟦 Perfil clasico: filas a su hoja por ESTADO (creada al primer uso)
+            else:
+                for estado, df_estado in bloque.groupby("Estado", sort=False):
+                    if estado not in hojas_estado:
+                        hoja = nombre_hoja_unico(f"Dataset ({sanitizar(str(estado))})", hojas_usadas)
+                        hojas_estado[estado] = HojaPorBloques(libro, hoja, columnas, perfil_excel)
+                    hojas_estado[estado].agregar(df_estado)
+
+        if libro is not None:
+            tablas_usadas = set()
+
+            if hojas_estado:
+                logs.append(f"📌 Estados detectados: {len(hojas_estado)}")
+
+            if conteo_estados is not None:
+                resumen = (
+                    conteo_estados.astype(int)
+                    .sort_values(ascending=False, kind="stable")
+                    .reset_index(name="Cantidad")
+                )
+                resumen.insert(0, "Hoja", "Dataset Unificado")
+                hoja_resumen = HojaPorBloques(libro, "Resumen Estado", resumen.columns, "tabla")
+                hoja_resumen.agregar(resumen)
+                hoja_resumen.cerrar(tablas_usadas)
+
+            for hoja in [hoja_principal] + list(hojas_estado.values()):
+                hoja.cerrar(tablas_usadas)
+
+            libro.save(f_excel)
+
+    for formato in formatos_columnares(formatos):
+        logs.append(f"📁 Archivo generado: {destino.ruta(f'{nombre_sanit}.{formato}')}")
+    if libro is not None:
+        logs.append(f"📁 Archivo generado: {destino.ruta(f'{nombre_sanit}.xlsx')}")
+
+    logs.append(f"📁 Filas exportadas: {filas}")
+    logs.append("✅ Exportación del dataset unificado completada.")
 
-    logs.append(f"📊 Filas: {df_unido.shape[0]}, Columnas: {df_unido.shape[1]}")
+    print("\n".join(logs))
+    return logs
 
-    # -----------------------------------------------------
-    # Crear EXCEL
-    # -----------------------------------------------------
-    with pd.ExcelWriter(archivo_excel, engine="openpyxl") as writer:
 
-        # ----------------------------------
-        # 🟦 Hoja principal
-        # ----------------------------------
-        df_unido.to_excel(writer, sheet_name="Dataset Unificado", index=False)
+def exportar_union(df_unido, ruta_salida, nombre="Union", formatos=None, perfil_excel="clasico", destino=None):
+    """
+    Exporta un único archivo Excel con el DataFrame unido y hojas según Estado,
+    respetando el estilo de logs utilizado en las otras funciones del proyecto.
 
-        # ----------------------------------
-        # 🟦 Hojas por ESTADO
-        # ----------------------------------
-        if "Estado" in df_unido.columns:
-            estados = df_unido["Estado"].dropna().unique()
+    Hojas generadas:
+        - "Dataset Unificado"
+        - "Dataset Unificado (ESTADO)"  → por cada estado
 
-            logs.append(f"📌 Estados detectados: {len(estados)}")
+    Parámetros:
+        df_unido:  DataFrame ya unido por 'unir_dataset'
+        ruta_salida: carpeta donde se guardará el archivo
+        nombre: nombre base del archivo Excel (sin extensión)
+        formatos: "xlsx" y/o "parquet", "feather", "csv" (mismo nombre base)
+        perfil_excel: "clasico" (hojas por Estado) o "tabla" (una Tabla de
+            Excel con autofiltro + hoja "Resumen Estado")
+        destino: salida alternativa a la carpeta (p. ej. `DestinoZip`)
 
-            for estado in estados:
-                df_estado = df_unido[df_unido["Estado"] == estado]
-                hoja = f"Dataset ({sanitizar(str(estado))})"
-                df_estado.to_excel(writer, sheet_name=hoja[:31], index=False)
+    Usa el mismo escritor por bloques que `exportar_union_por_bloques`, así
+    las hojas por Estado no se copian como DataFrames intermedios.
 
-    logs.append(f"📁 Archivo generado: {archivo_excel}")
-    logs.append("✅ Exportación del dataset unificado completada.")
+    Retorna:
+        logs: lista con todos los mensajes generados
+    """
+    if not isinstance(df_unido, pd.DataFrame):
+        logs = ["❌ df_unido no es un DataFrame válido."]
+        print("\n".join(logs))
+        return logs
 
-    print("\n".join(logs))
-    return logs
+    plan = {"df1": df_unido, "col_id": None, "partes": []}
+    return exportar_union_por_bloques(plan, ruta_salida, nombre=nombre, formatos=formatos,
+                                      perfil_excel=perfil_excel, destino=destino)
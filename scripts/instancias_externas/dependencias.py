@@ -1,6 +1,12 @@
-import os
 import pandas as pd
 
+from scripts.comun.salida import DestinoCarpeta
+from scripts.comun.progreso import recorrer
+from scripts.comun.excel import normalizar_perfil_excel, escribir_hoja_excel
+from scripts.comun.formatos import (
+    normalizar_formatos, formatos_columnares, columnas_particiones, escribir_particion
+)
+
 
 def obtener_dependencias(df: pd.DataFrame, col_index: int = 8):
     """
@@ -40,26 +46,54 @@ def dividir_por_dependencia(df: pd.DataFrame, col_index: int = 8):
 
 
 
-def exportar_dependencias(dfs, ruta_salida, seleccionadas=None):
+def exportar_dependencias(dfs, ruta_salida, seleccionadas=None, bitacora=None, formatos=None,
+                          perfil_excel="clasico", destino=None):
     """
     Exporta los DataFrames en archivos Excel según la selección indicada.
+    Escritura atómica; con `bitacora` se saltan las dependencias ya exportadas.
+    `formatos` agrega o reemplaza el Excel por Parquet/Feather/CSV particionados.
+    `perfil_excel="tabla"` guarda la hoja como Tabla de Excel con autofiltro.
+    `destino` (p. ej. `DestinoZip`) reemplaza la carpeta `ruta_salida`.
     """
     log = []  # 🔵 acumulador de logs
 
-    os.makedirs(ruta_salida, exist_ok=True)
+    destino = destino if destino is not None else DestinoCarpeta(ruta_salida)
+    formatos = normalizar_formatos(formatos)
+    columnares = formatos_columnares(formatos)
+    perfil_excel = normalizar_perfil_excel(perfil_excel)
+
+    if bitacora is not None and destino.limpiar_temporales():
+        log.append("🧹 Temporales de una ejecución interrumpida eliminados.")
 
     # Aplicar filtro si corresponde
     if seleccionadas is not None:
         dfs = {k: v for k, v in dfs.items() if k in seleccionadas}
 
-    for nombre, df in dfs.items():
+    columnas = columnas_particiones(dfs) if columnares else None
+
+    for nombre, df in recorrer(dfs.items(), "excel", filas=lambda par: len(par[1]), detalle=lambda par: par[0]):
         archivo = f"{nombre.replace('/', '_').replace(' ', '_')}.xlsx"
-        ruta = os.path.join(ruta_salida, archivo)
+        ruta = destino.ruta(archivo)
+
+        if bitacora is not None and bitacora.completada("excel", nombre):
+            log.append(f"⏭ Ya exportado: {ruta}")
+            continue
+
+        for formato in columnares:
+            escribir_particion(destino, formato, "instancias_externas", df, nombre, columnas=columnas)
+
+        if "xlsx" in formatos:
+            with destino.abrir(archivo) as f, pd.ExcelWriter(f, engine="openpyxl") as writer:
+                escribir_hoja_excel(writer, df, "Sheet1", perfil_excel)
+
+        if bitacora is not None:
+            bitacora.registrar("excel", nombre)
 
-        df.to_excel(ruta, index=False)
         log.append(f"📁 Guardado: {ruta}")
 
+    if bitacora is not None:
+        bitacora.finalizar("excel")
+
     log.append("\n✅ Exportación finalizada correctamente.")
 
     print("\n".join(log))  # 🔵 único print final
-
@@ -0,0 +1,146 @@
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from scripts.comun.cubo import NIVELES, construir_cubo, acumular, conteo_medida
+from scripts.instancias_externas.multivalor import COL_TIPO, COL_AMBITOS, COL_ODS, tabla_de_particion
+
+
+# ============================================================
+# 📌 Columnas usadas por los gráficos de Instancias Externas
+# ============================================================
+COL_SEDE = "Sede a la que Pertenece"
+
+# Grupos de conteos que puede pedir una sección del informe (`grupos`):
+# - sedes:         registros por sede (una por cada sede listada con ";")
+# - participacion: registros por Tipo de Participación
+# - ambitos / ods: valores de la columna multivalor por Tipo de Participación
+# `total` se cuenta siempre. `grupos=None` = todos.
+GRUPOS_MEDIDAS = ("sedes", "participacion", "ambitos", "ods")
+
+_COLUMNAS_TORTAS = {"ambitos": COL_AMBITOS, "ods": COL_ODS}
+
+
+def _grupos(grupos):
+    return set(GRUPOS_MEDIDAS) if grupos is None else set(grupos)
+
+
+def columna_participacion(df):
+    """Primera columna de Tipo de Participación, o None."""
+    return next((c for c in df.columns if COL_TIPO in c), None)
+
+
+def sedes_por_registro(df):
+    """Sedes de cada registro (explotadas por ";" y en formato título)."""
+    sedes = df[COL_SEDE].astype(str)
+    sedes = sedes.str.split(';').explode().str.strip()
+    sedes = sedes[sedes != '']
+    sedes = sedes.dropna()
+    return sedes.str.title()
+
+
+# ============================================================
+# 🧊 Medidas para el cubo (scripts.comun.cubo)
+# ============================================================
+def _valores_por_tipo(df, grupo, tablas):
+    """
+    [(f"{grupo}|{tipo}", valores)] de la columna multivalor de `grupo`,
+    desde su tabla larga (sin volver a explotar), en el orden de la tabla.
+    """
+    tabla = tabla_de_particion(df, _COLUMNAS_TORTAS[grupo], tablas)
+    en_particion = np.flatnonzero(pd.Index(tabla["filas"]).isin(df.index))
+    filas = tabla["filas"][en_particion]
+
+    categorias = np.asarray(tabla["categorias"], dtype=object)
+    valores = pd.Series(categorias[tabla["codigos"][en_particion]], index=filas, dtype=object)
+    tipo_por_valor = df[COL_TIPO].reindex(filas).to_numpy()
+
+    return [
+        (f"{grupo}|{tipo}", valores[tipo_por_valor == tipo])
+        for tipo in df[COL_TIPO].dropna().unique()
+    ]
+
+
+def medir_instancias(df, grupos=None, tablas=None):
+    """
+    Medidas de una partición en formato [(medida, valores)] para
+    `construir_cubo`: cada elemento de `valores` cuenta 1. Mismos criterios
+    que los gráficos. `tablas`: tablas largas de `tablas_multivalor`.
+    """
+    grupos = _grupos(grupos)
+    medidas = [("total", pd.Series("Total", index=df.index, dtype=object))]
+
+    if "sedes" in grupos and COL_SEDE in df.columns:
+        medidas.append(("sede", sedes_por_registro(df)))
+
+    col_part = columna_participacion(df) if "participacion" in grupos else None
+    if col_part:
+        medidas.append(("participacion", df[col_part].dropna().astype(str).str.strip()))
+
+    tortas = [g for g in _COLUMNAS_TORTAS if g in grupos and _COLUMNAS_TORTAS[g] in df.columns]
+    if tortas and COL_TIPO in df.columns:
+        medidas.append(("tipo", df[COL_TIPO].dropna().astype(str)))
+        for grupo in tortas:
+            medidas.extend(_valores_por_tipo(df, grupo, tablas))
+
+    return medidas
+
+
+def conteos_desde_cubo(cubo):
+    """
+    Conteos de los gráficos sumando las filas de `cubo` (ya filtrado a una
+    partición, una dependencia o toda la institución):
+
+        {"total": int,
+         "sedes": DataFrame Sede / Cantidad o None,
+         "participacion": Serie o None,
+         "ambitos" / "ods": {tipo: Serie} (tipos en orden alfabético),
+         "sin_ambitos" / "sin_ods": [tipos sin valores]}
+
+    Cada Serie va de mayor a menor, con los empates por primera aparición.
+    """
+    total = conteo_medida(cubo, "total")
+    conteos = {"total": int(total.sum()) if total is not None else 0}
+
+    sedes = conteo_medida(cubo, "sede")
+    conteos["sedes"] = None if sedes is None else pd.DataFrame(
+        {"Sede": sedes.index.to_numpy(), "Cantidad": sedes.to_numpy()}
+    )
+    conteos["participacion"] = conteo_medida(cubo, "participacion")
+
+    tipos = conteo_medida(cubo, "tipo")
+    tipos = sorted(tipos.index) if tipos is not None else []
+    for grupo in _COLUMNAS_TORTAS:
+        por_tipo = {tipo: conteo_medida(cubo, f"{grupo}|{tipo}") for tipo in tipos}
+        conteos[grupo] = {tipo: c for tipo, c in por_tipo.items() if c is not None}
+        conteos[f"sin_{grupo}"] = [tipo for tipo, c in por_tipo.items() if c is None]
+
+    return conteos
+
+
+def conteos_por_nivel(cubo, nivel="dependencia"):
+    """
+    Conteos de cada grupo de `nivel` a partir del cubo, sin releer filas:
+
+    - "subdependencia" → {(dependencia, subdependencia): conteos}
+    - "dependencia"    → {dependencia: conteos}
+    - "institucion"    → conteos del total
+    """
+    acumulado = acumular(cubo, nivel)
+    claves = NIVELES[nivel]
+
+    if not claves:
+        return conteos_desde_cubo(acumulado)
+
+    por_clave = claves if len(claves) > 1 else claves[0]
+    return {
+        clave: conteos_desde_cubo(grupo)
+        for clave, grupo in acumulado.groupby(por_clave, sort=False)
+    }
+
+
+def calcular_conteos(df, grupos=None, tablas=None):
+    """Conteos de un DataFrame suelto (sin cubo previo), mismo formato que `conteos_desde_cubo`."""
+    cubo = construir_cubo({"": df}, partial(medir_instancias, grupos=grupos, tablas=tablas))
+    return conteos_desde_cubo(cubo)
@@ -1,18 +1,31 @@
-import os
 import io
+import time
+from functools import partial
 import matplotlib.pyplot as plt
-import textwrap
 import numpy as np
 import pandas as pd
 import unicodedata
 import matplotlib.gridspec as gridspec
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, KeepTogether
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, KeepTogether
+
+from scripts.comun.salida import DestinoCarpeta
+from scripts.comun.cache_graficos import render_cacheado
+from scripts.comun.render import guardar_figura, imagen_pdf, configurar_perfil_render, configurar_compresion_pdf
+from scripts.comun.pool_graficos import enviar, en_serie, en_ventana, en_orden
+from scripts.comun.progreso import recorrer
+from scripts.comun.flowables import torta_con_leyenda, tabla_larga
+from scripts.comun.informe import ESTILOS, OPCIONES_PDF, construir_informe
+from scripts.comun.secciones import (
+    Seccion, resolver_secciones, medidas_requeridas, encolar_graficos, preparar_datos, dibujar_secciones
+)
+from scripts.comun.cubo import construir_cubo
+from scripts.instancias_externas.multivalor import (
+    COL_AMBITOS, COL_ODS, COLUMNAS_MULTIVALOR, tablas_multivalor, conteos_por_grupo
+)
+from scripts.instancias_externas.estadisticas import (
+    medir_instancias, conteos_por_nivel, calcular_conteos
 )
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from reportlab.lib import colors
 
 
 # ================================================================
@@ -34,21 +47,13 @@ def normalizar_columna(nombre):
 # ================================================================
 # 📊 Gráfico de conteo por sede
 # ================================================================
-def graficar_conteo_sedes(df):
-    """Genera gráfico de conteo por Sede y devuelve BytesIO con la imagen (png)."""
-    if 'Sede a la que Pertenece' not in df.columns:
-        return None
-
-    sedes = df['Sede a la que Pertenece'].astype(str)
-    sedes = sedes.str.split(';').explode().str.strip()
-    sedes = sedes[sedes != '']
-    sedes = sedes.dropna()
-    sedes = sedes.str.title()
-
-    conteo = sedes.value_counts().reset_index()
-    conteo.columns = ['Sede', 'Cantidad']
-
-    if conteo.empty:
+@render_cacheado(version=2)
+def graficar_conteo_sedes(conteo):
+    """
+    Genera gráfico de conteo por Sede (tabla Sede / Cantidad, ver
+    `conteos_desde_cubo`) y devuelve BytesIO con la imagen (png).
+    """
+    if conteo is None:
         return None
 
     fig = plt.figure(figsize=(10, 7))
@@ -74,10 +79,7 @@ def graficar_conteo_sedes(df):
     tabla.set_fontsize(9)
 
     plt.tight_layout()
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png', bbox_inches='tight')
-    plt.close(fig)
-    buffer.seek(0)
+    buffer = guardar_figura(fig)
     return buffer
 
 
@@ -86,7 +88,8 @@ def graficar_conteo_sedes(df):
 # ================================================================
 def graficar_participacion(dataset, dependencia=None, subdependencia=None):
     """
-    Genera un gráfico de torta con tabla resumen debajo con texto legible.
+    Torta de Tipos de Participación con su tabla resumen debajo, como
+    flowables de ReportLab (ver `torta_con_leyenda`).
     """
 
     # 🧩 Determinar el DataFrame correcto
@@ -112,6 +115,15 @@ def graficar_participacion(dataset, dependencia=None, subdependencia=None):
         print("⚠ Tipo de dataset no reconocido.")
         return None
 
+    conteo = conteo_participacion(df)
+    if conteo is None:
+        return None
+
+    return torta_participacion(conteo, dependencia, subdependencia)
+
+
+def conteo_participacion(df):
+    """Cantidad de registros por Tipo de Participación, o None si no hay datos."""
     # 🔎 Columna de participación
     col_part = next((c for c in df.columns if "Tipo de Participación" in c), None)
     if not col_part:
@@ -124,93 +136,30 @@ def graficar_participacion(dataset, dependencia=None, subdependencia=None):
         print("⚠ No hay valores válidos en la columna de participación.")
         return None
 
-    # 🥧 Gráfico de torta (AUMENTO tamaños de texto)
-    fig, ax = plt.subplots(figsize=(10, 10))  # FIGURA MÁS GRANDE
-    wedges, texts, autotexts = ax.pie(
-        conteo.values,
-        autopct='%1.1f%%',
-        startangle=90,
-        shadow=True,
-        textprops={'fontsize': 14}  # TEXTO MÁS GRANDE
-    )
+    return conteo
 
-    # autopct legible
-    for t in autotexts:
-        t.set_fontsize(14)
 
+def torta_participacion(conteo, dependencia=None, subdependencia=None):
+    """Flowables de la torta de participación a partir de su conteo."""
     titulo = f"Distribución de Participación ({dependencia or 'Todos los datos'}" \
               + (f" / {subdependencia}" if subdependencia else "") + ")"
-    ax.set_title(titulo, pad=25, fontsize=18)  # TÍTULO MÁS GRANDE
-    ax.axis('equal')
-
-    # 🎨 Tabla resumen
-    colores = [w.get_facecolor() for w in wedges]
-    porcentajes = (conteo / conteo.sum() * 100).round(1).astype(str) + '%'
-
-    resumen = pd.DataFrame({
-        "Color": ["■"] * len(conteo),
-        "Participación": conteo.index,
-        "Cantidad": conteo.values,
-        "Porcentaje": porcentajes.values
-    })
-
-    # Envolver texto
-    resumen["Participación"] = [
-        textwrap.fill(str(texto), width=40) for texto in resumen["Participación"]
-    ]
 
-    # Contar líneas
-    line_counts = [t.count("\n") + 1 for t in resumen["Participación"]]
-    max_lines = max(line_counts)
+    return torta_con_leyenda(conteo, titulo, "Participación", width=460)
 
-    # MÁS ESPACIO PARA LA TABLA
-    plt.subplots_adjust(bottom=0.40 + 0.03 * max_lines)
 
-    # TABLA (FUENTE MÁS GRANDE)
-    tabla = plt.table(
-        cellText=resumen.values,
-        colLabels=resumen.columns,
-        cellLoc='center',
-        loc='bottom'
-    )
+# ================================================================
+# 📈 Gráfico de Gantt (solo gráfico)
+# ================================================================
+COL_INICIO_GANTT = "Fecha de inicio de participación en la actividad"
+COL_FIN_GANTT = "Fecha de término de participación en la actividad"
 
-    tabla.auto_set_font_size(False)
-    tabla.set_fontsize(12)   # LETRA MÁS GRANDE
-
-    # Pintar columna color
-    for i, color in enumerate(colores, start=1):
-        tabla[(i, 0)].set_facecolor(color)
-        tabla[(i, 0)]._text.set_text("")
-
-    # Anchos de columna
-    col_widths = [0.08, 0.55, 0.18, 0.19]
-    for j, width in enumerate(col_widths):
-        for key, cell in tabla.get_celld().items():
-            if key[1] == j:
-                cell.set_width(width)
-                cell.set_text_props(wrap=True, ha='center', va='center')
-
-    # Alturas (más grande para evitar aplastamiento)
-    base_height = 0.07  # ANCHO MAYOR
-    for i, lines in enumerate(line_counts, start=1):
-        row_height = base_height * min(lines, 10)  # PERMITE MÁS LÍNEAS
-        for j in range(len(resumen.columns)):
-            cell = tabla.get_celld().get((i, j))
-            if cell:
-                cell.set_height(row_height)
-
-    # Guardar imagen nítida
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png', dpi=200, bbox_inches='tight')  # DPI MÁS ALTO
-    plt.close(fig)
-    buffer.seek(0)
 
-    return buffer
+def columnas_gantt(df):
+    """Solo las columnas que usa el Gantt (Id y fechas): es lo que viaja al pool."""
+    return df[[col for col in ("Id", COL_INICIO_GANTT, COL_FIN_GANTT) if col in df.columns]]
 
 
-# ================================================================
-# 📈 Gráfico de Gantt (solo gráfico)
-# ================================================================
+@render_cacheado(version=1)
 def graficar_gantt(dataset, dependencia=None, subdependencia=None):
     """
     Genera gráfico de Gantt y devuelve BytesIO con la imagen (png).
@@ -242,8 +191,8 @@ def graficar_gantt(dataset, dependencia=None, subdependencia=None):
     # -------------------------------------------------------
     # 📌 Nombres EXACTOS de las columnas (sin normalización)
     # -------------------------------------------------------
-    col_inicio = "Fecha de inicio de participación en la actividad"
-    col_fin    = "Fecha de término de participación en la actividad"
+    col_inicio = COL_INICIO_GANTT
+    col_fin    = COL_FIN_GANTT
 
     # --------------------------
     # ❌ Validación de columnas
@@ -302,10 +251,7 @@ def graficar_gantt(dataset, dependencia=None, subdependencia=None):
     # ---------------------
     # 💾 Guardar a buffer
     # ---------------------
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format="png", bbox_inches="tight")
-    plt.close(fig)
-    buffer.seek(0)
+    buffer = guardar_figura(fig)
 
     return buffer
 
@@ -314,9 +260,12 @@ def graficar_gantt(dataset, dependencia=None, subdependencia=None):
 # ================================================================
 # 🧾 Tabla resumen (separada del gráfico)
 # ================================================================
-def crear_tabla_resumen(dataset):
-    """Crea una tabla resumen con ajuste automático de texto y ancho limitado."""
-    
+def datos_tabla_resumen(dataset):
+    """
+    Columnas de la tabla resumen ya formateadas (texto, numeradas y con
+    nombres amigables), o None si no hay ninguna.
+    """
+
     # Columnas esperadas y sus nombres amigables
     columnas_originales = {
         "Id": "Id",
@@ -346,187 +295,68 @@ def crear_tabla_resumen(dataset):
     # Renombrar columnas
     df_mostrar.rename(columns=columnas_existentes, inplace=True)
 
-    # --- 🔤 Preparar estilos para texto ajustable ---
-    estilo_celda = ParagraphStyle(
-        name='TablaTexto',
-        alignment=TA_LEFT,
-        fontSize=7,
-        leading=8,
-        wordWrap='CJK'  # ← activa el ajuste de texto largo
-    )
+    return df_mostrar
+
+
+PROPORCIONES_TABLA_RESUMEN = [0.5, 1.0, 2.2, 2.0, 2.0, 1.5]
 
-    estilo_encabezado = ParagraphStyle(
-        name='Encabezado',
-        alignment=TA_CENTER,
-        fontSize=8,
-        leading=9,
-        textColor=colors.black,
-        spaceAfter=2,
-        wordWrap='CJK'
+
+def crear_tabla_resumen(dataset):
+    """Crea una tabla resumen (LongTable) con ajuste automático de texto y ancho limitado."""
+    df_mostrar = datos_tabla_resumen(dataset)
+    if df_mostrar is None:
+        return None
+    return tabla_larga(df_mostrar, PROPORCIONES_TABLA_RESUMEN)
+
+def graficar_torta_ambitos(tipo, conteo):
+    """Torta + tabla de Ámbitos Estratégicos de un Tipo de Participación (`conteo`: valor → cantidad)."""
+    return torta_con_leyenda(
+        conteo, f"Distribución de Ámbitos Estratégicos ({tipo})", "Ámbito Estratégico", width=400
     )
 
-    # --- Convertir a lista de listas (con Paragraph para permitir salto de línea) ---
-    encabezados = [Paragraph(str(col), estilo_encabezado) for col in df_mostrar.columns]
-    filas = [
-        [Paragraph(str(c), estilo_celda) for c in fila]
-        for fila in df_mostrar.values.tolist()
-    ]
 
-    tabla_datos = [encabezados] + filas
-
-    # --- 🧱 Crear tabla ---
-    tabla = Table(tabla_datos, repeatRows=1)
-
-    # --- 🎨 Estilos visuales ---
-    tabla_estilo = TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('GRID', (0, 0), (-1, -1), 0.25, colors.gray),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.lightgrey]),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('LEFTPADDING', (0, 0), (-1, -1), 3),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-    ])
-    tabla.setStyle(tabla_estilo)
-
-    # --- 📏 Ajustar ancho máximo de columnas (evita que se salga de la hoja) ---
-    total_ancho = 500  # ~ancho útil en A4 vertical con márgenes
-    col_proporciones = [0.5, 1.0, 2.2, 2.0, 2.0, 1.5]
-    col_widths = [total_ancho * (p / sum(col_proporciones)) for p in col_proporciones[:len(df_mostrar.columns)]]
-    tabla._argW = col_widths
-
-    return tabla
-
-def generar_grafico_ambitos(dataset):
+def conteos_tortas(dataset, columna, tablas=None, columna_tipo="Tipo de Participación"):
     """
-    Genera gráficos de torta con porcentajes dentro del gráfico
-    y tabla inferior con texto legible. Sin labels externos.
+    {tipo: conteo} de `columna` (ámbitos u ODS) por Tipo de Participación,
+    sin los tipos vacíos. Conteos desde la tabla larga (sin explotar por grupo).
     """
-
-    columna_tipo = "Tipo de Participación"
-    columna_ambitos = "Ámbitos Estratégicos que Aborda la Actividad"
-
-    if columna_tipo not in dataset.columns or columna_ambitos not in dataset.columns:
+    if columna_tipo not in dataset.columns or columna not in dataset.columns:
         print("❌ No existen las columnas necesarias en el dataset.")
         return {}
 
-    resultados = {}
+    etiqueta = "ODS " if "ODS" in columna else ""
+    conteos = {}
+    for tipo, conteo in conteos_por_grupo(dataset, columna, columna_tipo, tablas).items():
+        if conteo.empty:
+            print(f"⚠ Sin datos {etiqueta}para '{tipo}'")
+            continue
+        conteos[tipo] = conteo
+    return conteos
+
 
-    for tipo, df_tipo in dataset.groupby(columna_tipo):
+def generar_grafico_ambitos(dataset, tablas=None):
+    """
+    Genera tortas con porcentajes dentro del gráfico y tabla inferior
+    (ReportLab) por Tipo de Participación: {tipo: [flowables]}.
 
-        ambitos_expandidos = (
-            df_tipo[columna_ambitos]
-            .dropna()
-            .str.split(";")
-            .explode()
-            .str.strip()
-        )
+    `tablas`: tablas largas de `tablas_multivalor` (opcional); si no
+    cubren las filas de `dataset`, la columna se explota aquí.
+    """
 
-        ambitos_expandidos = ambitos_expandidos[ambitos_expandidos != ""]
-        ambitos_expandidos = ambitos_expandidos.dropna()
+    columna_tipo = "Tipo de Participación"
+    columna_ambitos = "Ámbitos Estratégicos que Aborda la Actividad"
 
-        if ambitos_expandidos.empty:
-            print(f"⚠ Sin datos para '{tipo}'")
-            continue
+    conteos = conteos_tortas(dataset, columna_ambitos, tablas, columna_tipo)
+    return {tipo: graficar_torta_ambitos(tipo, conteo) for tipo, conteo in conteos.items()}
+
+def graficar_torta_ods(tipo, conteo):
+    """Torta + tabla de ODS de un Tipo de Participación (`conteo`: valor → cantidad)."""
+    return torta_con_leyenda(
+        conteo, f"Distribución de ODS Apoyados ({tipo})", "ODS", width=400
+    )
 
-        conteo = ambitos_expandidos.value_counts()
-        porcentajes = (conteo / conteo.sum() * 100).round(1).astype(str) + "%"
-
-        # --- FIGURA MÁS GRANDE PARA EVITAR APLASTAMIENTO ---
-        fig, ax = plt.subplots(figsize=(10, 11))
-
-        wedges, texts, autotexts = ax.pie(
-            conteo.values,
-            labels=None,              # ❌ SIN LABELS
-            autopct="%1.1f%%",
-            startangle=90,
-            textprops={'fontsize': 14}  # ✔ Porcentajes más grandes
-        )
-
-        # Fuente del porcentaje
-        for t in autotexts:
-            t.set_fontsize(14)
-
-        # ✔ Título más grande y con suficiente espacio
-        ax.set_title(
-            f"Distribución de Ámbitos Estratégicos\n({tipo})",
-            pad=30,
-            fontsize=18
-        )
-
-        ax.axis("equal")
-
-        # --- Tabla resumen ---
-        colores = [w.get_facecolor() for w in wedges]
-
-        tabla_df = pd.DataFrame({
-            "Color": ["■"] * len(conteo),
-            "Ámbito Estratégico": conteo.index.astype(str),
-            "Cantidad": conteo.values,
-            "Porcentaje": porcentajes.values
-        })
 
-        # Envolver texto largo
-        tabla_df["Ámbito Estratégico"] = [
-            textwrap.fill(v, width=38) for v in tabla_df["Ámbito Estratégico"]
-        ]
-
-        # Contar líneas
-        line_counts = [
-            t.count("\n") + 1 for t in tabla_df["Ámbito Estratégico"]
-        ]
-        max_lines = max(line_counts)
-
-        # ✔ MÁS ESPACIO PARA LA TABLA SIN EXPLOTAR PÁGINA
-        plt.subplots_adjust(bottom=0.30 + 0.025 * max_lines)
-
-        tabla = plt.table(
-            cellText=tabla_df.values,
-            colLabels=tabla_df.columns,
-            cellLoc='center',
-            loc='bottom'
-        )
-
-        tabla.auto_set_font_size(False)
-        tabla.set_fontsize(12)  # ✔ Texto de la tabla más legible
-
-        # Pintar columna color
-        for i, color in enumerate(colores, start=1):
-            cell = tabla[(i, 0)]
-            cell.set_facecolor(color)
-            cell._text.set_text("")
-
-        # Anchos de columna
-        col_widths = [0.07, 0.60, 0.15, 0.18]
-        for j, width in enumerate(col_widths):
-            for key, cell in tabla.get_celld().items():
-                if key[1] == j:
-                    cell.set_width(width)
-
-        # Alturas dinámicas
-        base_height = 0.07
-        for i, lines in enumerate(line_counts, start=1):
-            row_height = base_height * min(lines, 8)
-            for j in range(len(tabla_df.columns)):
-                cell = tabla.get_celld().get((i, j))
-                if cell:
-                    cell.set_height(row_height)
-
-        # Guardar gráfica
-        buffer_img = io.BytesIO()
-        plt.savefig(buffer_img, format="png", dpi=200, bbox_inches="tight")
-        plt.close(fig)
-        buffer_img.seek(0)
-
-        resultados[tipo] = buffer_img
-
-    return resultados
-
-def generar_grafico_ods(dataset):
+def generar_grafico_ods(dataset, tablas=None):
     """
     Genera gráficos de torta que muestran la distribución porcentual de:
     
@@ -534,136 +364,266 @@ def generar_grafico_ods(dataset):
     
     por cada Tipo de Participación.
     
+    `tablas`: igual que en `generar_grafico_ambitos`.
+
     Devuelve:
-        { tipo_participacion: buffer_png }
+        { tipo_participacion: [flowables] }
     """
 
     columna_tipo = "Tipo de Participación"
     columna_ods = "Objetivos de Desarrollo Sostenible (ODS) que Apoya la Actividad"
 
-    if columna_tipo not in dataset.columns or columna_ods not in dataset.columns:
+    conteos = conteos_tortas(dataset, columna_ods, tablas, columna_tipo)
+    return {tipo: graficar_torta_ods(tipo, conteo) for tipo, conteo in conteos.items()}
+
+# ================================================================
+# 🧩 Generar PDFs combinando los gráficos
+# ================================================================
+def _unir_particiones(dfs_divididos, seleccionadas, modo):
+    """Filas de las particiones seleccionadas con las columnas multivalor."""
+    partes = []
+    for sel in seleccionadas:
+        if modo == "subdependencias" and isinstance(sel, (tuple, list)) and len(sel) == 2:
+            df = dfs_divididos.get(sel[0], {}).get(sel[1])
+        else:
+            df = dfs_divididos.get(sel)
+        if isinstance(df, pd.DataFrame):
+            partes.append(df[[c for c in COLUMNAS_MULTIVALOR if c in df.columns]])
+
+    if not partes:
+        return pd.DataFrame()
+
+    # Índices repetidos entre particiones → no hay id de fila confiable
+    unidas = pd.concat(partes)
+    return pd.DataFrame() if unidas.index.has_duplicates else unidas
+
+
+# --- Secciones del informe ---
+# Cada sección declara sus gráficos y datos (ver `scripts.comun.secciones`).
+# Sedes, participación, ámbitos y ODS leen sus conteos del cubo
+# (`p["conteos"]`); ámbitos y ODS piden además la medida "multivalor":
+# sin ellas no se construyen las tablas largas de `tablas_multivalor`.
+def _dibujar_imagen(insumos, clave):
+    buffer = insumos.get(clave)
+    if not buffer:
+        return [], []
+    return [imagen_pdf(buffer, width=460, height=280), Spacer(1, 20)], []
+
+
+def _dibujar_participacion(insumos):
+    conteo = insumos.get("participacion")
+    if conteo is None:
+        return [], []
+    torta = torta_participacion(conteo, insumos["dependencia"], insumos["subdependencia"])
+    return [KeepTogether(torta), Spacer(1, 20)], []
+
+
+def _dibujar_tabla(insumos):
+    tabla = insumos.get("tabla")
+    if tabla is None:
+        return [], []
+    return [tabla_larga(tabla, PROPORCIONES_TABLA_RESUMEN)], []
+
+
+def _dibujar_tortas(insumos, clave, titulo, graficar):
+    return [
+        KeepTogether([
+            Paragraph(f"<b>{titulo} - {tipo}</b>", ESTILOS["Heading4"]),
+            Spacer(1, 5),
+            *graficar(tipo, conteo),
+            Spacer(1, 20)
+        ])
+        for tipo, conteo in insumos.get(clave, {}).items()
+    ], []
+
+
+def _conteos_tortas(particion, grupo, columna):
+    """{tipo: conteo} de ámbitos u ODS desde el cubo, avisando los tipos sin datos."""
+    if "Tipo de Participación" not in particion["dataset"].columns or columna not in particion["dataset"].columns:
         print("❌ No existen las columnas necesarias en el dataset.")
         return {}
 
-    resultados = {}
+    etiqueta = "ODS " if grupo == "ods" else ""
+    for tipo in particion["conteos"][f"sin_{grupo}"]:
+        print(f"⚠ Sin datos {etiqueta}para '{tipo}'")
+    return particion["conteos"][grupo]
+
+
+SECCIONES_INSTANCIAS = {
+    "sedes": Seccion(
+        "Instancias por sede", partial(_dibujar_imagen, clave="sedes"),
+        medidas=("sedes",),
+        graficos={"sedes": lambda p: enviar(graficar_conteo_sedes, p["conteos"]["sedes"])}
+    ),
+    "participacion": Seccion(
+        "Tipo de participación", _dibujar_participacion,
+        medidas=("participacion",),
+        datos={"participacion": lambda p: p["conteos"]["participacion"]}
+    ),
+    "gantt": Seccion(
+        "Gantt", partial(_dibujar_imagen, clave="gantt"),
+        graficos={"gantt": lambda p: enviar(
+            graficar_gantt, columnas_gantt(p["dataset"]), p["dependencia"], p["subdependencia"]
+        )}
+    ),
+    "tabla": Seccion(
+        "Tabla resumen", _dibujar_tabla,
+        datos={"tabla": lambda p: datos_tabla_resumen(p["dataset"])}
+    ),
+    "ambitos": Seccion(
+        "Ámbitos estratégicos",
+        partial(_dibujar_tortas, clave="ambitos", titulo="Ámbitos Estratégicos", graficar=graficar_torta_ambitos),
+        medidas=("multivalor", "ambitos"),
+        datos={"ambitos": lambda p: _conteos_tortas(p, "ambitos", COL_AMBITOS)}
+    ),
+    "ods": Seccion(
+        "ODS",
+        partial(_dibujar_tortas, clave="ods", titulo="ODS que Apoya la Actividad", graficar=graficar_torta_ods),
+        medidas=("multivalor", "ods"),
+        datos={"ods": lambda p: _conteos_tortas(p, "ods", COL_ODS)}
+    ),
+}
+
+# Tipos de informe: secciones en el orden en que aparecen
+INFORMES_INSTANCIAS = {
+    "completo": ("sedes", "participacion", "gantt", "tabla", "ambitos", "ods"),
+    "graficos": ("sedes", "participacion", "gantt", "ambitos", "ods"),
+    "tabla": ("participacion", "tabla"),
+}
+
+
+def contenido_pdf_instancias(secciones, insumos):
+    """
+    Flowables del cuerpo del PDF de una partición (sin el título).
+    `insumos`: dependencia, subdependencia y lo calculado para `secciones`.
+    Los usan el PDF por partición y el informe consolidado.
+    """
+    story, _ = dibujar_secciones(SECCIONES_INSTANCIAS, secciones, insumos)
+    return story
 
-    for tipo, df_tipo in dataset.groupby(columna_tipo):
 
-        # Expandir registros separados por ;
-        ods_expandidos = (
-            df_tipo[columna_ods]
-            .dropna()
-            .str.split(";")
-            .explode()
-            .str.strip()
-        )
+def armar_pdf_instancias(secciones, insumos):
+    """
+    Arma el PDF de una partición y devuelve {"pdf": bytes, "logs": [...],
+    "segundos": float}. Recibe solo lo ya calculado: buffers de los
+    gráficos, conteos (participación y {tipo: conteo} de ámbitos/ODS) y
+    las columnas de la tabla resumen, así que puede ejecutarse en el pool.
+    """
+    inicio = time.perf_counter()
+    dependencia, subdependencia = insumos["dependencia"], insumos["subdependencia"]
+
+    story = [
+        Paragraph(f"<b>{dependencia}</b>" +
+                  (f" / {subdependencia}" if subdependencia else ""),
+                  ESTILOS['Heading2']),
+        Spacer(1, 10),
+        *contenido_pdf_instancias(secciones, insumos)
+    ]
 
-        ods_expandidos = ods_expandidos[ods_expandidos != ""]
-        ods_expandidos = ods_expandidos.dropna()
+    salida = io.BytesIO()
+    doc = SimpleDocTemplate(salida, pagesize=A4, **OPCIONES_PDF)
+    doc.build(story)
 
-        if ods_expandidos.empty:
-            print(f"⚠ Sin datos ODS para '{tipo}'")
-            continue
+    return {"pdf": salida.getvalue(), "logs": [], "segundos": time.perf_counter() - inicio}
 
-        # Conteo y porcentaje
-        conteo = ods_expandidos.value_counts()
-        porcentajes = (conteo / conteo.sum() * 100).round(1).astype(str) + "%"
-
-        # FIGURA tamaño grande para evitar título separado
-        fig, ax = plt.subplots(figsize=(10, 11))
-
-        wedges, texts, autotexts = ax.pie(
-            conteo.values,
-            labels=None,               # ❌ SIN labels externos
-            autopct="%1.1f%%",         # ✔ Porcentaje dentro del gráfico
-            startangle=90,
-            textprops={'fontsize': 14} # ✔ tamaños legibles
-        )
-
-        for t in autotexts:
-            t.set_fontsize(14)
-
-        # Título grande
-        ax.set_title(
-            f"Distribución de ODS Apoyados\n({tipo})",
-            pad=30,
-            fontsize=18
-        )
-
-        ax.axis("equal")
-
-        # Tabla inferior
-        colores = [w.get_facecolor() for w in wedges]
-
-        tabla_df = pd.DataFrame({
-            "Color": ["■"] * len(conteo),
-            "ODS": conteo.index.astype(str),
-            "Cantidad": conteo.values,
-            "Porcentaje": porcentajes.values
+
+NOMBRE_INFORME_INSTANCIAS = "Informe_Instancias_Externas.pdf"
+
+
+def _informe_consolidado_instancias(pendientes, secciones, encolar, insumos, destino, bitacora, tiempos):
+    """
+    Escribe todas las particiones de `pendientes` en un único PDF. Los
+    gráficos siguen renderizándose en el pool por ventanas; cada sección
+    se arma cuando el documento la pide.
+    """
+    ruta = destino.ruta(NOMBRE_INFORME_INSTANCIAS)
+
+    if bitacora is not None and bitacora.completada("pdf_consolidado", NOMBRE_INFORME_INSTANCIAS):
+        print(f"⏭ Informe consolidado ya generado: {ruta}")
+        return [ruta]
+
+    inicio = time.perf_counter()
+
+    def partes():
+        for pendiente, graficos in recorrer(en_ventana(pendientes, encolar), "pdf_consolidado",
+                                            total=len(pendientes),
+                                            filas=lambda listo: len(listo[0][1]["dataset"]),
+                                            detalle=lambda listo: listo[0][2]):
+            datos = insumos(pendiente, graficos)
+            yield (datos["dependencia"], datos["subdependencia"]), contenido_pdf_instancias(secciones, datos)
+
+    with destino.abrir(NOMBRE_INFORME_INSTANCIAS) as f:
+        n = construir_informe(f, "Instancias Externas", partes())
+
+    if bitacora is not None:
+        bitacora.registrar("pdf_consolidado", NOMBRE_INFORME_INSTANCIAS)
+        bitacora.finalizar("pdf_consolidado")
+
+    total = time.perf_counter() - inicio
+    if tiempos is not None:
+        tiempos.append({
+            "particion": None, "pdf": ruta,
+            "segundos_pdf": round(total, 3), "segundos_total": round(total, 3),
         })
 
-        # Envolver textos largos (ODS suelen ser largos)
-        tabla_df["ODS"] = [
-            textwrap.fill(v, width=40) for v in tabla_df["ODS"]
-        ]
-
-        # Altura según nº de líneas
-        line_counts = [t.count("\n") + 1 for t in tabla_df["ODS"]]
-        max_lines = max(line_counts)
-
-        # Ajuste dinámico para evitar que el título salte de página
-        plt.subplots_adjust(bottom=0.30 + 0.025 * max_lines)
-
-        tabla = plt.table(
-            cellText=tabla_df.values,
-            colLabels=tabla_df.columns,
-            loc='bottom',
-            cellLoc='center'
-        )
-
-        tabla.auto_set_font_size(False)
-        tabla.set_fontsize(12)
-
-        # Pintar columna color
-        for i, color in enumerate(colores, start=1):
-            cell = tabla[(i, 0)]
-            cell.set_facecolor(color)
-            cell._text.set_text("")
-
-        # Anchos proporcionados
-        col_widths = [0.07, 0.60, 0.15, 0.18]
-        for j, width in enumerate(col_widths):
-            for key, cell in tabla.get_celld().items():
-                if key[1] == j:
-                    cell.set_width(width)
-
-        # Alturas dinámicas
-        base_height = 0.07
-        for i, lines in enumerate(line_counts, start=1):
-            row_height = base_height * min(lines, 8)
-            for j in range(len(tabla_df.columns)):
-                cell = tabla.get_celld().get((i, j))
-                if cell:
-                    cell.set_height(row_height)
-
-        # Guardar a buffer
-        buffer_img = io.BytesIO()
-        plt.savefig(buffer_img, format="png", dpi=200, bbox_inches="tight")
-        plt.close(fig)
-        buffer_img.seek(0)
-
-        resultados[tipo] = buffer_img
-
-    return resultados
+    print(f"\n📚 Informe consolidado generado: {ruta} ({n} secciones · {total:.1f} s)")
+    return [ruta]
 
-# ================================================================
-# 🧩 Generar PDFs combinando los gráficos
-# ================================================================
-def generar_graficos_y_pdfs(dfs_divididos, seleccionadas, modo, ruta_salida):
 
-    os.makedirs(ruta_salida, exist_ok=True)
+def generar_graficos_y_pdfs(dfs_divididos, seleccionadas, modo, ruta_salida, bitacora=None, destino=None,
+                            multivalor=None, perfil_render=None, compresion_pdf=None, pdf_paralelo=True, tiempos=None,
+                            consolidado=False, informe="completo"):
+    """
+    Genera un PDF por dependencia o subdependencia seleccionada, con las
+    secciones del tipo de `informe` (ver INFORMES_INSTANCIAS, o una lista
+    de nombres de SECCIONES_INSTANCIAS); solo se calcula lo que ellas piden.
+    Escritura atómica; con `bitacora` se saltan los PDFs ya registrados.
+    `destino` (p. ej. `DestinoZip`) reemplaza la carpeta `ruta_salida`.
+    `perfil_render` ("borrador", "pantalla" o "impresion") fija la calidad
+    de los gráficos; sin él se usa el perfil activo.
+    `compresion_pdf` ("sin_perdida", "cuantizada" o "jpeg") fija cómo se
+    incrustan los PNG en el PDF (ver `scripts.comun.render`).
+
+    `multivalor`: tablas largas de ámbitos/ODS (`tablas_multivalor`) del
+    DataFrame cargado. Si no se entregan (y alguna sección las necesita),
+    se construyen una vez aquí con las particiones seleccionadas.
+
+    Con `pdf_paralelo` cada PDF se arma en el pool (`armar_pdf_instancias`)
+    y aquí solo se escriben los bytes, en el orden de `seleccionadas`.
+    `tiempos`: igual que en `generar_resumenes_pdf_vform`.
+
+    Con `consolidado` se escribe un solo PDF (NOMBRE_INFORME_INSTANCIAS)
+    con marcadores dependencia → subdependencia e índice; devuelve
+    [ruta del informe].
+    """
+
+    destino = destino if destino is not None else DestinoCarpeta(ruta_salida)
+    if perfil_render is not None:
+        configurar_perfil_render(perfil_render)
+    if compresion_pdf is not None:
+        configurar_compresion_pdf(compresion_pdf)
+    secciones = resolver_secciones(SECCIONES_INSTANCIAS, INFORMES_INSTANCIAS, informe)
+    medidas = medidas_requeridas(SECCIONES_INSTANCIAS, secciones)
     pdfs_generados = []
 
+    if multivalor is None and "multivalor" in medidas:
+        multivalor = tablas_multivalor(_unir_particiones(dfs_divididos, seleccionadas, modo))
+
+    # --- Cubo de conteos (una pasada por fila para todas las particiones) ---
+    # Por subdependencia; dependencias e institución se obtienen sumando.
+    # Ámbitos y ODS se cuentan desde las tablas largas de `multivalor`.
+    medir = partial(medir_instancias, grupos=medidas, tablas=multivalor)
+    claves = {tuple(sel) if isinstance(sel, list) else sel for sel in seleccionadas}
+    cubo = construir_cubo(dfs_divididos, medir, seleccionadas=claves)
+    conteos_por_particion = conteos_por_nivel(
+        cubo, "subdependencia" if modo == "subdependencias" else "dependencia"
+    )
+    print(f"🧊 Cubo de conteos: {len(cubo)} filas · "
+          f"{conteos_por_nivel(cubo, 'institucion')['total']} registros en la selección")
+
+    # --- Particiones pendientes ---
+    pendientes = []
+
     for sel in seleccionadas:
 
         # --- Selección del dataset ---
@@ -693,73 +653,79 @@ def generar_graficos_y_pdfs(dfs_divididos, seleccionadas, modo, ruta_salida):
             print(f"⚠ Dataset vacío para '{dependencia}'")
             continue
 
-        # --- Generar gráficos ---
-        buffer_sedes = graficar_conteo_sedes(dataset)
-        buffer_part = graficar_participacion(dataset, dependencia, subdependencia)
-        buffer_gantt = graficar_gantt(dataset, dependencia, subdependencia)
-
-        tabla_resumen = crear_tabla_resumen(dataset)
+        safe_name = f"{dependencia}_{subdependencia or ''}".replace("/", "_")
+        pdf_path = destino.ruta(f"{safe_name}.pdf")
 
-        graficos_ambitos = generar_grafico_ambitos(dataset)
-        graficos_ods = generar_grafico_ods(dataset)   # <<<<<<<<<< NUEVO
+        if not consolidado and bitacora is not None and bitacora.completada("pdf", sel):
+            pdfs_generados.append(pdf_path)
+            print(f"⏭ PDF ya generado: {pdf_path}")
+            continue
 
-        # --- Crear PDF ---
-        safe_name = f"{dependencia}_{subdependencia or ''}".replace("/", "_")
-        pdf_path = os.path.join(ruta_salida, f"{safe_name}.pdf")
-
-        styles = getSampleStyleSheet()
-        story = [
-            Paragraph(f"<b>{dependencia}</b>" + 
-                      (f" / {subdependencia}" if subdependencia else ""), 
-                      styles['Heading2']),
-            Spacer(1, 10)
-        ]
-
-        # --- Gráficos generales ---
-        for buffer_img in [buffer_sedes, buffer_part, buffer_gantt]:
-            if buffer_img:
-                story.append(Image(buffer_img, width=460, height=280))
-                story.append(Spacer(1, 20))
-
-        # --- Tabla resumen ---
-        if tabla_resumen:
-            story.append(tabla_resumen)
-
-        # --- Gráficos de Ámbitos estratégicos ---
-        for tipo, buffer_img in graficos_ambitos.items():
-            story.append(
-                KeepTogether([
-                    Paragraph(f"<b>Ámbitos Estratégicos - {tipo}</b>", styles["Heading4"]),
-                    Spacer(1, 5),
-                    Image(buffer_img, width=400, height=400),
-                    Spacer(1, 20)
-                ])
-            )
-
-        # --- Gráficos de ODS ---
-        for tipo, buffer_img in graficos_ods.items():
-            story.append(
-                KeepTogether([
-                    Paragraph(f"<b>ODS que Apoya la Actividad - {tipo}</b>", styles["Heading4"]),
-                    Spacer(1, 5),
-                    Image(buffer_img, width=400, height=400),
-                    Spacer(1, 20)
-                ])
-            )
-
-        doc = SimpleDocTemplate(pdf_path, pagesize=A4,
-                                leftMargin=25, rightMargin=25, topMargin=30, bottomMargin=25)
-        doc.build(story)
-
-        # --- Cerrar buffers ---
-        for b in [buffer_sedes, buffer_part, buffer_gantt] + \
-                 list(graficos_ambitos.values()) + \
-                 list(graficos_ods.values()):
-            if b:
-                b.close()
+        clave = tuple(sel) if modo == "subdependencias" else sel
+        conteos = conteos_por_particion.get(clave) or calcular_conteos(dataset, medidas, multivalor)
+
+        particion = {"dependencia": dependencia, "subdependencia": subdependencia,
+                     "dataset": dataset, "conteos": conteos}
+        pendientes.append((sel, particion, safe_name, pdf_path))
+
+    # --- Gráficos y PDFs en el pool ---
+    # Etapa 1: gráficos de las secciones pedidas, por ventana de particiones;
+    # cada trabajo recibe solo conteos o columnas del Gantt.
+    # Etapa 2: con los gráficos listos, el PDF se arma en el pool con
+    # buffers + conteos + tabla (no el DataFrame completo).
+    # Aquí solo se escriben los bytes, en orden.
+    inicios = {}
+    lanzar_pdf = enviar if pdf_paralelo else en_serie
+
+    def encolar(pendiente):
+        _, particion, safe_name, _ = pendiente
+        inicios[safe_name] = time.perf_counter()
+        return encolar_graficos(SECCIONES_INSTANCIAS, secciones, particion)
+
+    def insumos(pendiente, graficos):
+        # Conteos del cubo y tabla aquí
+        particion = pendiente[1]
+        datos = {"dependencia": particion["dependencia"], "subdependencia": particion["subdependencia"]}
+        datos.update(graficos)
+        datos.update(preparar_datos(SECCIONES_INSTANCIAS, secciones, particion))
+        return datos
+
+    if consolidado:
+        return _informe_consolidado_instancias(pendientes, secciones, encolar, insumos, destino, bitacora, tiempos)
+
+    def encolar_pdf(listo):
+        pendiente, graficos = listo
+        return lanzar_pdf(armar_pdf_instancias, secciones, insumos(pendiente, graficos))
+
+    # Avance: ((pendiente, gráficos), armado) con pendiente = (sel, partición, nombre, ruta)
+    armados = en_orden(en_ventana(pendientes, encolar), encolar_pdf)
+    for (pendiente, _), armado in recorrer(armados, "pdf", total=len(pendientes),
+                                           filas=lambda listo: len(listo[0][0][1]["dataset"]),
+                                           detalle=lambda listo: listo[0][0][2]):
+
+        sel, _, safe_name, pdf_path = pendiente
+        for linea in armado["logs"]:
+            print(linea)
+
+        with destino.abrir(f"{safe_name}.pdf") as f:
+            f.write(armado["pdf"])
+
+        if bitacora is not None:
+            bitacora.registrar("pdf", sel)
 
         pdfs_generados.append(pdf_path)
-        print(f"✅ PDF generado: {pdf_path}")
+
+        total = time.perf_counter() - inicios.pop(safe_name)
+        if tiempos is not None:
+            tiempos.append({
+                "particion": sel, "pdf": pdf_path,
+                "segundos_pdf": round(armado["segundos"], 3), "segundos_total": round(total, 3),
+            })
+
+        print(f"✅ PDF generado: {pdf_path} (PDF {armado['segundos']:.1f} s · total {total:.1f} s)")
+
+    if bitacora is not None:
+        bitacora.finalizar("pdf")
 
     print(f"\n📂 Se generaron {len(pdfs_generados)} PDFs correctamente.")
     return pdfs_generados
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+
+# ============================================================
+# 📌 Columnas multivalor (valores separados por ";")
+# ============================================================
+COL_TIPO = "Tipo de Participación"
+COL_AMBITOS = "Ámbitos Estratégicos que Aborda la Actividad"
+COL_ODS = "Objetivos de Desarrollo Sostenible (ODS) que Apoya la Actividad"
+
+COLUMNAS_MULTIVALOR = [COL_AMBITOS, COL_ODS]
+
+
+# ============================================================
+# 🧱 Tabla larga (fila, código)
+# ============================================================
+def explotar_multivalor(df, columna, separador=";"):
+    """
+    Explota UNA vez la columna `columna` de `df` en una tabla larga:
+
+        {
+            "columna":    nombre de la columna,
+            "filas":      etiqueta de índice de la fila original (una por valor),
+            "codigos":    código entero del valor (posición en "categorias"),
+            "categorias": valores distintos, en orden de primera aparición,
+            "origen":     índice de `df` (para validar que una partición lo usa)
+        }
+
+    Mismo criterio que el conteo original: nulos fuera, split por `separador`,
+    strip y sin vacíos. Retorna None si la columna no existe.
+    """
+    if columna not in df.columns:
+        return None
+
+    valores = (
+        df[columna]
+        .dropna()
+        .str.split(separador)
+        .explode()
+        .str.strip()
+    )
+    valores = valores[valores != ""].dropna()
+
+    codigos, categorias = pd.factorize(valores, sort=False)
+
+    return {
+        "columna": columna,
+        "filas": valores.index.to_numpy(),
+        "codigos": codigos.astype(np.int32),
+        "categorias": list(categorias),
+        "origen": df.index,
+    }
+
+
+def tablas_multivalor(df, columnas=None):
+    """{columna: tabla} para cada columna multivalor presente en `df`."""
+    tablas = {}
+    for columna in columnas or COLUMNAS_MULTIVALOR:
+        tabla = explotar_multivalor(df, columna)
+        if tabla is not None:
+            tablas[columna] = tabla
+    return tablas
+
+
+def tabla_de_particion(dataset, columna, tablas):
+    """Tabla precalculada si cubre las filas de `dataset`; si no, se explota `dataset`."""
+    tabla = (tablas or {}).get(columna)
+    if tabla is not None and dataset.index.isin(tabla["origen"]).all():
+        return tabla
+    return explotar_multivalor(dataset, columna)
+
+
+# ============================================================
+# 🔢 Conteos por partición y grupo
+# ============================================================
+def conteos_por_grupo(dataset, columna, col_grupo=COL_TIPO, tablas=None):
+    """
+    Conteo de los valores de `columna` por cada grupo de `col_grupo`
+    (mismo orden que `dataset.groupby(col_grupo)`), sin volver a explotar:
+    las filas de la partición se cruzan con la tabla larga y se cuenta
+    con un único bincount sobre (grupo, código).
+
+    Cada conteo es una Serie ordenada como `value_counts` (mayor a menor;
+    empates por primera aparición dentro del grupo). Un grupo sin valores
+    queda con una Serie vacía.
+
+    Retorna None si faltan columnas.
+    """
+    if col_grupo not in dataset.columns or columna not in dataset.columns:
+        return None
+
+    tabla = tabla_de_particion(dataset, columna, tablas)
+
+    codigos_grupo, grupos = pd.factorize(dataset[col_grupo], sort=True)
+    grupo_por_fila = pd.Series(codigos_grupo, index=dataset.index)
+
+    # --- Cruce: valores de la tabla larga cuyas filas están en la partición ---
+    en_particion = np.flatnonzero(pd.Index(tabla["filas"]).isin(dataset.index))
+    grupo = grupo_por_fila.reindex(tabla["filas"][en_particion]).to_numpy()
+    codigo = tabla["codigos"][en_particion]
+
+    validos = grupo >= 0
+    grupo, codigo = grupo[validos], codigo[validos]
+    posicion = np.arange(len(codigo))
+
+    # --- bincount sobre (grupo, código) + primera aparición para los empates ---
+    n_cat = len(tabla["categorias"])
+    claves = grupo * n_cat + codigo
+    conteos = np.bincount(claves, minlength=len(grupos) * n_cat).reshape(len(grupos), n_cat)
+
+    primera = np.full(len(grupos) * n_cat, len(codigo))
+    np.minimum.at(primera, claves, posicion)
+    primera = primera.reshape(len(grupos), n_cat)
+
+    categorias = np.asarray(tabla["categorias"], dtype=object)
+    resultado = {}
+    for i, nombre in enumerate(grupos):
+        presentes = np.flatnonzero(conteos[i])
+        orden = presentes[np.lexsort((primera[i, presentes], -conteos[i, presentes]))]
+        resultado[nombre] = pd.Series(conteos[i, orden], index=categorias[orden], name="count")
+
+    return resultado
@@ -3,6 +3,13 @@ import os
 import unicodedata
 import difflib
 
+from scripts.comun.salida import DestinoCarpeta
+from scripts.comun.progreso import comprobar_cancelacion, recorrer
+from scripts.comun.excel import normalizar_perfil_excel, escribir_hoja_excel
+from scripts.comun.formatos import (
+    normalizar_formatos, formatos_columnares, columnas_particiones, escribir_particion
+)
+
 
 # ============================================================
 # 🔵 Normalización optimizada
@@ -82,43 +89,69 @@ def dividir_por_subdependencia(dfs):
 # ============================================================
 # 🔵 Exportar subdependencias (optimizado)
 # ============================================================
-def exportar_subdependencias(subdfs, ruta_salida, seleccionadas=None):
+def exportar_subdependencias(subdfs, ruta_salida, seleccionadas=None, bitacora=None, formatos=None,
+                             perfil_excel="clasico", destino=None):
     """
     Exporta los DataFrames de subdependencias.
     Optimización:
     - Menos I/O
     - Evita creación de carpetas innecesarias
     - Limpieza automática de nombres
+    - Escritura atómica y reanudación con `bitacora`
+    - `formatos`: Excel y/o Parquet/Feather/CSV particionados
+    - `perfil_excel="tabla"`: hoja como Tabla de Excel con autofiltro
+    - `destino` (p. ej. `DestinoZip`): salida alternativa a la carpeta
     """
 
     logs = []
-    os.makedirs(ruta_salida, exist_ok=True)
+    destino = destino if destino is not None else DestinoCarpeta(ruta_salida)
+    formatos = normalizar_formatos(formatos)
+    columnares = formatos_columnares(formatos)
+    perfil_excel = normalizar_perfil_excel(perfil_excel)
+    columnas = columnas_particiones(subdfs) if columnares else None
+
+    if bitacora is not None and destino.limpiar_temporales():
+        logs.append("🧹 Temporales de una ejecución interrumpida eliminados.")
 
-    for dependencia, subgrupos in subdfs.items():
-        carpeta_dep = os.path.join(
-            ruta_salida, dependencia.replace("/", "_").replace(" ", "_")
-        )
+    def filas_seleccionadas(par):
+        return sum(len(df) for subdep, df in par[1].items() if not seleccionadas or subdep in seleccionadas)
+
+    for dependencia, subgrupos in recorrer(subdfs.items(), "excel", filas=filas_seleccionadas,
+                                           detalle=lambda par: par[0]):
+        nombre_carpeta = dependencia.replace("/", "_").replace(" ", "_")
+        carpeta_dep = destino.ruta(nombre_carpeta)
 
         exportados = 0
 
         for subdep, df_sub in subgrupos.items():
+            comprobar_cancelacion()
 
             # Filtrar por selección
             if seleccionadas and subdep not in seleccionadas:
                 continue
 
-            # Crear carpeta solo si es necesario
-            if exportados == 0:
-                os.makedirs(carpeta_dep, exist_ok=True)
-
-            # Nombre de archivo limpio
+            # Nombre de archivo limpio (la carpeta se crea solo al escribir)
             archivo = f"{str(subdep).replace('/', '_').replace(' ', '_')}.xlsx"
-            ruta_archivo = os.path.join(carpeta_dep, archivo)
+            archivo_rel = os.path.join(nombre_carpeta, archivo)
+            ruta_archivo = destino.ruta(archivo_rel)
 
-            df_sub.to_excel(ruta_archivo, index=False)
-            logs.append(f"  ✔ Guardado: {ruta_archivo}")
+            if bitacora is not None and bitacora.completada("excel", (dependencia, subdep)):
+                logs.append(f"  ⏭ Ya exportado: {ruta_archivo}")
+                exportados += 1
+                continue
+
+            for formato in columnares:
+                escribir_particion(destino, formato, "instancias_externas", df_sub,
+                                   dependencia, subdep, columnas=columnas)
 
-            exportados += 1
+            if "xlsx" in formatos:
+                with destino.abrir(archivo_rel) as f, pd.ExcelWriter(f, engine="openpyxl") as writer:
+                    escribir_hoja_excel(writer, df_sub, "Sheet1", perfil_excel)
+                logs.append(f"  ✔ Guardado: {ruta_archivo}")
+                exportados += 1
+
+            if bitacora is not None:
+                bitacora.registrar("excel", (dependencia, subdep))
 
         # Eliminar carpeta vacía si no se exportó nada
         if exportados == 0 and os.path.isdir(carpeta_dep):
@@ -127,5 +160,8 @@ def exportar_subdependencias(subdfs, ruta_salida, seleccionadas=None):
             except OSError:
                 pass
 
+    if bitacora is not None:
+        bitacora.finalizar("excel")
+
     logs.append(f"\n📂 Exportación completada en: {ruta_salida}")
     print("\n".join(logs))
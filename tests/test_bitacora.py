@@ -0,0 +1,57 @@
+import json
+import os
+
+from scripts.comun.bitacora import BitacoraExportacion, NOMBRE_BITACORA, leer_bitacora
+
+
+def test_registrar_y_pendientes(tmp_path):
+    bitacora = BitacoraExportacion(str(tmp_path))
+    claves = ["Dep A", ("Dep B", "Sub 1"), ("Dep B", "Sub 2")]
+
+    bitacora.registrar("pdf", ("Dep B", "Sub 1"))
+    bitacora.registrar("pdf", ("Dep B", "Sub 1"))
+
+    assert bitacora.completada("pdf", ["Dep B", "Sub 1"])
+    assert not bitacora.completada("excel", ("Dep B", "Sub 1"))
+    assert bitacora.pendientes("pdf", claves) == ["Dep A", ("Dep B", "Sub 2")]
+    assert bitacora.datos["etapas"]["pdf"]["completadas"] == [["Dep B", "Sub 1"]]
+
+
+def test_reanudar_desde_archivo(tmp_path):
+    ruta = str(tmp_path)
+    previa = BitacoraExportacion(ruta)
+    previa.guardar_parametros(tipo="vform", seleccionadas=[("Dep A", "Sub 1")])
+    previa.registrar("pdf", "Dep A")
+
+    reanudada = BitacoraExportacion(ruta, reanudar=True)
+    assert reanudada.parametros["tipo"] == "vform"
+    assert reanudada.parametros["seleccionadas"] == [["Dep A", "Sub 1"]]
+    assert reanudada.pendientes("pdf", ["Dep A", "Dep B"]) == ["Dep B"]
+
+    reanudada.registrar("pdf", "Dep B")
+    reanudada.finalizar("pdf")
+    etapa = leer_bitacora(ruta)["etapas"]["pdf"]
+    assert etapa == {"completadas": [["Dep A"], ["Dep B"]], "finalizada": True}
+
+
+def test_sin_reanudar_empieza_de_cero(tmp_path):
+    ruta = str(tmp_path)
+    BitacoraExportacion(ruta).registrar("pdf", "Dep A")
+
+    assert BitacoraExportacion(ruta).pendientes("pdf", ["Dep A"]) == ["Dep A"]
+
+
+def test_bitacora_ilegible(tmp_path):
+    with open(os.path.join(tmp_path, NOMBRE_BITACORA), "w", encoding="utf-8") as f:
+        f.write("{no es json")
+
+    assert leer_bitacora(str(tmp_path)) is None
+    assert BitacoraExportacion(str(tmp_path), reanudar=True).pendientes("pdf", ["Dep A"]) == ["Dep A"]
+
+
+def test_escritura_atomica(tmp_path):
+    BitacoraExportacion(str(tmp_path)).registrar("excel", "Dep A")
+
+    assert os.listdir(tmp_path) == [NOMBRE_BITACORA]
+    with open(os.path.join(tmp_path, NOMBRE_BITACORA), encoding="utf-8") as f:
+        assert json.load(f)["etapas"]["excel"]["completadas"] == [["Dep A"]]
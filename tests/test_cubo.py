@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from scripts.comun.cubo import construir_cubo, acumular, conteo_medida, filtrar_cubo
+
+
+def medir(df):
+    return [("total", pd.Series("Total", index=df.index)), ("estado", df["Estado"])]
+
+
+@pytest.fixture
+def particiones():
+    return {
+        "Dep A": {
+            "Sub 1": pd.DataFrame({"Estado": ["Enviada", "Borrador", "Enviada"]}),
+            "Sub 2": pd.DataFrame({"Estado": ["Borrador", None]}),
+        },
+        "Dep B": {
+            "Sub 3": pd.DataFrame({"Estado": ["Enviada"]}),
+        },
+    }
+
+
+def _totales(cubo, claves):
+    return cubo.groupby(claves + ["medida", "valor"])["cantidad"].sum().to_dict()
+
+
+def test_conteos_por_subdependencia(particiones):
+    cubo = construir_cubo(particiones, medir)
+    sub1 = filtrar_cubo(cubo, "Dep A", "Sub 1")
+
+    assert conteo_medida(sub1, "estado").to_dict() == {"Enviada": 2, "Borrador": 1}
+    # Los nulos no cuentan
+    assert conteo_medida(filtrar_cubo(cubo, "Dep A", "Sub 2"), "estado").to_dict() == {"Borrador": 1}
+
+
+def test_acumular_suma_las_subdependencias(particiones):
+    cubo = construir_cubo(particiones, medir)
+    por_dependencia = acumular(cubo, "dependencia")
+
+    assert _totales(por_dependencia, ["dependencia"]) == _totales(cubo, ["dependencia"])
+    assert conteo_medida(filtrar_cubo(por_dependencia, "Dep A"), "estado").to_dict() == \
+        {"Borrador": 2, "Enviada": 2}
+
+
+def test_acumular_institucion(particiones):
+    cubo = construir_cubo(particiones, medir)
+    institucion = acumular(cubo, "institucion")
+
+    assert conteo_medida(institucion, "total").to_dict() == {"Total": 6}
+    assert conteo_medida(institucion, "estado").to_dict() == {"Enviada": 3, "Borrador": 2}
+    assert institucion["cantidad"].sum() == cubo["cantidad"].sum()
+
+
+def test_seleccionadas(particiones):
+    cubo = construir_cubo(particiones, medir, seleccionadas={("Dep A", "Sub 2"), "Dep B"})
+
+    assert set(zip(cubo["dependencia"], cubo["subdependencia"])) == {("Dep A", "Sub 2"), ("Dep B", "Sub 3")}
+
+
+def test_nivel_desconocido(particiones):
+    with pytest.raises(ValueError):
+        acumular(construir_cubo(particiones, medir), "mes")
+
+
+def test_cubo_vacio():
+    cubo = construir_cubo({}, medir)
+
+    assert cubo.empty
+    assert conteo_medida(cubo, "total") is None
@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from scripts.instancias_externas.multivalor import (
+    COL_TIPO, COL_AMBITOS, tablas_multivalor, conteos_por_grupo
+)
+
+
+@pytest.fixture
+def dataset():
+    return pd.DataFrame({
+        COL_TIPO: ["Mesa", "Congreso", "Mesa", "Mesa", None, "Congreso", "Alumni"],
+        COL_AMBITOS: [
+            "Salud; Educación", "Educación", "Educación ;Salud;", None,
+            "Salud", "Cultura;Salud; ", "",
+        ],
+    }, index=[10, 11, 12, 13, 14, 15, 16])
+
+
+def value_counts_por_grupo(dataset):
+    """Referencia: explotar por grupo y `value_counts` (criterio original)."""
+    resultado = {}
+    for tipo, grupo in dataset.groupby(COL_TIPO):
+        valores = grupo[COL_AMBITOS].dropna().str.split(";").explode().str.strip()
+        resultado[tipo] = valores[valores != ""].dropna().value_counts()
+    return resultado
+
+
+def _items(conteos):
+    return {tipo: list(conteo.items()) for tipo, conteo in conteos.items()}
+
+
+def test_igual_a_value_counts(dataset):
+    assert _items(conteos_por_grupo(dataset, COL_AMBITOS)) == _items(value_counts_por_grupo(dataset))
+
+
+def test_particion_con_tablas_precalculadas(dataset):
+    tablas = tablas_multivalor(dataset)
+    particion = dataset.loc[[11, 12, 15]]
+
+    assert _items(conteos_por_grupo(particion, COL_AMBITOS, tablas=tablas)) == \
+        _items(value_counts_por_grupo(particion))
+
+
+def test_orden_de_grupos_y_grupo_vacio(dataset):
+    conteos = conteos_por_grupo(dataset, COL_AMBITOS)
+
+    assert list(conteos) == ["Alumni", "Congreso", "Mesa"]
+    assert conteos["Alumni"].empty
+
+
+def test_empates_por_primera_aparicion(dataset):
+    # Mesa: Salud y Educación con 2 cada uno; Salud aparece primero
+    assert list(conteos_por_grupo(dataset, COL_AMBITOS)["Mesa"].index) == ["Salud", "Educación"]
+
+
+def test_columnas_faltantes(dataset):
+    assert conteos_por_grupo(dataset.drop(columns=COL_TIPO), COL_AMBITOS) is None
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+from scripts.iniciativas.union import preparar_union, unir_dataset, estadisticas_union
+
+
+@pytest.fixture
+def df1():
+    return pd.DataFrame({"ID": [1, 2, 3, 4], "Nombre": ["a", "b", "c", "d"]})
+
+
+@pytest.fixture
+def df2():
+    # ID 2 repetido, ID 4 sin correspondencia, ID 9 solo en la Síntesis
+    return pd.DataFrame({
+        "ID": [1, 2, 2, 3, 9],
+        "Estado": ["ok", "x", "y", "ok", "z"],
+        "Monto": [10, 20, 30, 40, 50],
+    })
+
+
+def test_estadisticas_union_sin_materializar(df1, df2):
+    stats = estadisticas_union(df1, df2["ID"].value_counts(sort=False))
+
+    assert stats == {
+        "filas_df1": 4,
+        "ids_df1": 4,
+        "ids_df2": 4,
+        "coincidencias": 3,
+        "sin_correspondencia": 1,
+        "ids_duplicados_df2": 1,
+        "filas_resultantes": 5,
+        "filas_con_expansion": 1,
+    }
+
+
+def test_permitir_multiplica_filas(df1, df2):
+    unido = unir_dataset(df1, df2, "permitir")
+
+    assert len(unido) == 5
+    assert unido.loc[unido["ID"] == 2, "Monto"].tolist() == [20, 30]
+    assert unido.loc[unido["ID"] == 4, "Monto"].isna().all()
+
+
+@pytest.mark.parametrize("estrategia, estado, monto", [
+    ("primero", "x", 20),
+    ("ultimo", "y", 30),
+    ("agregar", "x | y", "20 | 30"),
+])
+def test_estrategias_colapsan_a_una_fila_por_id(df1, df2, estrategia, estado, monto):
+    unido = unir_dataset(df1, df2, estrategia)
+
+    assert len(unido) == len(df1)
+    assert unido["ID"].tolist() == df1["ID"].tolist()
+    fila = unido[unido["ID"] == 2].iloc[0]
+    assert fila["Estado"] == estado
+    assert fila["Monto"] == monto
+
+
+def test_error_cancela_con_ids_repetidos(df1, df2):
+    assert preparar_union(df1, df2, "error") is None
+    assert unir_dataset(df1, df2.drop_duplicates("ID"), "error") is not None
+
+
+def test_columnas_repetidas_se_renombran(df1, df2):
+    unido = unir_dataset(df1.assign(Estado="base"), df2, "primero")
+
+    assert "Estado" in unido.columns
+    assert "Estado (Síntesis)" in unido.columns
+
+
+def test_varias_sintesis(df1, df2):
+    otra = pd.DataFrame({"ID": [3, 4], "Estado": ["s", "t"]})
+    unido = unir_dataset(df1, {"A": df2, "B": otra}, "primero")
+
+    assert len(unido) == len(df1)
+    assert unido.loc[unido["ID"] == 4, "Estado (B)"].tolist() == ["t"]
+
+
+def test_estrategia_desconocida(df1, df2):
+    with pytest.raises(ValueError):
+        preparar_union(df1, df2, "otra")
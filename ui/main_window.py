@@ -3,16 +3,15 @@ from tkinter import filedialog, messagebox
 import pandas as pd
 import os
 import sys
-from io import StringIO
 
 import controladores as controlador
-from scripts.instancias_externas.graficos import generar_graficos_y_pdfs
-from scripts.iniciativas.graficos import generar_resumenes_pdf_vform
+from scripts.comun import progreso
 
 from ui.ventana_modo import VentanaModoDivision
 from ui.ventana_dependencias import VentanaSeleccionDependencias
 from ui.ventana_jerarquica import VentanaSeleccionJerarquica
 from ui.zodiac import VentanaFiltroMes
+from ui.tareas import TareasSegundoPlano
 
 
 def resource_path(relative):
@@ -33,14 +32,6 @@ class RedirectPrint:
         pass
 
 
-ZODIAC_MONTHS = [
-    ("♒", "Enero"), ("♓", "Febrero"), ("♈", "Marzo"),
-    ("♉", "Abril"), ("♊", "Mayo"), ("♋", "Junio"),
-    ("♌", "Julio"), ("♍", "Agosto"), ("♎", "Septiembre"),
-    ("♏", "Octubre"), ("♐", "Noviembre"), ("♑", "Diciembre")
-]
-
-
 class AppGUI(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -52,7 +43,7 @@ class AppGUI(ctk.CTk):
         ctk.set_default_color_theme("blue")
 
         self.title("Zodiac: Validador y Procesador de Archivo Excel")
-        self.geometry("580x520")
+        self.geometry("580x720")
 
         # ----------------------------------------------------
         # Selector de formulario
@@ -68,10 +59,7 @@ class AppGUI(ctk.CTk):
 
         self.selector_formulario = ctk.CTkSegmentedButton(
             self,
-            values=[
-                "Formulario de Participaciones en Instancias Externas",
-                "Formulario de Iniciativas VcM"
-            ],
+            values=[controlador.FORMULARIO_INSTANCIAS, controlador.FORMULARIO_VFORM],
             variable=self.tipo_formulario,
             command=self.mostrar_mensaje_formulario
         )
@@ -119,14 +107,170 @@ class AppGUI(ctk.CTk):
         )
         self.btn_procesar.pack(pady=10)
 
+        # ----------------------------------------------------
+        # Reanudar exportación interrumpida ➜ requiere archivo validado
+        # ----------------------------------------------------
+        self.btn_reanudar = ctk.CTkButton(
+            self,
+            text="⏯ Reanudar exportación",
+            command=self.reanudar_exportacion,
+            state="disabled"
+        )
+        self.btn_reanudar.pack(pady=(0, 10))
+
+        # ----------------------------------------------------
+        # Formatos de salida (Excel y/o columnares)
+        # ----------------------------------------------------
+        self.frame_formatos = ctk.CTkFrame(self)
+        self.frame_formatos.pack(pady=(0, 10))
+
+        ctk.CTkLabel(
+            self.frame_formatos,
+            text="Formatos de salida:",
+            font=("Arial", 12)
+        ).grid(row=0, column=0, padx=(10, 5), pady=5)
+
+        self.vars_formatos = {}
+        for col, (formato, texto) in enumerate(
+            [("xlsx", "Excel"), ("parquet", "Parquet"), ("feather", "Feather"), ("csv", "CSV")],
+            start=1
+        ):
+            var = ctk.BooleanVar(value=(formato == "xlsx"))
+            ctk.CTkCheckBox(
+                self.frame_formatos, text=texto, variable=var, width=70
+            ).grid(row=0, column=col, padx=4, pady=5)
+            self.vars_formatos[formato] = var
+
+        # Perfil Excel: Tabla con autofiltro en lugar de hojas por Estado
+        self.var_excel_tabla = ctk.BooleanVar(value=False)
+        ctk.CTkSwitch(
+            self.frame_formatos,
+            text="Excel como tabla con autofiltro (sin hojas por Estado)",
+            variable=self.var_excel_tabla
+        ).grid(row=1, column=0, columnspan=5, padx=10, pady=(0, 5), sticky="w")
+
+        # Agrupación de libros en modo subdependencias (VcM)
+        self.opciones_agrupacion = {
+            "Un Excel por subdependencia": "archivo",
+            "Un Excel por dependencia": "dependencia",
+            "Un solo Excel": "unico"
+        }
+        ctk.CTkLabel(
+            self.frame_formatos,
+            text="Subdependencias:",
+            font=("Arial", 12)
+        ).grid(row=2, column=0, padx=(10, 5), pady=(0, 5))
+
+        self.var_agrupacion = ctk.StringVar(value="Un Excel por subdependencia")
+        ctk.CTkOptionMenu(
+            self.frame_formatos,
+            values=list(self.opciones_agrupacion),
+            variable=self.var_agrupacion
+        ).grid(row=2, column=1, columnspan=4, padx=10, pady=(0, 5), sticky="w")
+
+        # Toda la ejecución (Excel + PDFs) en un único ZIP
+        self.var_zip = ctk.BooleanVar(value=False)
+        ctk.CTkSwitch(
+            self.frame_formatos,
+            text="Guardar todo en un archivo ZIP",
+            variable=self.var_zip
+        ).grid(row=3, column=0, columnspan=5, padx=10, pady=(0, 5), sticky="w")
+
+        # Calidad de los gráficos de los PDFs (perfil de render)
+        self.opciones_calidad = {
+            "Impresión": "impresion",
+            "Pantalla": "pantalla",
+            "Borrador (rápido)": "borrador"
+        }
+        ctk.CTkLabel(
+            self.frame_formatos,
+            text="Gráficos:",
+            font=("Arial", 12)
+        ).grid(row=4, column=0, padx=(10, 5), pady=(0, 5))
+
+        self.var_calidad = ctk.StringVar(value="Impresión")
+        ctk.CTkOptionMenu(
+            self.frame_formatos,
+            values=list(self.opciones_calidad),
+            variable=self.var_calidad
+        ).grid(row=4, column=1, columnspan=4, padx=10, pady=(0, 5), sticky="w")
+
+        # Todas las particiones en un solo PDF con marcadores e índice
+        self.var_consolidado = ctk.BooleanVar(value=False)
+        ctk.CTkSwitch(
+            self.frame_formatos,
+            text="PDF consolidado (un solo archivo con índice)",
+            variable=self.var_consolidado
+        ).grid(row=5, column=0, columnspan=5, padx=10, pady=(0, 5), sticky="w")
+
+        # Cómo se incrustan los gráficos PNG en los PDFs
+        self.opciones_imagenes = {
+            "Sin pérdida": "sin_perdida",
+            "Reducida (256 colores)": "cuantizada"
+        }
+        ctk.CTkLabel(
+            self.frame_formatos,
+            text="Imágenes PDF:",
+            font=("Arial", 12)
+        ).grid(row=6, column=0, padx=(10, 5), pady=(0, 5))
+
+        self.var_imagenes = ctk.StringVar(value="Sin pérdida")
+        ctk.CTkOptionMenu(
+            self.frame_formatos,
+            values=list(self.opciones_imagenes),
+            variable=self.var_imagenes
+        ).grid(row=6, column=1, columnspan=4, padx=10, pady=(0, 5), sticky="w")
+
+        # Tipo de informe: qué secciones lleva cada PDF (solo se calculan esas)
+        self.opciones_informe = {
+            "Completo": "completo",
+            "Solo gráficos": "graficos",
+            "Resumen y tabla": "tabla"
+        }
+        ctk.CTkLabel(
+            self.frame_formatos,
+            text="Contenido PDF:",
+            font=("Arial", 12)
+        ).grid(row=7, column=0, padx=(10, 5), pady=(0, 5))
+
+        self.var_informe = ctk.StringVar(value="Completo")
+        ctk.CTkOptionMenu(
+            self.frame_formatos,
+            values=list(self.opciones_informe),
+            variable=self.var_informe
+        ).grid(row=7, column=1, columnspan=4, padx=10, pady=(0, 5), sticky="w")
+
+        # Unión VcM: qué hacer con IDs repetidos en la Síntesis
+        self.opciones_duplicados = {
+            "Permitir (uno a muchos)": "permitir",
+            "Conservar el primero": "primero",
+            "Conservar el último": "ultimo",
+            "Agregar valores": "agregar",
+            "No unir si hay duplicados": "error"
+        }
+        ctk.CTkLabel(
+            self.frame_formatos,
+            text="IDs repetidos:",
+            font=("Arial", 12)
+        ).grid(row=8, column=0, padx=(10, 5), pady=(0, 5))
+
+        self.var_duplicados = ctk.StringVar(value="Permitir (uno a muchos)")
+        ctk.CTkOptionMenu(
+            self.frame_formatos,
+            values=list(self.opciones_duplicados),
+            variable=self.var_duplicados
+        ).grid(row=8, column=1, columnspan=4, padx=10, pady=(0, 5), sticky="w")
+
         self.label_resultado = ctk.CTkLabel(self, text="", font=("Arial", 13))
         self.label_resultado.pack(pady=10)
 
         self.init_consola()
+        self.init_progreso()
 
         # Internos
         self.ruta_archivo = None
         self.df_validado = None
+        self.multivalor = None
         self.filtro_meses = None
 
     # ----------------------------------------------------
@@ -165,7 +309,7 @@ class AppGUI(ctk.CTk):
     def mostrar_mensaje_formulario(self, seleccion):
         self.reiniciar_interfaz()
 
-        if seleccion == "Formulario de Participaciones en Instancias Externas":
+        if seleccion == controlador.FORMULARIO_INSTANCIAS:
             txt = "Importe datos del registro de participaciones en instancias externas (Microsoft Form)"
         else:
             txt = "Importe datos de Iniciativas y Síntesis Evaluativa (VForm)"
@@ -182,7 +326,7 @@ class AppGUI(ctk.CTk):
         tipo = self.tipo_formulario.get()
 
         # INSTANCIAS EXTERNAS
-        if tipo == "Formulario de Participaciones en Instancias Externas":
+        if tipo == controlador.FORMULARIO_INSTANCIAS:
 
             messagebox.showinfo(
                 "Seleccione archivo",
@@ -197,31 +341,21 @@ class AppGUI(ctk.CTk):
             self.label_ruta.configure(text=f"📄 Archivo seleccionado:\n{ruta}", text_color="green")
 
             self.label_resultado.configure(text="Validando archivo...", text_color="orange")
-            self.update_idletasks()
-
-            valido, df = controlador.validar_archivo_formulario(ruta, tipo)
-
-            if valido:
-                self.df_validado = df
-                self.label_resultado.configure(text="Archivo válido.", text_color="green")
-
-                self.btn_filtro_meses.configure(state="normal")
-                self.btn_procesar.configure(state="disabled")
 
-            else:
-                self.df_validado = None
-                self.label_resultado.configure(text="Archivo inválido.", text_color="red")
-                self.btn_filtro_meses.configure(state="disabled")
-                self.btn_procesar.configure(state="disabled")
+            def validar():
+                valido, df = controlador.validar_archivo_formulario(ruta, tipo)
+                # Ámbitos/ODS explotados una sola vez para todos los PDFs
+                return valido, df, controlador.get_tablas_multivalor(df) if valido else None
 
-            return
+            self.en_segundo_plano("Validando archivo", validar, self.archivo_validado)
 
         # FORMULARIO VCM
-        elif tipo == "Formulario de Iniciativas VcM":
+        elif tipo == controlador.FORMULARIO_VFORM:
 
             messagebox.showinfo(
                 "Selección de archivos",
-                "Debe seleccionar primero el archivo de *Iniciativas VcM* y luego el archivo de *Síntesis Evaluativa*."
+                "Debe seleccionar primero el archivo de *Iniciativas VcM* y luego el archivo de *Síntesis Evaluativa*.\n\n"
+                "Puede elegir varias Síntesis (p. ej. de distintos años) para unirlas en el modo Unión."
             )
 
             ruta1 = filedialog.askopenfilename(
@@ -231,46 +365,77 @@ class AppGUI(ctk.CTk):
             if not ruta1:
                 return
 
-            ruta2 = filedialog.askopenfilename(
-                title="Seleccione archivo de Síntesis Evaluativa",
+            rutas2 = filedialog.askopenfilenames(
+                title="Seleccione uno o más archivos de Síntesis Evaluativa",
                 filetypes=[("Excel files", "*.xlsx")]
             )
-            if not ruta2:
+            if not rutas2:
                 return
 
             self.ruta_iniciativas = ruta1
-            self.ruta_sintesis = ruta2
+            self.ruta_sintesis = list(rutas2)
 
             self.label_ruta.configure(
-                text=f"📄 Iniciativas:\n{ruta1}\n\n📄 Síntesis:\n{ruta2}",
+                text=f"📄 Iniciativas:\n{ruta1}\n\n📄 Síntesis:\n" + "\n".join(rutas2),
                 text_color="green"
             )
 
             self.label_resultado.configure(text="Validando archivos...", text_color="orange")
-            self.update_idletasks()
 
-            valid1, df1 = controlador.validar_archivo_formulario(ruta1, tipo, "columnas_vform1")
-            valid2, df2 = controlador.validar_archivo_formulario(ruta2, tipo, "columnas_vform2")
+            def validar():
+                return (
+                    controlador.validar_archivo_formulario(ruta1, tipo, "columnas_vform1"),
+                    [(ruta2, controlador.validar_archivo_formulario(ruta2, tipo, "columnas_vform2"))
+                     for ruta2 in rutas2]
+                )
 
-            if valid1 and valid2:
-                self.df_validado = {"iniciativas": df1, "sintesis": df2}
+            self.en_segundo_plano("Validando archivos", validar, self.archivos_vform_validados)
 
-                self.label_resultado.configure(
-                    text="Archivos válidos. Seleccione filtro de meses.",
-                    text_color="green"
-                )
+    def archivo_validado(self, resultado):
+        valido, df, multivalor = resultado
 
-                self.btn_filtro_meses.configure(state="normal")
-                self.btn_procesar.configure(state="disabled")
+        if valido:
+            self.df_validado = df
+            self.multivalor = multivalor
+            self.label_resultado.configure(text="Archivo válido.", text_color="green")
 
-            else:
-                self.df_validado = None
-                self.label_resultado.configure(
-                    text="Error validando archivos.",
-                    text_color="red"
-                )
-                self.btn_filtro_meses.configure(state="disabled")
-                self.btn_procesar.configure(state="disabled")
+            self.btn_filtro_meses.configure(state="normal")
+            self.btn_procesar.configure(state="disabled")
+            self.btn_reanudar.configure(state="normal")
+
+        else:
+            self.df_validado = None
+            self.multivalor = None
+            self.label_resultado.configure(text="Archivo inválido.", text_color="red")
+            self.btn_filtro_meses.configure(state="disabled")
+            self.btn_procesar.configure(state="disabled")
+            self.btn_reanudar.configure(state="disabled")
+
+    def archivos_vform_validados(self, resultado):
+        (valid1, df1), validaciones = resultado
+
+        if valid1 and all(valido for _, (valido, _) in validaciones):
+            sintesis = [(ruta, df2) for ruta, (_, df2) in validaciones]
+            self.df_validado = {"iniciativas": df1, "sintesis": controlador.combinar_sintesis(sintesis)}
+
+            self.label_resultado.configure(
+                text="Archivos válidos. Seleccione filtro de meses.",
+                text_color="green"
+            )
+
+            self.btn_filtro_meses.configure(state="normal")
+            self.btn_procesar.configure(state="disabled")
+            self.btn_reanudar.configure(state="normal")
+
+        else:
+            self.df_validado = None
+            self.label_resultado.configure(
+                text="Error validando archivos.",
+                text_color="red"
+            )
+            self.btn_filtro_meses.configure(state="disabled")
+            self.btn_procesar.configure(state="disabled")
+            self.btn_reanudar.configure(state="disabled")
 
     # ----------------------------------------------------
     # Abrir ventana modo (dependencias o subdependencias)
@@ -284,54 +449,15 @@ class AppGUI(ctk.CTk):
     # ----------------------------------------------------
     # APLICAR FILTRO INTERNO
     # ----------------------------------------------------
-    def aplicar_filtro_al_df(self, df: pd.DataFrame):
-
-        if df is None or not isinstance(df, pd.DataFrame):
-            return df
-
-        if not self.filtro_meses:
-            return df
-
-        datos = self.filtro_meses
-
-        tipo = self.tipo_formulario.get()
-        columna_fecha = "Hora de inicio" if tipo == "Formulario de Participaciones en Instancias Externas" else "Fecha de creación"
-
-        if columna_fecha not in df.columns:
-            return df
-
-        df2 = df.copy()
-        df2[columna_fecha] = pd.to_datetime(df2[columna_fecha], errors="coerce", dayfirst=True)
-
-        anio = datos.get("anio")
-        if anio is None:
-            return df
-
-        meses_dict = {mes: i + 1 for i, (_, mes) in enumerate(ZODIAC_MONTHS)}
-
-        if datos["modo"] == "mes":
-            mes = datos["mes"]
-            if mes == "todo":
-                return df2[df2[columna_fecha].dt.year == anio]
-            else:
-                m = meses_dict.get(mes)
-                return df2[
-                    (df2[columna_fecha].dt.year == anio) &
-                    (df2[columna_fecha].dt.month == m)
-                ]
-
-        else:
-            inicio_mes = datos["inicio"].split(" ", 1)[1]
-            fin_mes = datos["fin"].split(" ", 1)[1]
-
-            m1 = meses_dict[inicio_mes]
-            m2 = meses_dict[fin_mes]
-
-            return df2[
-                (df2[columna_fecha].dt.year == anio) &
-                (df2[columna_fecha].dt.month >= m1) &
-                (df2[columna_fecha].dt.month <= m2)
-            ]
+    @staticmethod
+    def filtrar_datos(tipo, datos, filtro):
+        """Aplica el filtro de meses (se llama en el hilo de fondo)."""
+        if tipo == controlador.FORMULARIO_INSTANCIAS:
+            return controlador.aplicar_filtro_meses(datos, filtro, tipo)
+        return {
+            "iniciativas": controlador.aplicar_filtro_meses(datos["iniciativas"], filtro, tipo),
+            "sintesis": datos["sintesis"]
+        }
 
     # ----------------------------------------------------
     # PROCESAR
@@ -340,136 +466,178 @@ class AppGUI(ctk.CTk):
         if self.df_validado is None:
             return
 
+        tipo = self.tipo_formulario.get()
+
+        if tipo == controlador.FORMULARIO_VFORM and modo != "union" \
+                and not isinstance(self.df_validado["sintesis"], pd.DataFrame):
+            messagebox.showwarning(
+                "Varias Síntesis",
+                "Con varias Síntesis Evaluativas solo está disponible la unión de datasets."
+            )
+            return
+
         ruta_salida_base = filedialog.askdirectory(title="Seleccione carpeta de destino")
         if not ruta_salida_base:
             return
 
-        tipo = self.tipo_formulario.get()
-
-        # --------------------------------------------
-        # Participaciones en instancias externas
-        # --------------------------------------------
-        if tipo == "Formulario de Participaciones en Instancias Externas":
+        df_validado, filtro = self.df_validado, self.filtro_meses
 
-            df = self.aplicar_filtro_al_df(self.df_validado)
-
-            if modo == "dependencias":
-                deps = controlador.get_dependencias(df)
-                VentanaSeleccionDependencias(
-                    self,
-                    deps,
-                    lambda s: self.exportar_dependencias(df, s, ruta_salida_base)
-                )
+        # El filtro de meses y la división (para listar las particiones)
+        # recorren todo el Excel: corren en segundo plano
+        def preparar():
+            datos = self.filtrar_datos(tipo, df_validado, filtro)
+            df = datos if tipo == controlador.FORMULARIO_INSTANCIAS else datos["iniciativas"]
 
+            if modo == "union":
+                opciones = None
+            elif tipo == controlador.FORMULARIO_INSTANCIAS:
+                opciones = (controlador.get_dependencias(df) if modo == "dependencias"
+                            else controlador.get_subdependencias(df))
             else:
-                subdeps = controlador.get_subdependencias(df)
-                VentanaSeleccionJerarquica(
-                    self,
-                    subdeps,
-                    lambda s: self.exportar_subdependencias(df, s, ruta_salida_base)
-                )
-
-        # --------------------------------------------
-        # Iniciativas VcM
-        # --------------------------------------------
-        else:
-            df1_raw = self.df_validado["iniciativas"]
-            df2 = self.df_validado["sintesis"]
-
-            df1 = self.aplicar_filtro_al_df(df1_raw)
-
-            if modo == "dependencias":
-                deps = controlador.get_dependencias_vform(df1)
-                VentanaSeleccionDependencias(
-                    self,
-                    deps,
-                    lambda s: self.exportar_dependencias_vform(df1, df2, s, ruta_salida_base)
-                )
+                opciones = (controlador.get_dependencias_vform(df) if modo == "dependencias"
+                            else controlador.get_subdependencias_vform(df))
+            return datos, opciones
 
-            elif modo == "subdependencias":
-                subdeps = controlador.get_subdependencias_vform(df1)
-                VentanaSeleccionJerarquica(
-                    self,
-                    subdeps,
-                    lambda s: self.exportar_subdependencias_vform(df1, df2, s, ruta_salida_base)
-                )
+        def elegir_particiones(resultado):
+            datos, opciones = resultado
 
             # 🆕 NUEVO MODO: UNIÓN DE DATASETS
-            elif modo == "union":
+            if modo == "union":
                 # No hay selección de dependencias o subdependencias,
                 # se exporta la unión directamente.
-                self.exportar_union(df1, df2, ruta_salida_base)
+                self.exportar("union", datos, None, ruta_salida_base)
+                return
+
+            ventana = VentanaSeleccionDependencias if modo == "dependencias" else VentanaSeleccionJerarquica
+            ventana(self, opciones, lambda s: self.exportar(modo, datos, s, ruta_salida_base))
+
+        self.en_segundo_plano("Preparando particiones", preparar, elegir_particiones)
+
     # ----------------------------------------------------
-    # Exportar dependencias
+    # Formatos seleccionados
     # ----------------------------------------------------
-    def exportar_dependencias(self, df_dep, seleccionadas, ruta):
-        ruta_final, dfs = controlador.procesar_excel_dependencias(df_dep, ruta, seleccionadas)
-        if not ruta_final or not dfs:
-            self.label_resultado.configure(text="Error al exportar dependencias.", text_color="red")
-            return
+    def formatos_seleccionados(self):
+        formatos = [f for f, var in self.vars_formatos.items() if var.get()]
+        return formatos or ["xlsx"]
 
-        pdfs = generar_graficos_y_pdfs(dfs, seleccionadas, "dependencias", ruta_final)
+    def perfil_excel(self):
+        return "tabla" if self.var_excel_tabla.get() else "clasico"
 
-        self.label_resultado.configure(
-            text=f"Dependencias exportadas. PDFs generados: {len(pdfs)}",
-            text_color="green"
-        )
+    def agrupacion_excel(self):
+        return self.opciones_agrupacion.get(self.var_agrupacion.get(), "archivo")
 
-    def exportar_subdependencias(self, df_sub, seleccionadas, ruta):
-        ruta_final, dfs = controlador.procesar_excel_subdependencias(df_sub, ruta, seleccionadas)
-        if not ruta_final or not dfs:
-            self.label_resultado.configure(text="Error al exportar.", text_color="red")
-            return
+    def perfil_render(self):
+        return self.opciones_calidad.get(self.var_calidad.get(), "impresion")
 
-        pdfs = generar_graficos_y_pdfs(dfs, seleccionadas, "subdependencias", ruta_final)
+    def compresion_pdf(self):
+        return self.opciones_imagenes.get(self.var_imagenes.get(), "sin_perdida")
 
-        self.label_resultado.configure(
-            text=f"Subdependencias exportadas. PDFs generados: {len(pdfs)}",
-            text_color="green"
-        )
+    def tipo_informe(self):
+        return self.opciones_informe.get(self.var_informe.get(), "completo")
 
-    def exportar_dependencias_vform(self, df1, df2, seleccionadas, ruta):
-        ruta_final, d1, d2 = controlador.get_excels_dependencias_vform(df1, df2, ruta, seleccionadas)
+    def estrategia_duplicados(self):
+        return self.opciones_duplicados.get(self.var_duplicados.get(), "permitir")
 
-        if ruta_final is None:
-            self.label_resultado.configure(text="Error exportando VcM.", text_color="red")
+    # ----------------------------------------------------
+    # Reanudar exportación interrumpida
+    # ----------------------------------------------------
+    def reanudar_exportacion(self):
+        if self.df_validado is None:
             return
 
-        pdfs = generar_resumenes_pdf_vform(d1, d2, seleccionadas, "dependencias", ruta_final)
-
-        self.label_resultado.configure(
-            text=f"Dependencias VcM exportadas. PDFs generados: {len(pdfs)}",
-            text_color="green"
-        )
+        ruta = filedialog.askdirectory(title="Seleccione la carpeta de la exportación interrumpida")
+        if not ruta:
+            return
 
-    def exportar_subdependencias_vform(self, df1, df2, seleccionadas, ruta):
-        ruta_final, d1, d2 = controlador.get_excels_subdependencias_vform(df1, df2, ruta, seleccionadas)
+        parametros = controlador.get_parametros_reanudacion(ruta)
+        if parametros is None:
+            messagebox.showwarning(
+                "Reanudar exportación",
+                "La carpeta seleccionada no contiene una bitácora de exportación."
+            )
+            return
 
-        if ruta_final is None:
-            self.label_resultado.configure(text="Error exportando subdeps VcM.", text_color="red")
+        tipo = self.tipo_formulario.get()
+        tipo_esperado = "instancias" if tipo == controlador.FORMULARIO_INSTANCIAS else "vform"
+        if parametros.get("tipo") != tipo_esperado:
+            messagebox.showwarning(
+                "Reanudar exportación",
+                "La exportación interrumpida corresponde a otro tipo de formulario."
+            )
             return
 
-        pdfs = generar_resumenes_pdf_vform(d1, d2, seleccionadas, "subdependencias", ruta_final)
+        # Mismo filtro de meses y formatos que la ejecución original
+        self.filtro_meses = parametros.get("filtro")
+        for formato, var in self.vars_formatos.items():
+            var.set(formato in (parametros.get("formatos") or ["xlsx"]))
+        self.var_excel_tabla.set(parametros.get("perfil_excel") == "tabla")
+        for texto, agrupacion in self.opciones_agrupacion.items():
+            if agrupacion == parametros.get("agrupacion", "archivo"):
+                self.var_agrupacion.set(texto)
+        for texto, estrategia in self.opciones_duplicados.items():
+            if estrategia == parametros.get("estrategia_duplicados", "permitir"):
+                self.var_duplicados.set(texto)
+
+        # Mismos PDFs que la ejecución original (si la bitácora los registra)
+        for variable, opciones, clave in [(self.var_calidad, self.opciones_calidad, "perfil_render"),
+                                          (self.var_imagenes, self.opciones_imagenes, "compresion_pdf"),
+                                          (self.var_informe, self.opciones_informe, "informe")]:
+            for texto, valor in opciones.items():
+                if valor == parametros.get(clave):
+                    variable.set(texto)
+        if "consolidado" in parametros:
+            self.var_consolidado.set(bool(parametros["consolidado"]))
+
+        modo = parametros.get("modo")
+        seleccionadas = parametros.get("seleccionadas")
+        df_validado, filtro = self.df_validado, self.filtro_meses
+
+        self.en_segundo_plano(
+            "Aplicando filtro",
+            lambda: self.filtrar_datos(tipo, df_validado, filtro),
+            lambda datos: self.exportar(modo, datos, seleccionadas, None, reanudar_en=ruta)
+        )
 
-        self.label_resultado.configure(
-            text=f"Subdependencias VcM exportadas. PDFs generados: {len(pdfs)}",
-            text_color="green"
+    # ----------------------------------------------------
+    # Exportar (Excel + PDFs)
+    # ----------------------------------------------------
+    def exportar(self, modo, datos, seleccionadas, ruta, reanudar_en=None):
+        tipo = self.tipo_formulario.get()
+
+        # Las opciones se leen aquí (hilo de Tk); el trabajo corre en segundo plano
+        opciones = dict(
+            reanudar_en=reanudar_en, filtro=self.filtro_meses,
+            formatos=self.formatos_seleccionados(), perfil_excel=self.perfil_excel(),
+            agrupacion=self.agrupacion_excel(), zip_salida=self.var_zip.get(),
+            multivalor=self.multivalor,
+            perfil_render=self.perfil_render(),
+            compresion_pdf=self.compresion_pdf(),
+            consolidado=self.var_consolidado.get(),
+            informe=self.tipo_informe(),
+            estrategia_duplicados=self.estrategia_duplicados()
         )
 
-    def exportar_union(self, df1, df2, ruta):
-        ruta_final = controlador.get_excels_union(df1, df2, ruta)
+        self.label_resultado.configure(text="Exportando...", text_color="orange")
+        self.en_segundo_plano(
+            "Exportando",
+            lambda: controlador.ejecutar_exportacion(tipo, modo, datos, ruta, seleccionadas, **opciones),
+            lambda resultado: self.exportacion_terminada(tipo, modo, resultado)
+        )
 
-        if ruta_final is None:
-            self.label_resultado.configure(
-                text="Error exportando dataset unificado.",
-                text_color="red"
-            )
+    def exportacion_terminada(self, tipo, modo, resultado):
+        if resultado["ruta"] is None:
+            self.label_resultado.configure(text="Error al exportar.", text_color="red")
             return
 
-        self.label_resultado.configure(
-            text=f"Dataset unificado exportado correctamente en:\n{ruta_final}",
-            text_color="green"
-        )
+        if modo == "union":
+            texto = f"Dataset unificado exportado correctamente en:\n{resultado['ruta']}"
+        else:
+            texto = (
+                f"{'Dependencias' if modo == 'dependencias' else 'Subdependencias'}"
+                f"{' VcM' if tipo == controlador.FORMULARIO_VFORM else ''} exportadas. "
+                f"PDFs generados: {len(resultado['pdfs'])}"
+            )
+        self.label_resultado.configure(text=texto, text_color="green")
 
     # ----------------------------------------------------
     # Consola interna
@@ -499,7 +667,10 @@ class AppGUI(ctk.CTk):
         )
         self.consola_text.pack(padx=10, pady=10)
 
-        sys.stdout = RedirectPrint(self.log_to_console)
+        # Los prints y el avance (de cualquier hilo) llegan a la ventana por la cola de tareas
+        self.tareas = TareasSegundoPlano(self, self.log_to_console, self.actualizar_progreso)
+        sys.stdout = RedirectPrint(self.tareas.escribir)
+        progreso.suscribir(self.tareas.notificar)
         self.consola_abierta = False
 
     def toggle_consola(self):
@@ -516,17 +687,125 @@ class AppGUI(ctk.CTk):
         self.consola_text.insert("end", text)
         self.consola_text.see("end")
 
+    # ----------------------------------------------------
+    # Trabajos en segundo plano (avance y cancelación)
+    # ----------------------------------------------------
+    def init_progreso(self):
+        self.frame_progreso = ctk.CTkFrame(self)
+
+        self.label_progreso = ctk.CTkLabel(self.frame_progreso, text="", font=("Arial", 11))
+        self.label_progreso.pack(padx=10, pady=(5, 0))
+
+        self.barra_progreso = ctk.CTkProgressBar(self.frame_progreso, mode="determinate", width=400)
+        self.barra_progreso.set(0)
+        self.barra_progreso.pack(padx=10, pady=5)
+        self._barra_indeterminada = False
+
+        self.btn_cancelar = ctk.CTkButton(
+            self.frame_progreso,
+            text="⏹ Cancelar",
+            command=self.cancelar_trabajo,
+            fg_color="firebrick",
+            width=120
+        )
+        self.btn_cancelar.pack(pady=(0, 8))
+
+        self.protocol("WM_DELETE_WINDOW", self.cerrar_ventana)
+
+    def en_segundo_plano(self, texto, funcion, al_terminar):
+        """
+        Corre `funcion` fuera del hilo de Tk mostrando el avance y el botón
+        Cancelar; los botones del flujo quedan deshabilitados hasta que termina
+        y luego se llama `al_terminar(resultado)`.
+        """
+        botones = [self.selector_formulario, self.btn_seleccionar, self.btn_filtro_meses,
+                   self.btn_procesar, self.btn_reanudar]
+        estados = {boton: boton.cget("state") for boton in botones}
+        for boton in botones:
+            boton.configure(state="disabled")
+
+        self.label_progreso.configure(text=f"{texto}...")
+        self.btn_cancelar.configure(state="normal", text="⏹ Cancelar")
+        self.frame_progreso.pack(fill="x", padx=10, pady=(0, 5), before=self.consola_frame)
+        self.barra_indeterminada(True)
+
+        def finalizar():
+            self.barra_indeterminada(False)
+            self.frame_progreso.pack_forget()
+            for boton, estado in estados.items():
+                boton.configure(state=estado)
+
+        def terminado(resultado):
+            finalizar()
+            al_terminar(resultado)
+
+        def fallido(error):
+            finalizar()
+            self.label_resultado.configure(text=f"Error: {error}", text_color="red")
+
+        def cancelado():
+            finalizar()
+            self.label_resultado.configure(
+                text="Trabajo cancelado. Lo ya exportado puede reanudarse con ⏯.",
+                text_color="orange"
+            )
+
+        self.tareas.ejecutar(funcion, terminado, fallido, cancelado)
+
+    def barra_indeterminada(self, activa):
+        """Barra "en movimiento" mientras la etapa no informa un total."""
+        if activa and not self._barra_indeterminada:
+            self.barra_progreso.configure(mode="indeterminate")
+            self.barra_progreso.start()
+        elif not activa and self._barra_indeterminada:
+            self.barra_progreso.stop()
+            self.barra_progreso.configure(mode="determinate")
+        self._barra_indeterminada = activa
+
+    def actualizar_progreso(self, evento):
+        """Etapa en curso con su avance y ETA (eventos de `scripts.comun.progreso`)."""
+        if not self.tareas.ocupado:
+            return
+
+        texto = evento.texto()
+        self.label_progreso.configure(text=texto if len(texto) <= 90 else texto[:87] + "...")
+
+        fraccion = 1.0 if evento.tipo == "fin" else evento.fraccion
+        self.barra_indeterminada(fraccion is None)
+        if fraccion is not None:
+            self.barra_progreso.set(fraccion)
+
+    def cancelar_trabajo(self):
+        self.tareas.cancelar()
+        self.btn_cancelar.configure(state="disabled", text="Cancelando...")
+
+    def cerrar_ventana(self):
+        if self.tareas.ocupado:
+            if self.btn_cancelar.cget("text") == "Cerrando...":
+                return
+            if not messagebox.askyesno("Trabajo en curso", "Hay un trabajo en curso. ¿Cancelarlo y salir?"):
+                return
+            # El hilo de fondo es daemon: se cierra cuando el trabajo termina
+            # de cancelarse, para que descarte el ZIP y cierre la bitácora
+            self.btn_cancelar.configure(state="disabled", text="Cerrando...")
+            self.label_progreso.configure(text="Cancelando el trabajo antes de salir...")
+            self.tareas.cancelar_y_luego(self.destroy)
+            return
+        self.destroy()
+
     # ----------------------------------------------------
     # Reiniciar interfaz
     # ----------------------------------------------------
     def reiniciar_interfaz(self):
         self.ruta_archivo = None
         self.df_validado = None
+        self.multivalor = None
         self.filtro_meses = None
 
         self.btn_seleccionar.configure(state="disabled")
         self.btn_filtro_meses.configure(state="disabled")
         self.btn_procesar.configure(state="disabled")
+        self.btn_reanudar.configure(state="disabled")
 
         self.label_ruta.configure(text="")
         self.label_resultado.configure(text="")
@@ -0,0 +1,110 @@
+import queue
+import threading
+import traceback
+
+from scripts.comun.progreso import Cancelado, pedir_cancelacion, trabajo_cancelable
+
+
+# ============================================================
+# 🧵 Trabajos en segundo plano
+# ============================================================
+# Tk solo se puede tocar desde el hilo principal. El trabajo (validar,
+# dividir, exportar, PDFs) corre en un hilo de fondo y todo lo que debe
+# llegar a la ventana (prints, eventos de avance, resultado, error o
+# cancelación) pasa por una cola que la ventana vacía cada `intervalo_ms`
+# con `after`.
+class TareasSegundoPlano:
+    """Ejecuta un trabajo a la vez fuera del hilo de Tk; `ejecutar` vuelve de inmediato."""
+
+    def __init__(self, ventana, al_escribir, al_progreso=None, intervalo_ms=100):
+        self.ventana = ventana
+        self.al_escribir = al_escribir      # texto → consola (hilo principal)
+        self.al_progreso = al_progreso      # EventoProgreso → barra de avance (hilo principal)
+        self.intervalo_ms = intervalo_ms
+        self.cola = queue.Queue()
+        self.ocupado = False
+        self._respuestas = None
+        self._al_liberar = None
+        self._detenida = False
+        self.ventana.after(self.intervalo_ms, self._revisar_cola)
+
+    def escribir(self, texto):
+        """Destino de `sys.stdout`: se puede llamar desde cualquier hilo."""
+        self.cola.put(("texto", texto))
+
+    def notificar(self, evento):
+        """Oyente de `scripts.comun.progreso`: se llama en el hilo del trabajo."""
+        self.cola.put(("progreso", evento))
+
+    def ejecutar(self, funcion, al_terminar, al_fallar=None, al_cancelar=None):
+        """
+        Corre `funcion()` en un hilo de fondo. Al terminar se llama, en el
+        hilo principal, `al_terminar(resultado)`, `al_fallar(error)` o
+        `al_cancelar()`.
+        """
+        if self.ocupado:
+            raise RuntimeError("Ya hay un trabajo en curso.")
+
+        self.ocupado = True
+        self._respuestas = {"fin": al_terminar, "error": al_fallar, "cancelado": al_cancelar}
+        threading.Thread(target=self._correr, args=(funcion,), daemon=True).start()
+
+    def cancelar(self):
+        """Pide cancelar: el trabajo se detiene en la próxima partición."""
+        if self.ocupado:
+            pedir_cancelacion()
+
+    def cancelar_y_luego(self, al_liberar):
+        """
+        Pide cancelar y, cuando el trabajo termine de verdad (con su limpieza:
+        ZIP descartado, bitácora al día), llama `al_liberar()` en el hilo
+        principal en lugar de la respuesta del trabajo. Sirve para cerrar la
+        ventana sin matar el hilo a mitad de una escritura.
+        """
+        if not self.ocupado:
+            al_liberar()
+            return
+        self._al_liberar = al_liberar
+        pedir_cancelacion()
+
+    def _correr(self, funcion):
+        with trabajo_cancelable():
+            try:
+                self.cola.put(("fin", funcion()))
+            except Cancelado:
+                self.cola.put(("cancelado", None))
+            except BaseException as e:
+                # Cualquier salida del trabajo debe llegar a la ventana:
+                # si no, quedaría `ocupado` para siempre
+                self.cola.put(("texto", traceback.format_exc()))
+                self.cola.put(("error", e))
+
+    def _revisar_cola(self):
+        try:
+            while True:
+                tipo, valor = self.cola.get_nowait()
+                if tipo == "texto":
+                    self.al_escribir(valor)
+                    continue
+                if tipo == "progreso":
+                    if self.al_progreso is not None:
+                        self.al_progreso(valor)
+                    continue
+
+                # Fin del trabajo: la ventana vuelve a quedar disponible
+                respuesta = self._respuestas.get(tipo)
+                self.ocupado = False
+                self._respuestas = None
+                if self._al_liberar is not None:
+                    # Tras `al_liberar` (p. ej. destroy) ya no se revisa la cola
+                    self._detenida = True
+                    self._al_liberar()
+                    return
+                if respuesta is not None:
+                    respuesta() if tipo == "cancelado" else respuesta(valor)
+        except queue.Empty:
+            pass
+        finally:
+            # Aunque falle una respuesta, la cola se sigue revisando
+            if not self._detenida:
+                self.ventana.after(self.intervalo_ms, self._revisar_cola)